@@ -2,19 +2,45 @@ import streamlit as st
 from typing import Any, Dict, List
 import uuid
 
-from graph.build_graph import build_app
-from graph.output_schema import TravelOutput
+from graph.build_graph import get_app, warm_start
+from graph.checkpointer import get_checkpointer
+from graph.output_schema import TravelOutput, ordered_city_outputs, to_output_schema
 from graph.state import TravelState
+from graph.streaming import iter_travel_events
+from config import settings
+from tools import telemetry
+from tools.thumbnails import get_thumbnail_store
 
 
 st.set_page_config(page_title="Multimodal Travel Agent", layout="wide")
 st.title("Multimodal Travel Agent")
 
 
+@st.cache_resource
+def boot():
+	# once per server process: compile the shared graph, create the API tools and
+	# load the embedding model + Chroma in the background, so the first query doesn't pay for it.
+	# run_app.py has usually done this before the first session; then it's a no-op
+	return warm_start()
+
+
+boot()
+
+
+@st.cache_resource
+def start_metrics():
+	# once per server process; Prometheus scrapes http://<host>:METRICS_PORT/metrics
+	if settings.METRICS_PORT:
+		return telemetry.start_metrics_server(settings.METRICS_PORT)
+	return None
+
+
+start_metrics()
+
+
 def get_graph():
-	if "app_graph" not in st.session_state:
-		st.session_state["app_graph"] = build_app(enable_checkpointer=True)
-	return st.session_state["app_graph"]
+	# one compiled graph + checkpointer per process; sessions are isolated by thread_id
+	return get_app()
 
 
 def get_thread_id():
@@ -25,24 +51,85 @@ def get_thread_id():
 	return st.session_state["thread_id"]
 
 
-def to_output_schema(state: TravelState) -> TravelOutput:
-	# Convert weather dicts to strings for simple rendering
-	weather_strs: List[str] = []
-	for d in state.weather_forecast or []:
-		try:
-			weather_strs.append(
-				f"{d.get('date','')}: {d.get('temp_min','?')}°C - {d.get('temp_max','?')}°C ({d.get('description','')})"
-			)
-		except Exception:
-			# fallback to string representation
-			weather_strs.append(str(d))
+def render_weather(weather_forecast: List[Dict[str, Any]], weather_strs: List[str]):
+	try:
+		import pandas as pd
+		import altair as alt
+		df = pd.DataFrame(weather_forecast)
+		if {"date", "temp_min", "temp_max"}.issubset(df.columns):
+			# ensure proper ordering and numeric typing for plotting
+			df["date"] = pd.to_datetime(df["date"], errors="coerce")
+			df = df.dropna(subset=["date"]).sort_values("date")
+			df["date_str"] = df["date"].dt.strftime("%Y-%m-%d")
+			if len(df) >= 1:
+				chart_data = df.melt(id_vars=["date_str"], value_vars=["temp_min", "temp_max"], var_name="series", value_name="temp")
+				chart = (
+					alt.Chart(chart_data)
+					.mark_line(point=True)
+					.encode(
+						x=alt.X("date_str:N", title="Date"),
+						y=alt.Y("temp:Q", title="°C"),
+						color=alt.Color("series:N", title=""),
+						tooltip=["date_str", "series", "temp"],
+					)
+					.properties(height=240)
+				)
+				st.subheader("Weather (°C)")
+				st.altair_chart(chart, use_container_width=True)
+			else:
+				st.subheader("Weather Forecast")
+				st.table(df)
+		else:
+			st.subheader("Weather Forecast")
+			st.table(df)
+	except Exception:
+		st.subheader("Weather Forecast")
+		st.write(weather_strs)
+
+
+def render_images(image_urls: List[str]):
+	if image_urls:
+		st.subheader("Images")
+		# compact WebP thumbnails; the full-size rendition only loads when clicked. Never waits on a
+		# download here (this also runs mid-stream): missing thumbnails are made in the background
+		thumbnails = get_thumbnail_store().thumbnails(image_urls, wait=False)
+		columns = st.columns(3)
+		for i, (thumbnail, url) in enumerate(zip(thumbnails, image_urls)):
+			with columns[i % 3]:
+				st.image(thumbnail, width="stretch")
+				st.markdown(f"[Full size]({url})")
+
+
+def render_cities(output: TravelOutput, final_state: TravelState):
+	# multi-city itinerary: one tab per city, in the order asked
+	outputs = ordered_city_outputs(final_state)
+	tabs = st.tabs([city.city for city in output.cities])
+	for tab, city, raw in zip(tabs, output.cities, outputs):
+		with tab:
+			st.write(city.city_summary)
+			if raw.get("weather_forecast"):
+				render_weather(raw["weather_forecast"], city.weather_forecast)
+			render_images(city.image_urls)
 
-	return TravelOutput(
-		city_summary=state.city_summary or "",
-		weather_forecast=weather_strs,
-		image_urls=state.image_urls or [],
-		date_range=state.date_range or "",
-	)
+
+def render_timings(timings: List[Dict[str, Any]]):
+	started = min(t["started_at"] for t in timings)
+	ended = max(t["started_at"] + t["ms"] / 1000 for t in timings)
+	st.caption(f"Total {round((ended - started) * 1000)} ms across {len(timings)} node runs")
+	rows = [
+		{
+			"node": t["node"],
+			"start (ms)": round((t["started_at"] - started) * 1000, 1),
+			"wall (ms)": t["ms"],
+			"http calls": t["http_calls"],
+			"http (ms)": t["http_ms"],
+			"http bytes": t["http_bytes"],
+			"cache hit/miss": f'{t["cache_hits"]}/{t["cache_misses"]}',
+			"tokens in/out": f'{t["input_tokens"]}/{t["output_tokens"]}',
+		}
+		for t in sorted(timings, key=lambda t: t["started_at"])
+	]
+	st.table(rows)
 
 
 # Conversation history display
@@ -53,6 +140,8 @@ with st.sidebar:
 	st.header("Conversation History")
 	if st.button("🔄 New Conversation"):
 		if "thread_id" in st.session_state:
+			# the old thread's checkpoints are no longer reachable; free them now rather than at TTL expiry
+			get_checkpointer().delete_thread(st.session_state["thread_id"])
 			del st.session_state["thread_id"]
 		st.session_state["conversation_history"] = []
 		st.rerun()
@@ -73,77 +162,95 @@ if query:
 	
 	# distinction 3: used checkpointer for context preservation
 	config = {"configurable": {"thread_id": thread_id}}
-	result = graph.invoke({"user_query": query}, config)
-	final_state: TravelState = result if isinstance(result, TravelState) else TravelState(**result)
+
+	# placeholders in page order; each is filled as soon as its node finishes
+	notices = st.container()
+	st.subheader("Requested Dates")
+	dates_slot = st.empty()
+	st.subheader("City Summary")
+	summary_slot = st.empty()
+	weather_slot = st.empty()
+	images_slot = st.empty()
+
+	# partial summaries keyed by city ("" for a single-city query)
+	summary_texts = {}
+	with st.spinner("Working on it..."):
+		for event in iter_travel_events(graph, {"user_query": query}, config):
+			if event["type"] == "token":
+				# partial GPT-4o summary as it streams
+				city = event.get("city", "")
+				summary_texts[city] = summary_texts.get(city, "") + event["text"]
+				summary_slot.markdown("\n\n".join(
+					f"**{city}:** {text}" if city else text for city, text in summary_texts.items()
+				) + "▌")
+				continue
+
+			update = event["update"]
+			if event["node"] == "parse":
+				dates_slot.write(update.get("date_range") or "Not provided")
+				if len(update.get("cities") or []) > 1:
+					summary_slot.info(f"Planning {len(update['cities'])} cities: {', '.join(update['cities'])}")
+			if event["node"] == "city":
+				# batch: each city worker reports as soon as it finishes
+				for city_output in update.get("city_outputs") or []:
+					with notices:
+						st.caption(f"✅ {city_output['city']} ready")
+			if update.get("city_summary"):
+				summary_slot.write(update["city_summary"])
+			if event["node"] == "tools":
+				if update.get("weather_forecast"):
+					with weather_slot.container():
+						render_weather(update["weather_forecast"], [])
+				with images_slot.container():
+					render_images(update.get("image_urls") or [])
+
+	final_state = TravelState(**graph.get_state(config).values)
 
 	# Add to conversation history
 	st.session_state["conversation_history"].append({
 		"query": query,
-		"city": final_state.city,
+		"city": ", ".join(final_state.cities) if final_state.cities else final_state.city,
 		"weather_count": len(final_state.weather_forecast or []),
 		"image_count": len(final_state.image_urls or []),
 		"date_range": final_state.date_range or ""
 	})
 
-	# Errors (if any)
-	if final_state.errors:
-		st.warning("\n".join(final_state.errors))
+	# convert and render output (final values replace the streamed partials)
+	output = to_output_schema(final_state)
 
-	# Show context preservation info
-	if final_state.skip_summary:
-		st.info(f"🔄 Context preserved: Using existing summary for {final_state.city}, only updating weather data")
+	with notices:
+		# Errors (if any)
+		if final_state.errors:
+			st.warning("\n".join(final_state.errors))
 
-	# convert and render output
-	output = to_output_schema(final_state)
+		# Show context preservation info
+		if final_state.skip_summary:
+			st.info(f"🔄 Context preserved: Using existing summary for {final_state.city}, only updating weather data")
 
-	st.subheader("Requested Dates")
-	st.write(output.date_range or "Not provided")
-	if output.date_range and len(final_state.weather_forecast or []) < 5:
-		st.warning(
-			"Weather provider returns about 5 days of forecast; your request may extend beyond available data. Showing available days."
-		)
+	dates_slot.write(output.date_range or "Not provided")
+	# (batch queries report this per city in the errors above)
+	if output.date_range and not final_state.cities and len(final_state.weather_forecast or []) < 5:
+		with notices:
+			st.warning(
+				"Weather provider returns about 5 days of forecast; your request may extend beyond available data. Showing available days."
+			)
 
-	st.subheader("City Summary")
-	st.write(output.city_summary)
-
-	# Weather chart (if detailed data exists)
-	if final_state.weather_forecast:
-		try:
-			import pandas as pd
-			import altair as alt
-			df = pd.DataFrame(final_state.weather_forecast)
-			if {"date", "temp_min", "temp_max"}.issubset(df.columns):
-				# ensure proper ordering and numeric typing for plotting
-				df["date"] = pd.to_datetime(df["date"], errors="coerce")
-				df = df.dropna(subset=["date"]).sort_values("date")
-				df["date_str"] = df["date"].dt.strftime("%Y-%m-%d")
-				if len(df) >= 1:
-					chart_data = df.melt(id_vars=["date_str"], value_vars=["temp_min", "temp_max"], var_name="series", value_name="temp")
-					chart = (
-						alt.Chart(chart_data)
-						.mark_line(point=True)
-						.encode(
-							x=alt.X("date_str:N", title="Date"),
-							y=alt.Y("temp:Q", title="°C"),
-							color=alt.Color("series:N", title=""),
-							tooltip=["date_str", "series", "temp"],
-						)
-						.properties(height=240)
-					)
-					st.subheader("Weather (°C)")
-					st.altair_chart(chart, use_container_width=True)
-				else:
-					st.subheader("Weather Forecast")
-					st.table(df)
-			else:
-				st.subheader("Weather Forecast")
-				st.table(df)
-		except Exception:
-			st.subheader("Weather Forecast")
-			st.write(output.weather_forecast)
+	if final_state.cities:
+		with summary_slot.container():
+			render_cities(output, final_state)
+	else:
+		summary_slot.write(output.city_summary)
 
-	# Images
-	if output.image_urls:
-		st.subheader("Images")
-		st.image(output.image_urls, width="stretch")
+		# Weather chart (if detailed data exists)
+		if final_state.weather_forecast:
+			with weather_slot.container():
+				render_weather(final_state.weather_forecast, output.weather_forecast)
+
+		# Images
+		with images_slot.container():
+			render_images(output.image_urls)
 
+	# Debug panel: where this request's time went
+	if final_state.timings:
+		with st.expander("Debug: timing breakdown"):
+			render_timings(final_state.timings)
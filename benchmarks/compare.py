@@ -0,0 +1,44 @@
+"""Diff two benchmark result files.
+
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+
+import json
+import sys
+
+
+def _pct(old, new):
+    if not old or new is None:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def compare(baseline, candidate):
+    """Rows of (scenario, metric, baseline, candidate, change) for every metric present in both."""
+    rows = []
+    for scenario, new in candidate["scenarios"].items():
+        old = baseline["scenarios"].get(scenario)
+        if not old or "skipped" in old or "skipped" in new:
+            continue
+        for stat in ("p50", "p95", "p99"):
+            rows.append((scenario, f"total {stat} ms", old["latency_ms"]["total"][stat], new["latency_ms"]["total"][stat]))
+        for node, stats in new["latency_ms"]["nodes"].items():
+            if node in old["latency_ms"]["nodes"]:
+                rows.append((scenario, f"{node} p95 ms", old["latency_ms"]["nodes"][node]["p95"], stats["p95"]))
+        for n, stats in new["throughput"].items():
+            if n in old["throughput"]:
+                rows.append((scenario, f"{n} threads req/s", old["throughput"][n]["rps"], stats["rps"]))
+        rows.append((scenario, "request heap peak MB", old["memory"]["request_heap_peak_mb"], new["memory"]["request_heap_peak_mb"]))
+    return [row + (_pct(row[2], row[3]),) for row in rows]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m benchmarks.compare baseline.json candidate.json")
+    with open(sys.argv[1]) as f:
+        baseline = json.load(f)
+    with open(sys.argv[2]) as f:
+        candidate = json.load(f)
+    print(f"{baseline['meta'].get('git_commit')} -> {candidate['meta'].get('git_commit')}")
+    for scenario, metric, old, new, change in compare(baseline, candidate):
+        print(f"{scenario:<8} {metric:<24} {old:>10} -> {new:>10}  {change}")
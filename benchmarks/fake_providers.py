@@ -0,0 +1,267 @@
+"""Local stand-ins for every external provider the graph calls.
+
+One threaded HTTP server answers, under separate path prefixes, with
+fixtures in each provider's response format (``benchmarks/fixtures``):
+
+    /owm       OpenWeatherMap geocoding + 5 day / 3 hour forecast
+    /unsplash  Unsplash photo search
+    /pexels    Pexels photo search
+    /tavily    Tavily search
+    /openai    OpenAI chat completions (structured extraction + summaries, optional SSE streaming)
+
+``configure()`` points config.settings and ``OPENAI_BASE_URL`` at the
+server, so ``build_app()`` runs unmodified against it.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from config import settings
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+_USER_QUERY = re.compile(r'User query: "(.*)"')
+_SUMMARY_CITY = re.compile(r"^City: (.+)$|summary about (.+?)\.", re.MULTILINE)
+_CAPITALIZED = re.compile(r"\b[A-Z][a-z]+(?: [A-Z][a-z]+)*")
+
+
+def _load_fixture(fixtures_dir, name):
+    with open(os.path.join(fixtures_dir, name)) as f:
+        return json.load(f)
+
+
+def _fill_city(fixture, city):
+    # fixtures use a {city} placeholder; substitute inside the JSON text so nested strings are covered
+    return json.loads(json.dumps(fixture).replace("{city}", json.dumps(city)[1:-1]))
+
+
+class FakeProviders:
+    def __init__(self, llm_latency=0.0, api_latency=0.0, token_latency=0.0, fixtures_dir=FIXTURES_DIR):
+        self.llm_latency = llm_latency
+        self.api_latency = api_latency
+        self.token_latency = token_latency
+        self.counts = Counter()
+        self._counts_lock = threading.Lock()
+        self._geocode = {k.lower(): v for k, v in _load_fixture(fixtures_dir, "owm_geocode.json").items()}
+        self._forecast = _load_fixture(fixtures_dir, "owm_forecast.json")
+        self._unsplash = _load_fixture(fixtures_dir, "unsplash_search.json")
+        self._pexels = _load_fixture(fixtures_dir, "pexels_search.json")
+        self._tavily = _load_fixture(fixtures_dir, "tavily_search.json")
+        self._summary = _load_fixture(fixtures_dir, "openai_chat.json")["summary"]
+        self._server = None
+        self._thread = None
+
+    # -- lifecycle -------------------------------------------------------
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        providers = self
+
+        class Handler(_Handler):
+            pass
+
+        Handler.providers = providers
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-providers", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def configure(self):
+        """Point the app's settings (and the OpenAI SDK) at this server; call before tools are created."""
+        settings.OPENWEATHER_API_KEY = "bench"
+        settings.UNSPLASH_API_KEY = "bench"
+        settings.PEXELS_API_KEY = None
+        settings.TAVILY_API_KEY = "bench"
+        settings.OPENWEATHER_BASE_URL = f"{self.url}/owm"
+        settings.UNSPLASH_BASE_URL = f"{self.url}/unsplash"
+        settings.PEXELS_BASE_URL = f"{self.url}/pexels"
+        settings.TAVILY_BASE_URL = f"{self.url}/tavily"
+        os.environ["OPENAI_API_KEY"] = "bench"
+        os.environ["OPENAI_BASE_URL"] = f"{self.url}/openai/v1"
+
+    def _count(self, provider):
+        with self._counts_lock:
+            self.counts[provider] += 1
+
+    # -- routing ---------------------------------------------------------
+
+    def handle(self, method, path, query, body):
+        """(provider, payload) for a request, or None for an unknown path."""
+        if path == "/owm/geo/1.0/direct":
+            return "owm_geocode", self._geocode_response(query.get("q", [""])[0])
+        if path == "/owm/data/2.5/forecast":
+            return "owm_forecast", self._forecast
+        if path == "/unsplash/search/photos":
+            return "unsplash", self._unsplash
+        if path == "/pexels/v1/search":
+            return "pexels", self._pexels
+        if path == "/tavily/search" and method == "POST":
+            city = (body.get("query") or "").replace(" city information overview guide", "")
+            return "tavily", _fill_city(self._tavily, city)
+        if path == "/openai/v1/chat/completions" and method == "POST":
+            return "openai", body
+        return None
+
+    def _geocode_response(self, city):
+        hit = self._geocode.get(city.strip().lower())
+        if hit is not None:
+            return hit
+        if not city.strip():
+            return []
+        # unknown cities still geocode, to stable pseudo-coordinates
+        seed = zlib.crc32(city.lower().encode("utf-8"))
+        return [{"name": city, "lat": (seed % 12000) / 100 - 60, "lon": (seed // 12000 % 36000) / 100 - 180, "country": "XX"}]
+
+    def _extract_city(self, prompt):
+        match = _USER_QUERY.search(prompt)
+        user_query = match.group(1) if match else prompt
+        lowered = user_query.lower()
+        for name, hit in self._geocode.items():
+            if name in lowered:
+                return hit[0]["name"], 0.9
+        names = _CAPITALIZED.findall(user_query)
+        return (names[-1], 0.7) if names else ("", 0.2)
+
+    def chat_completion(self, body):
+        """(content, tool_calls) the fake model answers with."""
+        messages = body.get("messages") or [{}]
+        prompt = messages[-1].get("content") or ""
+        if isinstance(prompt, list):
+            prompt = "".join(part.get("text", "") for part in prompt if isinstance(part, dict))
+
+        if body.get("response_format") or body.get("tools"):
+            city, confidence = self._extract_city(prompt)
+            arguments = json.dumps({
+                "city_name": city,
+                "confidence": confidence,
+                "date_reference": None,
+                "original_city_mention": city or None,
+            })
+            if body.get("tools"):
+                name = body["tools"][0]["function"]["name"]
+                return None, [{"id": "call_bench", "type": "function", "function": {"name": name, "arguments": arguments}}]
+            return arguments, None
+
+        match = _SUMMARY_CITY.search(prompt)
+        city = (match.group(1) or match.group(2)).strip() if match else "the city"
+        return self._summary.replace("{city}", city), None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    providers = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        parsed = urlsplit(self.path)
+        body = {}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            body = json.loads(self.rfile.read(length) or b"{}")
+
+        routed = self.providers.handle(method, parsed.path, parse_qs(parsed.query), body)
+        if routed is None:
+            self._send_json(404, {"error": f"no fake for {method} {parsed.path}"})
+            return
+        provider, payload = routed
+        self.providers._count(provider)
+
+        if provider != "openai":
+            time.sleep(self.providers.api_latency)
+            self._send_json(200, payload)
+            return
+
+        time.sleep(self.providers.llm_latency)
+        content, tool_calls = self.providers.chat_completion(payload)
+        if payload.get("stream"):
+            self._send_stream(payload, content, tool_calls)
+        else:
+            self._send_json(200, _completion(payload, content, tool_calls))
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, body, content, tool_calls):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        if tool_calls:
+            deltas = [{"role": "assistant", "tool_calls": [dict(tool_calls[0], index=0)]}]
+        else:
+            words = re.findall(r"\S+\s*", content or "")
+            deltas = [{"role": "assistant", "content": ""}] + [{"content": w} for w in words]
+        for delta in deltas:
+            self._send_event(_chunk(body, delta, None))
+            time.sleep(self.providers.token_latency)
+        self._send_event(_chunk(body, {}, "tool_calls" if tool_calls else "stop"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _send_event(self, payload):
+        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def _completion(body, content, tool_calls):
+    message = {"role": "assistant", "content": content, "refusal": None}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    completion_tokens = len((content or "").split()) or 1
+    return {
+        "id": "chatcmpl-bench",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o"),
+        "choices": [{"index": 0, "message": message, "logprobs": None, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+        "usage": {"prompt_tokens": 100, "completion_tokens": completion_tokens, "total_tokens": 100 + completion_tokens},
+    }
+
+
+def _chunk(body, delta, finish_reason):
+    return {
+        "id": "chatcmpl-bench",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o"),
+        "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish_reason}],
+    }
@@ -0,0 +1,375 @@
+"""Latency / throughput benchmark for the travel graph against local fake providers.
+
+Drives ``build_app()`` end to end: OpenWeatherMap, Unsplash, Tavily and
+OpenAI are served by ``FakeProviders`` (with configurable latency), the
+vector route uses the real Chroma store under ``CHROMA_PERSIST_DIR``.
+
+    python -m benchmarks.run --iterations 20 --concurrency 1,4,16 --llm-latency 0.3 --output bench.json
+    python -m benchmarks.compare old.json bench.json
+
+Scenarios:
+    vector  first query for an ingested city (local parse, vector summary, tools)
+    web     first query for an unknown city (LLM parse, web search + summary, tools)
+    skip    repeat city in the same conversation (summary skipped, tools only)
+    cached  first query in a new conversation for a city another one already summarized
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from benchmarks.fake_providers import FakeProviders
+
+SCENARIOS = ("vector", "web", "skip", "cached")
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(seconds):
+    if not seconds:
+        return {"count": 0}
+    ms = [s * 1000 for s in seconds]
+    return {
+        "count": len(ms),
+        "mean": round(sum(ms) / len(ms), 2),
+        "p50": round(percentile(ms, 50), 2),
+        "p95": round(percentile(ms, 95), 2),
+        "p99": round(percentile(ms, 99), 2),
+        "max": round(max(ms), 2),
+    }
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Wall time of each graph node run, keyed by LangGraph's ``langgraph_node`` metadata."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._starts = {}
+        self._lock = threading.Lock()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # inner runnables (prompt | llm chains) carry the same metadata; only time the node itself
+        if node and kwargs.get("name") == node:
+            self._starts[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        started = self._starts.pop(run_id, None)
+        if started is not None:
+            with self._lock:
+                self.samples[started[0]].append(time.perf_counter() - started[1])
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self.on_chain_end(None, run_id=run_id)
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError):
+        return None
+
+
+def _max_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 2**20 if sys.platform == "darwin" else 2**10
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Bench:
+    def __init__(self, providers, enable_checkpointer=True):
+        from graph.build_graph import build_app
+
+        self.providers = providers
+        self.app = build_app(enable_checkpointer=enable_checkpointer)
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+
+    # -- cache control ---------------------------------------------------
+
+    def reset_caches(self, response_lookups=True):
+        """Empty every process cache; optionally make response-cache lookups always miss."""
+        from graph import response_cache
+        from tools import geocoding, weather_api
+
+        fresh = response_cache.ResponseCache() if response_lookups else _WriteOnlyResponseCache()
+        response_cache._cache = fresh
+        weather_api.forecast_cache.clear()
+        geocoding.get_geocode_cache().clear()
+
+    # -- queries ---------------------------------------------------------
+
+    def _unique_city(self):
+        # unknown to the gazetteer and the vector store, so parse goes to the LLM and the route is web
+        with self._counter_lock:
+            self._counter += 1
+            n = self._counter
+        suffix = ""
+        while True:
+            n, r = divmod(n, 26)
+            suffix += chr(ord("a") + r)
+            if not n:
+                break
+        return f"Benchmark{suffix}"
+
+    def vector_cities(self):
+        from tools.city_index import get_city_index
+
+        return [key.replace("_", " ").title() for key in get_city_index().cities()]
+
+    def _invoke(self, query, thread_id, callbacks=None):
+        config = {"configurable": {"thread_id": thread_id}}
+        if callbacks:
+            config["callbacks"] = callbacks
+        return self.app.invoke({"user_query": query}, config)
+
+    def run_once(self, scenario, timer=None, index=0):
+        """Seconds for the measured invocation of one scenario request."""
+        callbacks = [timer] if timer is not None else None
+        thread_id = str(uuid.uuid4())
+
+        if scenario == "vector":
+            cities = self.vector_cities()
+            query, prime = f"Tell me about {cities[index % len(cities)]}", None
+        elif scenario == "web":
+            query, prime = f"Tell me about {self._unique_city()}", None
+        elif scenario == "skip":
+            city = self._unique_city()
+            query, prime = f"What's the weather in {city} this weekend?", (f"Tell me about {city}", thread_id)
+        elif scenario == "cached":
+            city = self._unique_city()
+            query, prime = f"Tell me about {city}", (f"Tell me about {city}", str(uuid.uuid4()))
+        else:
+            raise ValueError(f"unknown scenario {scenario}")
+
+        if prime is not None:
+            self._invoke(*prime)
+        start = time.perf_counter()
+        self._invoke(query, thread_id, callbacks)
+        return time.perf_counter() - start
+
+    # -- phases ----------------------------------------------------------
+
+    def latency(self, scenario, iterations, warmup):
+        """Serial runs with every cache emptied first: cold per-node latency."""
+        for i in range(warmup):
+            self.reset_caches(response_lookups=scenario == "cached")
+            self.run_once(scenario, index=i)
+
+        timer = NodeTimer()
+        totals = []
+        for i in range(iterations):
+            self.reset_caches(response_lookups=scenario == "cached")
+            totals.append(self.run_once(scenario, timer, index=i))
+        nodes = {node: summarize(samples) for node, samples in sorted(timer.samples.items())}
+        return {"total": summarize(totals), "nodes": nodes}
+
+    def throughput(self, scenario, concurrency, requests):
+        """Requests per second with `concurrency` threads sharing one compiled graph."""
+        self.reset_caches(response_lookups=scenario == "cached")
+        totals, errors = [], 0
+        lock = threading.Lock()
+
+        def one(i):
+            nonlocal errors
+            try:
+                elapsed = self.run_once(scenario, index=i)
+                with lock:
+                    totals.append(elapsed)
+            except Exception:
+                with lock:
+                    errors += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(requests)))
+        wall = time.perf_counter() - start
+        # skip/cached requests each include the priming invocation that sets them up
+        invocations = len(totals) * (2 if scenario in ("skip", "cached") else 1)
+        return {
+            "requests": requests,
+            "errors": errors,
+            "wall_s": round(wall, 3),
+            "rps": round(len(totals) / wall, 2) if wall else None,
+            "graph_invocations_per_s": round(invocations / wall, 2) if wall else None,
+            "latency_ms": summarize(totals),
+        }
+
+    def memory(self, scenario):
+        """Python heap peak for one traced request, plus process RSS."""
+        self.reset_caches(response_lookups=scenario == "cached")
+        tracemalloc.start()
+        try:
+            self.run_once(scenario)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {"request_heap_peak_mb": round(peak / 2**20, 2), "rss_mb": _rss_mb(), "max_rss_mb": _max_rss_mb()}
+
+
+class _WriteOnlyResponseCache:
+    """Response cache whose lookups always miss (writes still cost what they cost in production)."""
+
+    def __init__(self):
+        from graph.response_cache import ResponseCache
+
+        self._cache = ResponseCache()
+
+    def get_summary(self, city):
+        return None
+
+    def get_weather(self, city, date_range):
+        return None
+
+    def get_images(self, city):
+        return None
+
+    def get_extraction(self, query):
+        return None
+
+    def __getattr__(self, name):
+        return getattr(self._cache, name)
+
+
+def run(scenarios=SCENARIOS, iterations=20, warmup=2, concurrency=(1, 4, 16), requests_per_thread=4,
+        llm_latency=0.0, api_latency=0.0, token_latency=0.0, verbose=False):
+    from config import settings
+    from graph import prewarm
+    from tools import rate_limit
+
+    # no on-disk geocode cache or popularity counts: every run starts from the same state
+    settings.GEOCODE_CACHE_PATH = ""
+    settings.THUMBNAIL_DIR = ""
+    settings.POPULARITY_PATH = ""
+    prewarm._tracker = None
+    # the fake providers have no quota; measure the pipeline, not the client-side budgets
+    settings.RATE_LIMITS = ""
+    rate_limit._limiter = None
+
+    results = {
+        "meta": {
+            "git_commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {
+                "iterations": iterations,
+                "warmup": warmup,
+                "concurrency": list(concurrency),
+                "requests_per_thread": requests_per_thread,
+                "llm_latency_s": llm_latency,
+                "api_latency_s": api_latency,
+                "token_latency_s": token_latency,
+                "cache_policy": "latency: all caches cold; throughput: response-cache lookups disabled except 'cached'",
+            },
+        },
+        "scenarios": {},
+    }
+
+    with FakeProviders(llm_latency=llm_latency, api_latency=api_latency, token_latency=token_latency) as providers:
+        providers.configure()
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            bench = Bench(providers)
+            for scenario in scenarios:
+                if scenario == "vector" and not bench.vector_cities():
+                    results["scenarios"][scenario] = {"skipped": "no ingested cities in the vector store"}
+                    continue
+                calls_before = dict(providers.counts)
+                entry = {"latency_ms": bench.latency(scenario, iterations, warmup)}
+                entry["throughput"] = {
+                    str(n): bench.throughput(scenario, n, n * requests_per_thread) for n in concurrency
+                }
+                entry["memory"] = bench.memory(scenario)
+                entry["provider_calls"] = {
+                    k: v - calls_before.get(k, 0) for k, v in sorted(providers.counts.items()) if v - calls_before.get(k, 0)
+                }
+                results["scenarios"][scenario] = entry
+    return results
+
+
+def format_report(results):
+    lines = []
+    for scenario, entry in results["scenarios"].items():
+        if "skipped" in entry:
+            lines.append(f"{scenario}: skipped ({entry['skipped']})")
+            continue
+        total = entry["latency_ms"]["total"]
+        lines.append(f"{scenario}: total p50 {total['p50']} ms, p95 {total['p95']} ms, p99 {total['p99']} ms")
+        for node, stats in entry["latency_ms"]["nodes"].items():
+            lines.append(f"    {node:<15} p50 {stats['p50']:>8} ms  p95 {stats['p95']:>8} ms  p99 {stats['p99']:>8} ms")
+        for n, stats in entry["throughput"].items():
+            lines.append(f"    {n:>3} threads: {stats['rps']} req/s (p95 {stats['latency_ms'].get('p95')} ms, {stats['errors']} errors)")
+        memory = entry["memory"]
+        lines.append(f"    memory: request heap peak {memory['request_heap_peak_mb']} MB, rss {memory['rss_mb']} MB")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the travel graph against local fake providers")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated thread counts")
+    parser.add_argument("--requests-per-thread", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds before each fake chat completion")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds between streamed fake tokens")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="seconds before each fake provider response")
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's own log output")
+    args = parser.parse_args(argv)
+
+    results = run(
+        scenarios=[s for s in args.scenarios.split(",") if s],
+        iterations=args.iterations,
+        warmup=args.warmup,
+        concurrency=[int(n) for n in args.concurrency.split(",") if n],
+        requests_per_thread=args.requests_per_thread,
+        llm_latency=args.llm_latency,
+        api_latency=args.api_latency,
+        token_latency=args.token_latency,
+        verbose=args.verbose,
+    )
+    print(format_report(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Results written to {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
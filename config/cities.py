@@ -0,0 +1,43 @@
+# Gazetteer for the local query parser (graph/local_parser.py).
+# Words that are also common English ("Nice", "Split", "Reading") are left out
+# on purpose; queries about them fall through to the LLM parser.
+KNOWN_CITIES = [
+    "Amsterdam", "Athens", "Bangkok", "Barcelona", "Beijing", "Berlin", "Bogota", "Boston",
+    "Brussels", "Budapest", "Buenos Aires", "Cairo", "Cape Town", "Chicago", "Copenhagen",
+    "Delhi", "Dubai", "Dublin", "Edinburgh", "Florence", "Geneva", "Hanoi", "Havana",
+    "Helsinki", "Hong Kong", "Honolulu", "Istanbul", "Krakow", "Kuala Lumpur", "Kyoto",
+    "Las Vegas", "Lima", "Lisbon", "London", "Los Angeles", "Lyon", "Madrid", "Marrakech",
+    "Melbourne", "Mexico City", "Miami", "Milan", "Montreal", "Mumbai", "Munich",
+    "New Orleans", "New York", "Osaka", "Oslo", "Paris", "Porto", "Prague", "Reykjavik",
+    "Rio de Janeiro", "Rome", "San Francisco", "Seattle", "Seoul", "Seville", "Shanghai",
+    "Singapore", "Stockholm", "Sydney", "Taipei", "Tokyo", "Toronto", "Vancouver", "Venice",
+    "Vienna", "Zurich",
+]
+
+# Nicknames, abbreviations and common misspellings -> canonical city name.
+# Aliases only route to the vector store when their target has been ingested.
+CITY_ALIASES = {
+    "nyc": "new york",
+    "ny": "new york",
+    "new york city": "new york",
+    "big apple": "new york",
+    "the big apple": "new york",
+    "manhattan": "new york",
+    "city of light": "paris",
+    "city of lights": "paris",
+    "tokio": "tokyo",
+    "paras": "paris",
+    "capital of france": "paris",
+    "french capital": "paris",
+    "capital of japan": "tokyo",
+    "japan capital": "tokyo",
+    "japanese capital": "tokyo",
+    "sf": "san francisco",
+    "hk": "hong kong",
+    "rio": "rio de janeiro",
+    "cdmx": "mexico city",
+    "new delhi": "delhi",
+    "bombay": "mumbai",
+    "peking": "beijing",
+    "vegas": "las vegas",
+}
@@ -7,14 +7,20 @@ Instructions:
 - Handle misspellings and variations
 - Extract date/time references if present
 - If no city is clearly mentioned, set confidence < 0.5
+- If the user plans a trip to several cities, list all of them in cities (city_name is the first one); leave cities empty for a single city or a choice between cities
 
 Examples:
 "Tell me about Paras" -> city_name: "Paris", confidence: 0.9
 "What's the weather like in NYC next week?" ->  city_name: "New York", date_reference: "next week"
 "Japan's capital" -> city_name: "Tokyo", confidence: 0.95
+"Paris, Tokyo and Lisbon next month" -> city_name: "Paris", cities: ["Paris", "Tokyo", "Lisbon"], date_reference: "next month", confidence: 0.9
 """
 
 
+# retrieval query for the vector route; ingestion precomputes its embedding per city
+VECTOR_QUERY_TEMPLATE = "Overview and information about {city}"
+
+
 VECTOR_SUMMARY_PROMPT = """Using ONLY the information provided below, write a comprehensive summary about {city}.
 
 Information from knowledge base:
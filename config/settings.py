@@ -22,10 +22,122 @@ UNSPLASH_API_KEY = os.getenv("UNSPLASH_API_KEY")
 PEXELS_API_KEY = os.getenv("PEXELS_API_KEY")
 WEATHERAPI_KEY = os.getenv("WEATHERAPI_KEY")
 
+# Provider endpoints (overridable for local fakes, e.g. the benchmark harness; OpenAI reads OPENAI_BASE_URL itself)
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org")
+UNSPLASH_BASE_URL = os.getenv("UNSPLASH_BASE_URL", "https://api.unsplash.com")
+PEXELS_BASE_URL = os.getenv("PEXELS_BASE_URL", "https://api.pexels.com")
+TAVILY_BASE_URL = os.getenv("TAVILY_BASE_URL")
+
+# Prometheus scrape endpoint for tools.telemetry metrics (0 = disabled)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
 # Storage and app settings
 CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "storage/chroma")
+# touched once the embedding model and Chroma collection are warm (for container healthchecks)
+VECTOR_STORE_READY_FILE = os.getenv("VECTOR_STORE_READY_FILE")
+# ad-hoc query texts without a precomputed embedding are encoded once and kept in an LRU
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "256"))
+# how often the router checks Chroma for newly ingested cities, and how soon it retries when Chroma is unavailable
+CITY_INDEX_REFRESH_SECONDS = int(os.getenv("CITY_INDEX_REFRESH_SECONDS", "300"))
+CITY_INDEX_RETRY_SECONDS = int(os.getenv("CITY_INDEX_RETRY_SECONDS", "30"))
+# incremental ingestion: file/chunk hashes from the last run, extraction workers (0 = one per CPU)
+INGEST_MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH", "storage/ingest_manifest.json")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0"))
+# chunks from all changed cities are embedded together in batches of this size, each upserted as it finishes
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "1024"))
+# keep accented characters ("Champs-Élysées") instead of blanking non-ASCII text during cleaning
+INGEST_PRESERVE_UNICODE = os.getenv("INGEST_PRESERVE_UNICODE", "true").lower() in ("1", "true", "yes")
 DEFAULT_CITY = os.getenv("DEFAULT_CITY", "Paris")
 
+# Conversation checkpoints: "sqlite" (bounded; point CHECKPOINT_PATH at a file to share it between workers) or "memory"
+CHECKPOINTER = os.getenv("CHECKPOINTER", "sqlite")
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", ":memory:")
+# threads idle this long are dropped; each thread keeps at most this many checkpoints (0 = no limit)
+CHECKPOINT_TTL = int(os.getenv("CHECKPOINT_TTL", str(6 * 3600)))
+CHECKPOINT_MAX_PER_THREAD = int(os.getenv("CHECKPOINT_MAX_PER_THREAD", "20"))
+# drop the intermediate supersteps of finished runs, keeping one snapshot per query
+CHECKPOINT_COMPACT = os.getenv("CHECKPOINT_COMPACT", "true").lower() in ("1", "true", "yes")
+
+# Multi-city (batch) queries: cities handled per query, and city workers running at once across the process
+BATCH_MAX_CITIES = int(os.getenv("BATCH_MAX_CITIES", "8"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Headless API (server.py), per worker process: graph runs at once, requests allowed to wait for one
+# (beyond that: 429), and the default/maximum per-request deadline in seconds
+SERVER_MAX_CONCURRENCY = int(os.getenv("SERVER_MAX_CONCURRENCY", "16"))
+SERVER_MAX_QUEUE = int(os.getenv("SERVER_MAX_QUEUE", "32"))
+SERVER_REQUEST_TIMEOUT = float(os.getenv("SERVER_REQUEST_TIMEOUT", "30"))
+SERVER_RETRY_AFTER = int(os.getenv("SERVER_RETRY_AFTER", "1"))
+
+# Geocode cache (city -> coordinates never change; failed lookups retried after the TTL)
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "storage/geocode_cache.sqlite3")
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "1024"))
+GEOCODE_NEGATIVE_TTL = int(os.getenv("GEOCODE_NEGATIVE_TTL", "3600"))
+
+# Forecast cache (OWM refreshes /forecast in 3-hour steps)
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "512"))
+FORECAST_REFRESH_SECONDS = int(os.getenv("FORECAST_REFRESH_SECONDS", str(3 * 3600)))
+FORECAST_COORD_PRECISION = int(os.getenv("FORECAST_COORD_PRECISION", "2"))
+
+# Local query parser: the GPT-4o parse call only runs below this confidence
+LOCAL_PARSE_THRESHOLD = float(os.getenv("LOCAL_PARSE_THRESHOLD", "0.8"))
+
+# Response caches (graph/response_cache.py)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+SUMMARY_CACHE_TTL = int(os.getenv("SUMMARY_CACHE_TTL", str(24 * 3600)))
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", "1800"))
+PARSE_CACHE_SIZE = int(os.getenv("PARSE_CACHE_SIZE", "2048"))
+PARSE_CACHE_TTL = int(os.getenv("PARSE_CACHE_TTL", str(7 * 24 * 3600)))
+PARSE_SIMILARITY_THRESHOLD = float(os.getenv("PARSE_SIMILARITY_THRESHOLD", "0.93"))
+IMAGE_CACHE_TTL = int(os.getenv("IMAGE_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Local content-addressed WebP thumbnails of search results (needs Pillow); an empty THUMBNAIL_DIR
+# (or no Pillow) shows the CDN's own downscaled rendition instead
+THUMBNAIL_DIR = os.getenv("THUMBNAIL_DIR", "storage/thumbnails")
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", "480"))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "75"))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "4"))
+
+# Client-side rate limits per upstream provider as "name=calls/seconds" (Unsplash demo keys allow 50 an hour).
+# RATE_LIMIT_PATH shares the budgets between processes through a SQLite file (unset: per process);
+# RATE_LIMIT_MAX_WAIT is how long a weather call queues for a token (web search half, images not at all)
+RATE_LIMITS = os.getenv("RATE_LIMITS", "openweathermap=60/60,unsplash=50/3600,pexels=200/3600,tavily=100/60")
+RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", "")
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "2"))
+
+# Image search with both UNSPLASH_API_KEY and PEXELS_API_KEY set: Pexels gets a hedged request once Unsplash is
+# slower than its recent IMAGE_HEDGE_PERCENTILE latency (IMAGE_HEDGE_DELAY seconds until IMAGE_HEDGE_MIN_SAMPLES
+# answers are in), and a provider failing IMAGE_BREAKER_FAILURES times in a row is skipped for IMAGE_BREAKER_COOLDOWN s
+IMAGE_HEDGE_PERCENTILE = float(os.getenv("IMAGE_HEDGE_PERCENTILE", "95"))
+IMAGE_HEDGE_DELAY = float(os.getenv("IMAGE_HEDGE_DELAY", "0.8"))
+IMAGE_HEDGE_MIN_SAMPLES = int(os.getenv("IMAGE_HEDGE_MIN_SAMPLES", "20"))
+IMAGE_BREAKER_FAILURES = int(os.getenv("IMAGE_BREAKER_FAILURES", "3"))
+IMAGE_BREAKER_COOLDOWN = float(os.getenv("IMAGE_BREAKER_COOLDOWN", "30"))
+
+# Cache pre-warmer (graph/prewarm.py): PREWARM_THREAD refreshes the cached summary, forecast and images of the
+# PREWARM_TOP_N most asked-about cities every PREWARM_INTERVAL s, PREWARM_MARGIN s before they expire. Popularity
+# decays with a POPULARITY_HALF_LIFE (s) and is only counted while pre-warming is on. POPULARITY_PATH shares it between
+# processes and with `python -m graph.prewarm --list` (unset: per process); counts are written to it every POPULARITY_FLUSH_INTERVAL s.
+# The pre-warmer never takes the last RATE_LIMIT_BACKGROUND_RESERVE of a provider's budget
+PREWARM_THREAD = os.getenv("PREWARM_THREAD", "false").lower() in ("1", "true", "yes")
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "25"))
+PREWARM_INTERVAL = float(os.getenv("PREWARM_INTERVAL", "300"))
+PREWARM_MARGIN = float(os.getenv("PREWARM_MARGIN", "900"))
+PREWARM_MIN_SCORE = float(os.getenv("PREWARM_MIN_SCORE", "2"))
+POPULARITY_PATH = os.getenv("POPULARITY_PATH", "")
+POPULARITY_HALF_LIFE = float(os.getenv("POPULARITY_HALF_LIFE", str(3 * 24 * 3600)))
+POPULARITY_FLUSH_INTERVAL = float(os.getenv("POPULARITY_FLUSH_INTERVAL", "5"))
+POPULARITY_TRACKING = PREWARM_THREAD or bool(POPULARITY_PATH)
+RATE_LIMIT_BACKGROUND_RESERVE = float(os.getenv("RATE_LIMIT_BACKGROUND_RESERVE", "0.5"))
+
+# Shared HTTP client (keep-alive pools, retries on 5xx; a 429 goes to the rate limiter instead)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.3"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+
 
 def require_env(value: str | None, name: str) -> str:
 	"""Return value or raise a helpful error if missing."""
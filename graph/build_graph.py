@@ -1,15 +1,28 @@
+import threading
+
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import Send
 
+from config import settings
+from graph.checkpointer import get_checkpointer, make_checkpointer
+from graph.local_parser import get_local_parser
+from graph.prewarm import start_prewarmer
+from graph.instrumentation import instrument_node
 from graph.state import TravelState
-from graph.nodes.parse_query import parse_query_node
+from graph.nodes.parse_query import parse_query_node, aparse_query_node
 from graph.nodes.router import router_node
-from graph.nodes.city_summary_vector import city_summary_vector_node
-from graph.nodes.city_summary_web import city_summary_web_node
+from graph.nodes.city_summary_vector import city_summary_vector_node, acity_summary_vector_node
+from graph.nodes.city_summary_web import city_summary_web_node, acity_summary_web_node
 from graph.nodes.weather import weather_node
 from graph.nodes.images import images_node
 from graph.nodes.final_assembly_node import final_assembly_node
-from graph.nodes.tool_executor import execute_tool_calls_node
+from graph.nodes.city_batch import city_task, city_worker_node, acity_worker_node
+from graph.nodes.tool_executor import execute_tool_calls_node, aexecute_tool_calls_node
+from tools import vector_store
+from tools.image_api import get_image_tool
+from tools.thumbnails import get_thumbnail_store
+from tools.weather_api import get_weather_tool
+from tools.web_search import get_web_search_tool
 
 
 def _routing_function(state: TravelState) -> str:
@@ -19,46 +32,146 @@ def _routing_function(state: TravelState) -> str:
 	# Skip summary if same city as before
 	if state.skip_summary:
 		return "skip"
-	city_norm = state.city.strip().lower()
-	prepopulated = {"paris", "tokyo", "new york"}
-	return "vector" if city_norm in prepopulated else "web"
+	# router_node already resolved the city against the vector store's index
+	return state.route or "web"
+
+
+# weather/images only depend on state.city, so they start alongside the summary
+ROUTE_TARGETS = {
+	"vector": ["vector_summary", "tools"],
+	"web": ["web_summary", "tools"],
+	"skip": ["tools"],
+	# summary came from the response cache; only weather/images are needed
+	"cached": ["tools"],
+}
 
 
-def build_app(enable_checkpointer=True):
+def _fan_out(state: TravelState) -> list:
+	if len(state.cities) > 1:
+		# multi-city itinerary: one worker per city, all in the same superstep
+		return [Send("city", city_task(state, city)) for city in state.cities]
+	return ROUTE_TARGETS[_routing_function(state)]
+
+
+def _build_graph(parse, vector_summary, web_summary, tools, city_worker, enable_checkpointer, checkpointer=None):
 	graph = StateGraph(TravelState)
 
-	# nodes
-	graph.add_node("parse", parse_query_node)
-	graph.add_node("router", router_node)
-	graph.add_node("vector_summary", city_summary_vector_node)
-	graph.add_node("web_summary", city_summary_web_node)
+	# nodes (each wrapped for timing/tracing; parse opens a new request)
+	graph.add_node("parse", instrument_node("parse", parse, starts_request=True))
+	graph.add_node("router", instrument_node("router", router_node))
+	graph.add_node("vector_summary", instrument_node("vector_summary", vector_summary))
+	graph.add_node("web_summary", instrument_node("web_summary", web_summary))
 	
 	# distinction 1: Manual tool executor (replaces weather + images nodes)
-	graph.add_node("tools", execute_tool_calls_node)
+	graph.add_node("tools", instrument_node("tools", tools))
+
+	# batch queries: summary + tools for one city per Send
+	graph.add_node("city", instrument_node("city", city_worker))
 	
-	graph.add_node("final", final_assembly_node)
+	graph.add_node("final", instrument_node("final", final_assembly_node))
 
 	# flow
 	graph.set_entry_point("parse")
 	graph.add_edge("parse", "router")
 	graph.add_conditional_edges(
 		"router",
-		_routing_function,
-		{"vector": "vector_summary", "web": "web_summary", "skip": "tools"},
+		_fan_out,
+		["vector_summary", "web_summary", "tools", "city"],
 	)
 
-	# distinction 2: Parallel fan-out - both summary paths lead to tools node
-	# the tools node executes weather and images in parallel internally
-	graph.add_edge("vector_summary", "tools")
-	graph.add_edge("web_summary", "tools")
-
-	# sequential to final
+	# distinction 2: Parallel fan-out - the summary branch and the tools branch
+	# run in the same superstep and join at final, so latency is
+	# max(summary, tools) rather than the sum
+	graph.add_edge("vector_summary", "final")
+	graph.add_edge("web_summary", "final")
 	graph.add_edge("tools", "final")
+	graph.add_edge("city", "final")
 	graph.add_edge("final", END)
 
 	# distinction 3: Human-in-the-loop with checkpointer for time travel
 	if enable_checkpointer:
-		memory = MemorySaver()
-		return graph.compile(checkpointer=memory)
+		# bounded SQLite saver by default (TTL, per-thread cap, compaction); see graph/checkpointer.py
+		return graph.compile(checkpointer=checkpointer or make_checkpointer())
 	
-	return graph.compile()
\ No newline at end of file
+	return graph.compile()
+
+
+def build_app(enable_checkpointer=True, checkpointer=None):
+	"""Synchronous graph driven by graph.invoke (used by the Streamlit app).
+
+	Pass a shared `checkpointer` to keep conversations in one store; otherwise
+	each app gets its own from `make_checkpointer()`.
+	"""
+	return _build_graph(
+		parse_query_node,
+		city_summary_vector_node,
+		city_summary_web_node,
+		execute_tool_calls_node,
+		city_worker_node,
+		enable_checkpointer,
+		checkpointer,
+	)
+
+
+def build_async_app(enable_checkpointer=True, checkpointer=None):
+	"""Same topology with coroutine nodes, driven by `await graph.ainvoke(...)`.
+
+	LLM chains use ainvoke and the weather/image/Tavily tools use async HTTP
+	clients, so many in-flight queries share one event loop instead of a
+	thread each.
+	"""
+	return _build_graph(
+		aparse_query_node,
+		acity_summary_vector_node,
+		acity_summary_web_node,
+		aexecute_tool_calls_node,
+		acity_worker_node,
+		enable_checkpointer,
+		checkpointer,
+	)
+
+
+_app = None
+_async_app = None
+_app_lock = threading.Lock()
+
+
+def get_app():
+	"""Process-wide compiled sync graph on the shared checkpointer (one per server, not per session)."""
+	global _app
+	if _app is None:
+		with _app_lock:
+			if _app is None:
+				_app = build_app(checkpointer=get_checkpointer())
+	return _app
+
+
+def get_async_app():
+	"""Process-wide compiled async graph; shares the checkpointer with get_app()."""
+	global _async_app
+	if _async_app is None:
+		with _app_lock:
+			if _async_app is None:
+				_async_app = build_async_app(checkpointer=get_checkpointer())
+	return _async_app
+
+
+def warm_start(async_app=False):
+	"""Server-boot hook: compile the shared graph and create the process-wide helpers it uses.
+
+	The vector store loads on a background thread (poll vector_store.is_ready());
+	a tool whose API key is missing is skipped here and reports the error on use.
+	With PREWARM_THREAD set, the cache pre-warmer starts here too.
+	"""
+	app = get_async_app() if async_app else get_app()
+	get_local_parser()
+	get_thumbnail_store()
+	for get_tool in (get_weather_tool, get_image_tool, get_web_search_tool):
+		try:
+			get_tool()
+		except ValueError as e:
+			print(f"Warm start: {e}")
+	vector_store.warm_up_in_background()
+	if settings.PREWARM_THREAD:
+		start_prewarmer()
+	return app
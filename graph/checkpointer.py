@@ -0,0 +1,363 @@
+"""Bounded, SQLite-backed LangGraph checkpointer.
+
+``MemorySaver`` keeps every superstep of every thread in RAM for the life of
+the process. ``BoundedSqliteSaver`` stores checkpoints in SQLite instead (a
+file shared by all workers, or ``:memory:`` for a single process) and keeps
+it bounded:
+
+- threads idle for longer than ``ttl`` seconds are dropped,
+- each thread keeps at most ``max_checkpoints`` checkpoints,
+- with ``compact=True``, the intermediate supersteps of finished runs are
+  dropped once the next run starts, so a thread keeps one snapshot per query.
+
+Each row holds a full checkpoint (all channel values), so removing older
+rows never breaks the ones that remain.
+"""
+
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+from config import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    source TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class BoundedSqliteSaver(BaseCheckpointSaver[str]):
+    """Checkpoint saver with TTL thread expiry, a per-thread cap and superstep compaction."""
+
+    def __init__(self, path=None, ttl=None, max_checkpoints=None, compact=None, sweep_interval=60.0, serde=None):
+        super().__init__(serde=serde)
+        self.path = path if path is not None else settings.CHECKPOINT_PATH
+        self.ttl = ttl if ttl is not None else settings.CHECKPOINT_TTL
+        self.max_checkpoints = max_checkpoints if max_checkpoints is not None else settings.CHECKPOINT_MAX_PER_THREAD
+        self.compact = compact if compact is not None else settings.CHECKPOINT_COMPACT
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self):
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # autocommit mode; every public method wraps its statements in one transaction
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        # must be set before the first table exists for freed pages to be returned by incremental_vacuum
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        if self.path != ":memory:":
+            # readers in other workers don't block the writer
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _transaction(self, statements):
+        """Run statements(cursor) in one IMMEDIATE transaction (serialized across workers)."""
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(cur)
+                cur.execute("COMMIT")
+                return result
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+
+    # -- reads -----------------------------------------------------------
+
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params = [thread_id, checkpoint_ns]
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            writes = self._pending_writes(thread_id, checkpoint_ns, row[0])
+        return self._to_tuple(thread_id, checkpoint_ns, row, writes)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            metadata = self.serde.loads_typed((row[4], row[5]))
+            if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                writes = self._pending_writes(thread_id, checkpoint_ns, row[0])
+            yield self._to_tuple(thread_id, checkpoint_ns, row, writes, metadata)
+
+    def _pending_writes(self, thread_id, checkpoint_ns, checkpoint_id):
+        # caller holds the lock
+        rows = self._conn.execute(
+            "SELECT task_id, idx, channel, type, value, task_path FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        rows.sort(key=lambda r: writes_sort_key(r[5], r[0], r[1]))
+        return [(task_id, channel, (type_, value)) for task_id, _, channel, type_, value, _ in rows]
+
+    def _to_tuple(self, thread_id, checkpoint_ns, row, writes, metadata=None):
+        checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata_blob = row
+        if metadata is None:
+            metadata = self.serde.loads_typed((metadata_type, metadata_blob))
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=metadata,
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id
+                else None
+            ),
+            pending_writes=[(task_id, channel, self.serde.loads_typed(value)) for task_id, channel, value in writes],
+        )
+
+    # -- writes ----------------------------------------------------------
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        metadata = get_checkpoint_metadata(config, metadata)
+        type_, blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(metadata)
+        now = time.time()
+
+        def statements(cur):
+            cur.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                    metadata.get("source"), type_, blob, metadata_type, metadata_blob,
+                ),
+            )
+            cur.execute("INSERT OR REPLACE INTO threads VALUES (?, ?)", (thread_id, now))
+            # a new run begins: the previous run's intermediate supersteps are no longer needed
+            if self.compact and metadata.get("source") != "loop":
+                self._compact(cur, thread_id, checkpoint_ns)
+            if self.max_checkpoints:
+                self._cap(cur, thread_id, checkpoint_ns)
+
+        self._transaction(statements)
+        self._maybe_sweep(now)
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append((idx >= 0, (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type_, blob, task_path)))
+
+        def statements(cur):
+            for keep_first, row in rows:
+                # regular writes are idempotent per (task, idx); special channels (errors, interrupts) overwrite
+                verb = "INSERT OR IGNORE" if keep_first else "INSERT OR REPLACE"
+                cur.execute(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+        self._transaction(statements)
+
+    def delete_thread(self, thread_id):
+        def statements(cur):
+            for table in ("checkpoints", "writes", "threads"):
+                cur.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+        self._transaction(statements)
+
+    # -- bounds ----------------------------------------------------------
+
+    def _delete_checkpoints(self, cur, thread_id, checkpoint_ns, checkpoint_ids):
+        for checkpoint_id in checkpoint_ids:
+            params = (thread_id, checkpoint_ns, checkpoint_id)
+            cur.execute("DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", params)
+            cur.execute("DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", params)
+
+    def _compact(self, cur, thread_id, checkpoint_ns):
+        """Keep only the last checkpoint of each finished run, plus everything in the current run."""
+        rows = cur.execute(
+            "SELECT checkpoint_id, source FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id",
+            (thread_id, checkpoint_ns),
+        ).fetchall()
+        if len(rows) < 2:
+            return
+        # rows[-1] is the checkpoint that starts the new run; a finished run ends right before each non-loop checkpoint
+        stale = [checkpoint_id for (checkpoint_id, _), (_, next_source) in zip(rows[:-1], rows[1:]) if next_source == "loop"]
+        self._delete_checkpoints(cur, thread_id, checkpoint_ns, stale)
+
+    def _cap(self, cur, thread_id, checkpoint_ns):
+        rows = cur.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, checkpoint_ns, self.max_checkpoints),
+        ).fetchall()
+        self._delete_checkpoints(cur, thread_id, checkpoint_ns, [checkpoint_id for (checkpoint_id,) in rows])
+
+    def _maybe_sweep(self, now):
+        if self.ttl and now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            self.sweep(now)
+
+    def sweep(self, now=None):
+        """Drop threads idle for longer than the TTL; returns how many were removed."""
+        if not self.ttl:
+            return 0
+        cutoff = (now or time.time()) - self.ttl
+
+        def statements(cur):
+            expired = [thread_id for (thread_id,) in cur.execute("SELECT thread_id FROM threads WHERE updated_at < ?", (cutoff,))]
+            for thread_id in expired:
+                for table in ("checkpoints", "writes", "threads"):
+                    cur.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            return len(expired)
+
+        removed = self._transaction(statements)
+        if removed:
+            with self._lock:
+                # hand the freed pages back so the file shrinks as well
+                self._conn.execute("PRAGMA incremental_vacuum")
+        return removed
+
+    def stats(self):
+        with self._lock:
+            threads = self._conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+            checkpoints = self._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+            writes = self._conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0]
+        return {"threads": threads, "checkpoints": checkpoints, "writes": writes}
+
+    # -- async (SQLite calls are short; run them off the event loop) ----
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current, channel):
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+def make_checkpointer(backend=None):
+    """Checkpointer for build_app: "sqlite" (bounded, default) or "memory" (unbounded MemorySaver, debugging only)."""
+    backend = (backend or settings.CHECKPOINTER).lower()
+    if backend == "memory":
+        return MemorySaver()
+    if backend == "sqlite":
+        return BoundedSqliteSaver()
+    raise ValueError(f"Unknown checkpointer backend: {backend}")
+
+
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer():
+    """Process-wide checkpointer behind the shared apps; conversations are isolated by thread_id."""
+    global _checkpointer
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                _checkpointer = make_checkpointer()
+    return _checkpointer
@@ -0,0 +1,97 @@
+"""Per-node timing, spans and metrics for every node registered in the graph.
+
+``instrument_node`` wraps a node function. Each run is timed, traced as a
+span and recorded in the Prometheus registry, and its HTTP calls, cache
+lookups and LLM token usage are collected. The node's update then gains a
+``timings`` entry, so the final state carries a per-request breakdown.
+"""
+
+import inspect
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from langchain_core.callbacks.usage import UsageMetadataCallbackHandler
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tracers.context import register_configure_hook
+
+from tools import telemetry
+
+# one hook for the process: every LLM call made while a node runs reports usage to that node's handler
+_usage_handler: ContextVar[Optional[UsageMetadataCallbackHandler]] = ContextVar("travel_node_usage", default=None)
+register_configure_hook(_usage_handler, inheritable=True)
+
+
+def merge_timings(existing, new):
+    """Reducer for TravelState.timings: entries from a new request replace the previous request's."""
+    existing = existing or []
+    new = new or []
+    if new and existing and new[0].get("request_id") != existing[-1].get("request_id"):
+        return list(new)
+    return existing + new
+
+
+def _token_totals(usage_metadata):
+    input_tokens = sum(usage.get("input_tokens", 0) for usage in usage_metadata.values())
+    output_tokens = sum(usage.get("output_tokens", 0) for usage in usage_metadata.values())
+    return input_tokens, output_tokens
+
+
+@contextmanager
+def _measure(name, request_id):
+    entry = {"request_id": request_id, "started_at": time.time()}
+    start = time.perf_counter()
+    usage = UsageMetadataCallbackHandler()
+    usage_token = _usage_handler.set(usage)
+    try:
+        with telemetry.recording(name) as recorder, telemetry.span(f"node {name}", node=name, request_id=request_id) as span:
+            try:
+                yield entry
+            except Exception as e:
+                telemetry.NODE_ERRORS.inc(node=name)
+                span.record_exception(e)
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                telemetry.NODE_SECONDS.observe(elapsed, node=name)
+                telemetry.record_tokens(name, *_token_totals(usage.usage_metadata))
+                entry.update(recorder.as_dict(), ms=round(elapsed * 1000, 2))
+                span.set_attribute("duration_ms", entry["ms"])
+    finally:
+        _usage_handler.reset(usage_token)
+
+
+def _with_timing(update, entry, starts_request):
+    update = dict(update or {})
+    update["timings"] = [entry]
+    if starts_request:
+        update["request_id"] = entry["request_id"]
+    return update
+
+
+def instrument_node(name, fn, starts_request=False):
+    """Wrap a (sync or async) node; the entry node passes starts_request=True to open a new request id."""
+    pass_config = "config" in inspect.signature(fn).parameters
+
+    def _request_id(state):
+        return uuid.uuid4().hex if starts_request or not state.request_id else state.request_id
+
+    def _args(state, config):
+        return (state, config) if pass_config else (state,)
+
+    if inspect.iscoroutinefunction(fn):
+        async def node(state, config: RunnableConfig = None):
+            with _measure(name, _request_id(state)) as entry:
+                update = await fn(*_args(state, config))
+            return _with_timing(update, entry, starts_request)
+    else:
+        def node(state, config: RunnableConfig = None):
+            with _measure(name, _request_id(state)) as entry:
+                update = fn(*_args(state, config))
+            return _with_timing(update, entry, starts_request)
+
+    node.__name__ = getattr(fn, "__name__", name)
+    node.__doc__ = fn.__doc__
+    return node
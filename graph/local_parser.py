@@ -0,0 +1,194 @@
+import difflib
+import re
+import threading
+
+from config.cities import CITY_ALIASES, KNOWN_CITIES
+from graph.schemas.extraction import CityExtraction
+
+_POSSESSIVE = re.compile(r"'s\b|’s\b")
+_TOKENS = re.compile(r"[a-z0-9]+")
+# "Paris or Rome?" is a choice between cities, not an itinerary through both
+_CHOICE = re.compile(r"\b(?:or|vs|versus|either)\b", re.IGNORECASE)
+# the only text allowed between the cities of an itinerary: "Paris, Tokyo & Rome", "Paris, and Rome"
+_LIST_SEPARATOR = re.compile(r"\s*(?:,|&|and|,\s*and|,\s*&)\s*")
+
+_WEEKDAYS = r"monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+_MONTHS = (
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+)
+_COUNT = r"\d+|a\s+few|a\s+couple\s+of|couple\s+of|few|an?|one|two|three|four|five|six|seven|ten"
+_DAY = r"\d{1,2}(?:st|nd|rd|th)?"
+
+# small date-phrase grammar; alternatives are tried longest-first by the regex engine
+_DATE_PHRASE = re.compile(
+    rf"""\b(?:
+        (?:the\s+)?day\s+after\s+tomorrow
+      | today | tonight | tomorrow
+      | (?:this|next|coming|the\s+coming)\s+(?:weekend|week|month|year|{_WEEKDAYS})
+      | (?:in|for|over)\s+(?:the\s+next\s+)?(?:{_COUNT})\s+(?:days?|weeks?|months?)
+      | (?:the\s+)?next\s+(?:{_COUNT})\s+(?:days?|weeks?)
+      | (?:{_MONTHS})\.?\s+{_DAY}(?:\s*(?:-|to|until|through)\s*(?:(?:{_MONTHS})\.?\s+)?{_DAY})?
+      | {_DAY}\s+(?:of\s+)?(?:{_MONTHS})
+      | \d{{4}}-\d{{2}}-\d{{2}}
+      | (?:on\s+)?(?:{_WEEKDAYS})
+      | (?:in|during)\s+(?:{_MONTHS})
+    )\b""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# words that never start a fuzzy city match (avoids 'weather' ~ 'wether' style noise)
+_STOPWORDS = {
+    "a", "about", "and", "any", "are", "at", "be", "best", "city", "day", "days", "do", "for",
+    "forecast", "from", "give", "go", "going", "how", "i", "in", "info", "information", "is",
+    "it", "like", "me", "month", "my", "near", "next", "of", "on", "plan", "planning", "please",
+    "show", "should", "some", "tell", "the", "there", "things", "this", "to", "travel", "trip",
+    "visit", "visiting", "we", "weather", "week", "weekend", "what", "when", "where", "will",
+    "with",
+}
+
+EXACT_CONFIDENCE = 0.95
+ALIAS_CONFIDENCE = 0.9
+AMBIGUOUS_CONFIDENCE = 0.4
+FUZZY_CUTOFF = 0.85
+# below LOCAL_PARSE_THRESHOLD: a one-letter edit of a common word ("soul" ~ "seoul") looks
+# just like a typo of a city, so a fuzzy match is only a hint and the LLM decides
+FUZZY_MAX_CONFIDENCE = 0.75
+MAX_NGRAM = 4
+
+
+def _normalize(text):
+    return _POSSESSIVE.sub("", (text or "").lower())
+
+
+def _tokenize(text):
+    return _TOKENS.findall(_normalize(text))
+
+
+def extract_date_reference(query):
+    """Span covering every date phrase in the query, e.g. 'from March 3 to March 7'."""
+    matches = list(_DATE_PHRASE.finditer(query or ""))
+    if not matches:
+        return None
+    return query[matches[0].start():matches[-1].end()].strip()
+
+
+class LocalParser:
+    """Deterministic city/date extraction that runs before the LLM parser.
+
+    Exact gazetteer and alias n-gram matches score high; fuzzy matches score
+    by similarity but never high enough to skip the LLM. Several cities joined
+    only by commas, "and" or "&" are a multi-city itinerary; any other phrasing
+    that names several cities ("Paris or Rome", "from New York to Tokyo") is
+    left to the LLM.
+    """
+
+    def __init__(self, cities=None, aliases=None):
+        cities = KNOWN_CITIES if cities is None else cities
+        aliases = CITY_ALIASES if aliases is None else aliases
+        self._display = {" ".join(_tokenize(c)): c for c in cities}
+        # normalized phrase -> (canonical display name, confidence)
+        self._gazetteer = {name: (display, EXACT_CONFIDENCE) for name, display in self._display.items()}
+        for alias, target in aliases.items():
+            target_key = " ".join(_tokenize(target))
+            display = self._display.get(target_key, target.title())
+            self._gazetteer.setdefault(" ".join(_tokenize(alias)), (display, ALIAS_CONFIDENCE))
+        self._names = list(self._gazetteer)
+
+    def _exact_matches(self, tokens):
+        taken = [False] * len(tokens)
+        matches = []
+        for n in range(min(MAX_NGRAM, len(tokens)), 0, -1):
+            for i in range(len(tokens) - n + 1):
+                if any(taken[i:i + n]):
+                    continue
+                phrase = " ".join(tokens[i:i + n])
+                hit = self._gazetteer.get(phrase)
+                if hit is not None:
+                    matches.append((i, n, phrase, hit[0], hit[1]))
+                    taken[i:i + n] = [True] * n
+        return sorted(matches)
+
+    @staticmethod
+    def _is_city_list(text, spans, matches):
+        # spans: (start, end) of each token in text; compare what lies between consecutive matches
+        for (i, n, *_), (j, *_) in zip(matches, matches[1:]):
+            if not _LIST_SEPARATOR.fullmatch(text[spans[i + n - 1][1]:spans[j][0]]):
+                return False
+        return True
+
+    def _fuzzy_match(self, tokens):
+        best = None
+        for n in range(1, min(3, len(tokens)) + 1):
+            for i in range(len(tokens) - n + 1):
+                gram = tokens[i:i + n]
+                if gram[0] in _STOPWORDS or gram[-1] in _STOPWORDS or len("".join(gram)) < 4:
+                    continue
+                phrase = " ".join(gram)
+                for name in difflib.get_close_matches(phrase, self._names, n=1, cutoff=FUZZY_CUTOFF):
+                    ratio = difflib.SequenceMatcher(None, phrase, name).ratio()
+                    if best is None or ratio > best[2]:
+                        best = (phrase, self._gazetteer[name][0], ratio)
+        return best
+
+    def parse(self, query):
+        """Always returns a CityExtraction; confidence 0 means 'no idea, ask the LLM'."""
+        text = _normalize(query)
+        spans = [m.span() for m in _TOKENS.finditer(text)]
+        tokens = [text[start:end] for start, end in spans]
+        date_reference = extract_date_reference(query)
+
+        matches = self._exact_matches(tokens)
+        cities = list(dict.fromkeys(display for _, _, _, display, _ in matches))
+        if len(cities) == 1:
+            _, _, phrase, display, _ = matches[0]
+            return CityExtraction(
+                city_name=display,
+                confidence=max(c for _, _, _, d, c in matches if d == display),
+                date_reference=date_reference,
+                original_city_mention=phrase,
+            )
+        if len(cities) > 1:
+            if _CHOICE.search(query) or not self._is_city_list(text, spans, matches):
+                return CityExtraction(
+                    city_name=cities[0],
+                    confidence=AMBIGUOUS_CONFIDENCE,
+                    date_reference=date_reference,
+                    original_city_mention=matches[0][2],
+                )
+            return CityExtraction(
+                city_name=cities[0],
+                confidence=min(c for _, _, _, _, c in matches),
+                date_reference=date_reference,
+                original_city_mention=matches[0][2],
+                cities=cities,
+            )
+
+        fuzzy = self._fuzzy_match(tokens)
+        if fuzzy is not None:
+            phrase, display, ratio = fuzzy
+            return CityExtraction(
+                city_name=display,
+                confidence=min(round(ALIAS_CONFIDENCE * ratio, 3), FUZZY_MAX_CONFIDENCE),
+                date_reference=date_reference,
+                original_city_mention=phrase,
+            )
+
+        return CityExtraction(city_name="", confidence=0.0, date_reference=date_reference)
+
+
+_parser = None
+_parser_lock = threading.Lock()
+
+
+def get_local_parser():
+    global _parser
+    if _parser is None:
+        with _parser_lock:
+            if _parser is None:
+                _parser = LocalParser()
+    return _parser
+
+
+def local_extract(query):
+    return get_local_parser().parse(query)
@@ -0,0 +1,98 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import merge_configs
+
+from config import settings
+from graph.nodes.city_summary_vector import city_summary_vector_node, acity_summary_vector_node
+from graph.nodes.city_summary_web import city_summary_web_node, acity_summary_web_node
+from graph.nodes.final_assembly_node import final_assembly_node
+from graph.nodes.router import router_node
+from graph.nodes.tool_executor import execute_tool_calls_node, aexecute_tool_calls_node
+from graph.state import TravelState
+
+# city workers running at once across the whole process (sync and async graphs alike),
+# so a burst of itineraries can't open an unbounded number of upstream calls
+_slots = threading.BoundedSemaphore(settings.BATCH_CONCURRENCY)
+
+
+def city_task(state: TravelState, city: str) -> TravelState:
+    """Input of one city worker (the Send payload is handed to the node as-is)."""
+    return TravelState(
+        user_query=state.user_query,
+        city=city,
+        date_range=state.date_range,
+        request_id=state.request_id,
+    )
+
+
+def _summary_node(route, asynchronous=False):
+    if route == "vector":
+        return acity_summary_vector_node if asynchronous else city_summary_vector_node
+    return acity_summary_web_node if asynchronous else city_summary_web_node
+
+
+def _city_config(state: TravelState, config: RunnableConfig = None) -> RunnableConfig:
+    # workers stream side by side; the tag lets consumers tell their summary tokens apart
+    return merge_configs(config, {"metadata": {"city": state.city}})
+
+
+def _summarize(state: TravelState, config: RunnableConfig = None) -> dict:
+    update = router_node(state)
+    if update.get("city_summary"):
+        # response cache hit
+        return update
+    return {**update, **_summary_node(update["route"])(state, _city_config(state, config))}
+
+
+async def _asummarize(state: TravelState, config: RunnableConfig = None) -> dict:
+    update = await asyncio.to_thread(router_node, state)
+    if update.get("city_summary"):
+        return update
+    return {**update, **await _summary_node(update["route"], asynchronous=True)(state, _city_config(state, config))}
+
+
+def _city_update(state: TravelState, summary: dict, tools: dict) -> dict:
+    # the same fallbacks the final node applies to a single city
+    merged = state.model_copy(update={
+        "city_summary": summary.get("city_summary"),
+        "weather_forecast": tools.get("weather_forecast") or [],
+        "image_urls": tools.get("image_urls") or [],
+    })
+    final = final_assembly_node(merged)
+    errors = summary.get("errors", []) + tools.get("errors", []) + final.get("errors", [])
+    return {
+        "city_outputs": [{
+            "city": state.city,
+            "route": summary.get("route"),
+            "city_summary": final.get("city_summary", merged.city_summary),
+            "weather_forecast": final.get("weather_forecast", merged.weather_forecast),
+            "image_urls": final.get("image_urls", merged.image_urls),
+        }],
+        "errors": [f"{state.city}: {error}" for error in errors],
+    }
+
+
+def city_worker_node(state: TravelState, config: RunnableConfig = None) -> dict:
+    """One city of a batch query: summary and weather/images run concurrently."""
+    with _slots:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # copy the node's context so upstream calls are attributed to this worker
+            summary = executor.submit(contextvars.copy_context().run, _summarize, state, config)
+            tools = executor.submit(contextvars.copy_context().run, execute_tool_calls_node, state)
+            return _city_update(state, summary.result(), tools.result())
+
+
+async def acity_worker_node(state: TravelState, config: RunnableConfig = None) -> dict:
+    """Async twin of city_worker_node; waits for a process-wide slot without blocking the loop."""
+    # poll rather than block a thread on acquire(), so a cancelled request never strands a slot
+    while not _slots.acquire(blocking=False):
+        await asyncio.sleep(0.01)
+    try:
+        summary, tools = await asyncio.gather(_asummarize(state, config), aexecute_tool_calls_node(state))
+    finally:
+        _slots.release()
+    return _city_update(state, summary, tools)
@@ -1,44 +1,92 @@
-from tools.vector_store import get_vector_store
+import asyncio
+
+from tools.vector_store import get_collection, get_query_embedding
+from tools.city_index import get_city_index
 from graph.state import TravelState
+from graph.response_cache import get_response_cache
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from config.prompts import VECTOR_SUMMARY_PROMPT
+from langchain_core.runnables import RunnableConfig
+from config.prompts import VECTOR_QUERY_TEMPLATE, VECTOR_SUMMARY_PROMPT
+
+
+def _retrieve_chunks(city):
+    collection = get_collection()
+    # stored key, e.g. "NYC" / "New York" -> "new_york"
+    city_key = get_city_index().resolve(city) or city.lower()
+    # precomputed at ingestion for known cities, so no transformer inference here
+    query_embedding = get_query_embedding(VECTOR_QUERY_TEMPLATE.format(city=city_key.replace("_", " ")))
+
+    results = collection.query(
+        query_embeddings=[query_embedding],
+        n_results=5,
+        where={"city": city_key}
+    )
+
+    if results.get("documents") and results["documents"] and results["documents"][0]:
+        return results["documents"][0]
+    return []
+
+
+def _summary_chain():
+    prompt = PromptTemplate.from_template(VECTOR_SUMMARY_PROMPT)
+    llm = ChatOpenAI(model="gpt-4o", temperature=0)
+    return prompt | llm | StrOutputParser()
+
+
+def _summary_update(state: TravelState, summary):
+    city_summary = (summary or "").strip()
+
+    if not city_summary:
+        return {
+            "city_summary": f"No summary generated for {state.city} from vector data.",
+            "errors": ["Vector summary was empty"],
+        }
+    get_response_cache().put_summary(state.city, city_summary)
+    return {"city_summary": city_summary}
+
+
+def _no_results_update(state: TravelState):
+    return {
+        "city_summary": f"Information about {state.city} is not available.",
+        "errors": [f"No vector DB results for {state.city}"],
+    }
 
-def city_summary_vector_node(state: TravelState):
+
+def _error_update(state: TravelState, e):
+    return {
+        "city_summary": f"Unable to retrieve information about {state.city}.",
+        "errors": [f"Vector DB error: {str(e)}"],
+    }
+
+
+def city_summary_vector_node(state: TravelState, config: RunnableConfig = None) -> dict:
     try:
-        collection, model = get_vector_store()
-        query_text = f"Overview and information about {state.city}"
-        query_embedding = model.encode([query_text])[0]
-
-        results = collection.query(
-            query_embeddings=[query_embedding.tolist()],
-            n_results=5,
-            where={"city": state.city.lower()}
-        )
-
-        if results.get("documents") and results["documents"] and results["documents"][0]:
-            chunks = results["documents"][0]
+        chunks = _retrieve_chunks(state.city)
+
+        if chunks:
             context = "\n---\n".join(chunks)
+            summary = _summary_chain().invoke({"city": state.city, "context": context}, config)
+            return _summary_update(state, summary)
 
-            prompt = PromptTemplate.from_template(VECTOR_SUMMARY_PROMPT)
-            llm = ChatOpenAI(model="gpt-4o", temperature=0)
-            chain = prompt | llm | StrOutputParser()
+        return _no_results_update(state)
 
-            summary = chain.invoke({"city": state.city, "context": context})
-            state.city_summary = summary.strip()
+    except Exception as e:
+        return _error_update(state, e)
 
-            if not state.city_summary:
-                state.city_summary = f"No summary generated for {state.city} from vector data."
-                state.errors.append("Vector summary was empty")
 
-        else:
-            state.city_summary = f"Information about {state.city} is not available."
-            state.errors.append(f"No vector DB results for {state.city}")
-    
-    except Exception as e:
-        state.city_summary = f"Unable to retrieve information about {state.city}."
-        state.errors.append(f"Vector DB error: {str(e)}")
-        return state
+async def acity_summary_vector_node(state: TravelState, config: RunnableConfig = None) -> dict:
+    try:
+        # embedding + local Chroma query are CPU-bound; keep them off the event loop
+        chunks = await asyncio.to_thread(_retrieve_chunks, state.city)
+
+        if chunks:
+            context = "\n---\n".join(chunks)
+            summary = await _summary_chain().ainvoke({"city": state.city, "context": context}, config)
+            return _summary_update(state, summary)
 
-    return state
\ No newline at end of file
+        return _no_results_update(state)
+
+    except Exception as e:
+        return _error_update(state, e)
@@ -1,12 +1,60 @@
-from graph.state import TravelState
-from tools.web_search import WebSearchTool
+from graph.response_cache import get_response_cache
+from tools import rate_limit
+from tools.web_search import get_web_search_tool
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableConfig
 from config.prompts import WEB_SUMMARY_PROMPT
-def city_summary_web_node(state):
+
+
+def _build_context(results):
+    context_parts = []
+
+    for i,result in enumerate(results, 1):
+        context_parts.append(
+            f"[Source {i}: {result['title']}]\n{result['snippet']}"
+        )
+
+    return "\n\n---\n\n".join(context_parts)
+
+
+def _summary_chain():
+    prompt = PromptTemplate.from_template(WEB_SUMMARY_PROMPT)
+    llm = ChatOpenAI(model="gpt-4o", temperature=0)
+    return prompt | llm | StrOutputParser()
+
+
+def _no_results_update(state):
+    return {
+        "city_summary": f"Unable tp find info about {state.city} online",
+        "errors": [f"Web search returned no results for {state.city}"],
+    }
+
+
+def _summary_update(state, summary):
+    city_summary = (summary or "").strip()
+    if not city_summary:
+        return {
+            "city_summary": f"No summary generated for {state.city} from web search.",
+            "errors": ["Web summary was empty"],
+        }
+    print(f"Summary generated successfully ({len(summary)} characters)")
+    get_response_cache().put_summary(state.city, city_summary)
+    return {"city_summary": city_summary}
+
+
+def _error_update(state, e):
+    print(f"Error in web summary node: {e}")
+    return {
+        "city_summary": f"Unable to retrieve information about {state.city} at this time.",
+        "errors": [f"Web summary error: {str(e)}"],
+    }
+
+
+def city_summary_web_node(state, config: RunnableConfig = None) -> dict:
     try:
-        search_tool = WebSearchTool()
+        search_tool = get_web_search_tool()
 
         search_query = f"{state.city} city information overview guide"
 
@@ -15,37 +63,39 @@ def city_summary_web_node(state):
         results = search_tool.search(search_query, max_results=5)
 
         if not results:
-            state.city_summary = f"Unable tp find info about {state.city} online"
-            state.errors.append(f"Web search returned no results for {state.city}")
-            return state
+            return _no_results_update(state)
 
         print(f"Found {len(results)} search results")
 
-        context_parts = []
-
-        for i,result in enumerate(results, 1):
-            context_parts.append(
-                f"[Source {i}: {result['title']}]\n{result['snippet']}"
-            )
-
-        context = "\n\n---\n\n".join(context_parts)
-        prompt = PromptTemplate.from_template(WEB_SUMMARY_PROMPT)
-        llm = ChatOpenAI(model="gpt-4o", temperature=0)
-        chain = prompt | llm | StrOutputParser()
+        context = _build_context(results)
 
         print(f"Generating summary for {state.city}...")
-        summary = chain.invoke({"city": state.city, "context": context})
+        summary = _summary_chain().invoke({"city": state.city, "context": context}, config)
 
-        state.city_summary = (summary or "").strip()
-        if not state.city_summary:
-            state.city_summary = f"No summary generated for {state.city} from web search."
-            state.errors.append("Web summary was empty")
-        else:
-            print(f"Summary generated successfully ({len(summary)} characters)")
+        return _summary_update(state, summary)
 
+    except rate_limit.QuotaExceeded:
+        # only raised to the background pre-warmer (WebSearchTool.search)
+        raise
     except Exception as e:
-        print(f"Error in web summary node: {e}")
-        state.city_summary = f"Unable to retrieve information about {state.city} at this time."
-        state.errors.append(f"Web summary error: {str(e)}")
+        return _error_update(state, e)
+
+
+async def acity_summary_web_node(state, config: RunnableConfig = None) -> dict:
+    try:
+        search_tool = get_web_search_tool()
+        results = await search_tool.asearch(f"{state.city} city information overview guide", max_results=5)
+
+        if not results:
+            return _no_results_update(state)
 
-    return state
\ No newline at end of file
+        context = _build_context(results)
+        summary = await _summary_chain().ainvoke({"city": state.city, "context": context}, config)
+
+        return _summary_update(state, summary)
+
+    except rate_limit.QuotaExceeded:
+        # only raised to the background pre-warmer (WebSearchTool.search)
+        raise
+    except Exception as e:
+        return _error_update(state, e)
@@ -1,5 +1,5 @@
 from graph.state import TravelState
-from tools.image_api import ImageTool
+from tools.image_api import get_image_tool
 
 
 def images_node(state: TravelState) -> TravelState:
@@ -9,7 +9,7 @@ def images_node(state: TravelState) -> TravelState:
             state.image_urls = []
             return state
 
-        tool = ImageTool()
+        tool = get_image_tool()
         urls = tool.search_images(state.city, limit=10)
         state.image_urls = urls or []
         if not state.image_urls:
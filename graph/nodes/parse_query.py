@@ -1,45 +1,118 @@
+import asyncio
+
 from langchain_openai import ChatOpenAI
+from langgraph.types import Overwrite
+from config import settings
+from graph.local_parser import local_extract
+from graph.prewarm import get_popularity_tracker
+from graph.response_cache import get_response_cache
 from graph.schemas.extraction import CityExtraction
 from graph.state import TravelState
 from config.prompts import PARSE_QUERY_PROMPT
 
 
-def parse_query_node(state: TravelState) -> TravelState:
-    
+def _build_extractor():
     llm = ChatOpenAI(
-        model="gpt-4o",  
-        temperature=0         
+        model="gpt-4o",
+        temperature=0
     )
-    
-    structured_llm = llm.with_structured_output(CityExtraction)
-    
-    # extraction prompt
-    extraction = structured_llm.invoke(PARSE_QUERY_PROMPT.format(user_query=state.user_query))
+
+    return llm.with_structured_output(CityExtraction)
+
+
+def _extracted_cities(extraction: CityExtraction) -> list[str]:
+    seen = {}
+    for city in extraction.cities or [extraction.city_name]:
+        if city and city.strip():
+            seen.setdefault(city.strip().lower(), city.strip())
+    return list(seen.values())
+
+
+def _apply_extraction(state: TravelState, extraction: CityExtraction) -> dict:
+    update = _extraction_update(state, extraction)
+    update.setdefault("cities", [])
+    # feeds the cache pre-warmer; a follow-up about the same city counts as interest too
+    if settings.POPULARITY_TRACKING and update.get("city"):
+        get_popularity_tracker().record(update["cities"] or [update["city"]])
+    # the previous request's per-city results; the reducer would otherwise append to them
+    if state.city_outputs:
+        update["city_outputs"] = Overwrite([])
+    return update
+
+
+def _extraction_update(state: TravelState, extraction: CityExtraction) -> dict:
     date_ref = extraction.date_reference or ""
-    
+    cities = _extracted_cities(extraction)
+
+    # multi-city itinerary: the router fans out one worker per city
+    if extraction.confidence >= 0.5 and len(cities) > 1:
+        batch = cities[:settings.BATCH_MAX_CITIES]
+        update = {
+            "cities": batch,
+            "skip_summary": False,
+            "skip_images": False,
+            "previous_city": state.city,
+            "city": batch[0],
+            "date_range": date_ref,
+            # results live in city_outputs; drop the last single-city answer so it
+            # can't be shown, or reused by a follow-up, as the first city's
+            "city_summary": None,
+            "weather_forecast": [],
+            "image_urls": [],
+        }
+        if len(cities) > len(batch):
+            update["errors"] = [f"Only the first {len(batch)} cities are planned; skipped {', '.join(cities[len(batch):])}"]
+        return update
+
     # update state
     if extraction.confidence >= 0.5:
-        # Detect if city changed from previous query
-        if state.previous_city and state.previous_city.lower() == extraction.city_name.lower():
-            # Same city - skip summary and images, only update weather if date changed
-            state.skip_summary = True
-            state.skip_images = True
-        else:
-            # New city - fetch everything
-            state.skip_summary = False
-            state.skip_images = False
-        
-        state.previous_city = state.city  # Store current as previous
-        state.city = extraction.city_name
-        state.date_range = date_ref
-    else:
-        # no clear city found; fallback to previous city if available
-        if state.city:
-            state.skip_summary = True
-            state.skip_images = True
-        else:
-            state.city = None
-            state.errors.append("Could not identify a city in your query")
-        state.date_range = date_ref
-    
-    return state
\ No newline at end of file
+        # Same city as before - skip summary and images, only update weather;
+        # new city - fetch everything
+        same_city = bool(state.previous_city) and state.previous_city.lower() == extraction.city_name.lower()
+        return {
+            "skip_summary": same_city,
+            "skip_images": same_city,
+            "previous_city": state.city,  # Store current as previous
+            "city": extraction.city_name,
+            "date_range": date_ref,
+        }
+
+    # no clear city found; fallback to previous city if available
+    if state.city:
+        # after a batch nothing single-city is kept, so the first city is fetched afresh
+        kept = state.previous_city == state.city
+        return {"skip_summary": kept, "skip_images": kept, "date_range": date_ref}
+    return {
+        "city": None,
+        "date_range": date_ref,
+        "errors": ["Could not identify a city in your query"],
+    }
+
+
+def _cheap_extraction(query):
+    """Local parser first (microseconds), then the response cache; None means ask the LLM."""
+    extraction = local_extract(query)
+    if extraction.confidence >= settings.LOCAL_PARSE_THRESHOLD:
+        return extraction
+    return get_response_cache().get_extraction(query)
+
+
+def parse_query_node(state: TravelState) -> dict:
+    extraction = _cheap_extraction(state.user_query)
+    if extraction is None:
+        structured_llm = _build_extractor()
+
+        # extraction prompt
+        extraction = structured_llm.invoke(PARSE_QUERY_PROMPT.format(user_query=state.user_query))
+        get_response_cache().put_extraction(state.user_query, extraction)
+    return _apply_extraction(state, extraction)
+
+
+async def aparse_query_node(state: TravelState) -> dict:
+    # the cache's similarity lookup embeds the query; keep it off the event loop
+    extraction = await asyncio.to_thread(_cheap_extraction, state.user_query)
+    if extraction is None:
+        structured_llm = _build_extractor()
+        extraction = await structured_llm.ainvoke(PARSE_QUERY_PROMPT.format(user_query=state.user_query))
+        await asyncio.to_thread(get_response_cache().put_extraction, state.user_query, extraction)
+    return _apply_extraction(state, extraction)
@@ -1,13 +1,19 @@
+from graph.response_cache import get_response_cache
 from graph.state import TravelState
+from tools.city_index import get_city_index
 
 
-def router_node(state: TravelState) -> TravelState:
-	"""decide retrieval route: vector for ingested cities, else web"""
+def router_node(state: TravelState) -> dict:
+	"""decide retrieval route: cached summary, vector for ingested cities, else web"""
+	if len(state.cities) > 1:
+		# batch: each city worker routes its own city
+		return {"route": None}
 	if not state.city:
-		state.route = "web"
-		return state
-	city_norm = state.city.strip().lower()
-	prepopulated = {"paris", "tokyo", "new york"}
-	state.route = "vector" if city_norm in prepopulated else "web"
-	return state
+		return {"route": "web"}
+	if not state.skip_summary:
+		summary = get_response_cache().get_summary(state.city)
+		if summary:
+			return {"route": "cached", "city_summary": summary}
+	# the index is built from the cities actually stored in Chroma (plus aliases)
+	return {"route": "vector" if state.city in get_city_index() else "web"}
 
@@ -1,70 +1,134 @@
+import asyncio
+import contextvars
 from typing import Any, Dict, List
 from concurrent.futures import ThreadPoolExecutor
+from graph.response_cache import get_response_cache
 from graph.state import TravelState
-from tools.weather_api import WeatherTool
-from tools.image_api import ImageTool
+from tools.weather_api import get_weather_tool
+from tools.image_api import get_image_tool
+from tools.thumbnails import get_thumbnail_store
 
 
-# tool registry which maps tool names to actual functions
-TOOL_REGISTRY = {
-    "fetch_weather": lambda city: WeatherTool().get_forecast(city),
-    "fetch_images": lambda city: ImageTool().search_images(city, limit=10),
+# tool registry used by the async graph, which maps tool names to coroutines
+ASYNC_TOOL_REGISTRY = {
+    "fetch_weather": lambda city: get_weather_tool().aget_forecast(city),
+    "fetch_images": lambda city: get_image_tool().asearch_images(city, limit=10),
 }
 
 
-def execute_tool_calls_node(state: TravelState) -> TravelState:
+def execute_tool_calls_node(state: TravelState) -> dict:
     """
     Manually parse and execute tool calls from LLM without framework abstractions.
     Demonstrates understanding of raw tool calling protocol.
     Weather and image tools run in parallel for reduced latency.
+    Runs in the same superstep as the summary branch, so it returns only the
+    fields it owns.
     """
     # check if we need to execute tools
     if not state.city:
-        state.errors.append("Tool executor: no city to work with")
-        return state
+        return {"errors": ["Tool executor: no city to work with"]}
+
+    errors: List[str] = []
+    cache = get_response_cache()
 
     # Define parallel task functions
     def fetch_weather():
         """Fetch weather forecast for the city."""
+        cached = cache.get_weather(state.city, state.date_range)
+        if cached is not None:
+            return cached
         try:
-            weather_tool = WeatherTool()
+            weather_tool = get_weather_tool()
             forecast = weather_tool.get_forecast(state.city)
+            cache.put_weather(state.city, state.date_range, forecast)
             return forecast if forecast else []
         except Exception as e:
-            state.errors.append(f"Weather error: {str(e)}")
+            errors.append(f"Weather error: {str(e)}")
             return []
 
     def fetch_images():
         """Fetch images for the city (respects skip_images flag)."""
         if state.skip_images:
             return state.image_urls or []
+        cached = cache.get_images(state.city)
+        if cached is not None:
+            return cached
         try:
-            image_tool = ImageTool()
+            image_tool = get_image_tool()
             urls = image_tool.search_images(state.city, limit=10)
+            cache.put_images(state.city, urls)
+            # thumbnails are made while the summary is still being written
+            get_thumbnail_store().prefetch(urls or [])
             return urls if urls else []
         except Exception as e:
-            state.errors.append(f"Images: {str(e)}")
+            errors.append(f"Images: {str(e)}")
             return []
 
     # Execute weather and images in parallel using ThreadPoolExecutor
     with ThreadPoolExecutor(max_workers=2) as executor:
-        weather_future = executor.submit(fetch_weather)
-        images_future = executor.submit(fetch_images)
+        # copy the node's context so HTTP calls in the workers are attributed to this node
+        weather_future = executor.submit(contextvars.copy_context().run, fetch_weather)
+        images_future = executor.submit(contextvars.copy_context().run, fetch_images)
 
         # Collect results as they complete
-        state.weather_forecast = weather_future.result()
-        state.image_urls = images_future.result()
+        weather_forecast = weather_future.result()
+        image_urls = images_future.result()
+
+    return _tool_update(state, weather_forecast, image_urls, errors)
+
+
+async def aexecute_tool_calls_node(state: TravelState) -> dict:
+    """Async twin of execute_tool_calls_node; weather and images run as concurrent coroutines."""
+    if not state.city:
+        return {"errors": ["Tool executor: no city to work with"]}
+
+    errors: List[str] = []
+    cache = get_response_cache()
+
+    async def fetch_weather():
+        cached = cache.get_weather(state.city, state.date_range)
+        if cached is not None:
+            return cached
+        try:
+            forecast = await ASYNC_TOOL_REGISTRY["fetch_weather"](state.city)
+            cache.put_weather(state.city, state.date_range, forecast)
+            return forecast if forecast else []
+        except Exception as e:
+            errors.append(f"Weather error: {str(e)}")
+            return []
+
+    async def fetch_images():
+        if state.skip_images:
+            return state.image_urls or []
+        cached = cache.get_images(state.city)
+        if cached is not None:
+            return cached
+        try:
+            urls = await ASYNC_TOOL_REGISTRY["fetch_images"](state.city)
+            cache.put_images(state.city, urls)
+            get_thumbnail_store().prefetch(urls or [])
+            return urls if urls else []
+        except Exception as e:
+            errors.append(f"Images: {str(e)}")
+            return []
+
+    weather_forecast, image_urls = await asyncio.gather(fetch_weather(), fetch_images())
+
+    return _tool_update(state, weather_forecast, image_urls, errors)
+
 
+def _tool_update(state: TravelState, weather_forecast, image_urls, errors) -> dict:
     # Validate results and add error messages
-    if not state.weather_forecast:
-        state.errors.append(f"Weather data unavailable for {state.city}")
+    if not weather_forecast:
+        errors.append(f"Weather data unavailable for {state.city}")
     # add clarity if user asked for dates beyond provider window (OWM is 5-day/3-hour)
-    if state.date_range and len(state.weather_forecast) < 5:
-        state.errors.append(
+    if state.date_range and len(weather_forecast) < 5:
+        errors.append(
             f"Weather API only provides ~5-day forecast; requested '{state.date_range}' may extend beyond available data"
         )
 
-    if not state.skip_images and not state.image_urls:
-        state.errors.append(f"Images: no results for {state.city}")
+    # a quota or provider error already says why there are no images
+    if not state.skip_images and not image_urls and not any(e.startswith("Images:") for e in errors):
+        errors.append(f"Images: no results for {state.city}")
 
-    return state
+    return {"weather_forecast": weather_forecast, "image_urls": image_urls, "errors": errors}
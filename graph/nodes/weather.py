@@ -1,9 +1,9 @@
 from graph.state import TravelState
-from tools.weather_api import WeatherTool
+from tools.weather_api import get_weather_tool
 
 def weather_node(state):
     try:
-        weather_tool = WeatherTool()
+        weather_tool = get_weather_tool()
 
         print(f"Fetching weather for {state.city}...")
         forecast = weather_tool.get_forecast(state.city)
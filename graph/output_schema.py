@@ -1,7 +1,75 @@
+from typing import Any, Dict, List
+
 from pydantic import BaseModel, Field
 
+from graph.state import TravelState
+
+
+class CityOutput(BaseModel):
+    city: str = Field(..., description="city this entry is about")
+    city_summary: str = Field(default="", description="city summary rendered on ui")
+    weather_forecast: list[str] = Field(default_factory=list, description="weather forecast for display")
+    image_urls: list[str] = Field(default_factory=list, description="image urls rendered on ui")
+
+
 class TravelOutput(BaseModel):
     city_summary: str = Field(..., description= "Final city summary on rendered ui")
     weather_forecast: list[str] = Field(default_factory=list, description= "weather forecast for display")
     image_urls: list[str] = Field(default_factory=list, description= "image urls rendered on ui")
-    date_range: str = Field(default="", description="user requested date or time reference, if provided")
\ No newline at end of file
+    date_range: str = Field(default="", description="user requested date or time reference, if provided")
+    cities: list[CityOutput] = Field(
+        default_factory=list,
+        description="one entry per city, in the order asked (a single entry unless the query was multi-city)",
+    )
+
+
+def weather_strings(weather_forecast: List[Dict[str, Any]]) -> List[str]:
+    # Convert weather dicts to strings for simple rendering
+    weather_strs: List[str] = []
+    for d in weather_forecast or []:
+        try:
+            weather_strs.append(
+                f"{d.get('date','')}: {d.get('temp_min','?')}°C - {d.get('temp_max','?')}°C ({d.get('description','')})"
+            )
+        except Exception:
+            # fallback to string representation
+            weather_strs.append(str(d))
+    return weather_strs
+
+
+def ordered_city_outputs(state: TravelState) -> List[Dict[str, Any]]:
+    """Per-city results of a batch query in the order the cities were asked (workers finish in any order)."""
+    order = {city: i for i, city in enumerate(state.cities)}
+    return sorted(state.city_outputs, key=lambda o: order.get(o.get("city"), len(order)))
+
+
+def to_output_schema(state: TravelState) -> TravelOutput:
+    if state.cities:
+        cities = [
+            CityOutput(
+                city=o.get("city") or "",
+                city_summary=o.get("city_summary") or "",
+                weather_forecast=weather_strings(o.get("weather_forecast")),
+                image_urls=o.get("image_urls") or [],
+            )
+            for o in ordered_city_outputs(state)
+        ]
+    else:
+        cities = [
+            CityOutput(
+                city=state.city or "",
+                city_summary=state.city_summary or "",
+                weather_forecast=weather_strings(state.weather_forecast),
+                image_urls=state.image_urls or [],
+            )
+        ]
+
+    # top-level fields describe the first (or only) city
+    first = cities[0] if cities else CityOutput(city="")
+    return TravelOutput(
+        city_summary=first.city_summary,
+        weather_forecast=first.weather_forecast,
+        image_urls=first.image_urls,
+        date_range=state.date_range or "",
+        cities=cities,
+    )
@@ -0,0 +1,362 @@
+"""Background pre-warming of the response cache for the most asked-about cities.
+
+While pre-warming is on (PREWARM_THREAD, or a POPULARITY_PATH that
+--list reads from), every parsed query bumps its cities in a PopularityTracker: a
+score that halves every POPULARITY_HALF_LIFE seconds, so last week's
+favourite fades once people stop asking. CacheWarmer walks the PREWARM_TOP_N cities with
+the highest scores and refreshes their summary, undated forecast and image
+results shortly (PREWARM_MARGIN) before the cached copies expire, so
+the next visitor gets a cache hit instead of paying for the LLM and the
+upstream APIs.
+
+All refresh calls run inside rate_limit.background(): they never queue for
+a token and leave RATE_LIMIT_BACKGROUND_RESERVE of every provider budget
+to interactive traffic. A provider that runs out is skipped until the next
+cycle.
+
+Only the undated forecast ("weather in Lisbon") is cached under its own
+key; a dated query still misses the response cache, but its forecast comes
+from weather_api's forecast cache, which the same refresh keeps current.
+
+The response cache lives in process memory, so the refresh loop runs in
+the process that serves queries: PREWARM_THREAD=true starts it from
+warm_start(). A separate job could not reach that cache, so the CLI only
+reports what the loop works from:
+
+    python -m graph.prewarm --list          # top cities and their scores
+"""
+
+import argparse
+import atexit
+import json
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from config import settings
+from graph.response_cache import get_response_cache
+from graph.state import TravelState
+from tools import rate_limit
+from tools.city_index import get_city_index, normalize_city
+from tools.image_api import get_image_tool
+from tools.thumbnails import get_thumbnail_store
+from tools.weather_api import get_weather_tool
+
+# response cache sections the warmer refreshes, most expensive to miss first
+KINDS = ("summaries", "weather", "images")
+# scores below this are forgotten
+_PRUNE_BELOW = 0.01
+
+
+class PopularityTracker:
+    """Exponentially decayed query counts per city, in memory or in a SQLite file shared by processes.
+
+    With a file, record() only adds to an in-memory buffer; a daemon thread
+    writes it out every `flush_interval` seconds, so parsing a query never
+    waits on SQLite.
+    """
+
+    def __init__(self, path=None, half_life=None, flush_interval=None):
+        self.path = path if path is not None else settings.POPULARITY_PATH
+        self.half_life = half_life or settings.POPULARITY_HALF_LIFE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.POPULARITY_FLUSH_INTERVAL
+        # key -> (city, score, updated_at): every count without a file, else the ones not written yet
+        self._rows = {}
+        self._lock = threading.Lock()
+        # serializes the SQLite connection; never held by record()
+        self._db_lock = threading.Lock()
+        self._flusher = None
+        self._conn = self._connect()
+
+    def _connect(self):
+        if not self.path:
+            return None
+        try:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5, isolation_level=None)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS popularity ("
+                "key TEXT PRIMARY KEY, city TEXT, score REAL, updated_at REAL)"
+            )
+            return conn
+        except sqlite3.Error as e:
+            # an unwritable volume shouldn't break parsing; count per process instead
+            print(f"Popularity store disabled on disk ({self.path}): {e}")
+            return None
+
+    def _decayed(self, score, updated_at, now):
+        return score * math.pow(0.5, max(now - updated_at, 0) / self.half_life)
+
+    def _add(self, rows, key, city, score, updated_at):
+        # caller holds the lock; folds `score` counted at `updated_at` into rows[key]
+        if key in rows:
+            _, old, old_at = rows[key]
+            now = max(old_at, updated_at)
+            score = self._decayed(old, old_at, now) + self._decayed(score, updated_at, now)
+            updated_at = now
+        rows[key] = (city, score, updated_at)
+
+    def record(self, cities, now=None):
+        """Count one query for each of `cities`."""
+        now = time.time() if now is None else now
+        seen = {}
+        for city in cities or []:
+            if city and city.strip():
+                seen.setdefault(normalize_city(city), city.strip())
+        if not seen:
+            return
+        with self._lock:
+            for key, city in seen.items():
+                self._add(self._rows, key, city, 1.0, now)
+            if self._conn is not None and self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="popularity-flush", daemon=True)
+                self._flusher.start()
+                # the last few seconds of counts shouldn't die with the process
+                atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write buffered counts to the file (a no-op without one)."""
+        if self._conn is None:
+            return
+        with self._lock:
+            pending, self._rows = self._rows, {}
+        if not pending:
+            return
+        with self._db_lock:
+            try:
+                self._write(pending)
+                return
+            except sqlite3.Error as e:
+                print(f"Popularity write error: {e}")
+        # keep them for the next flush
+        with self._lock:
+            for key, (city, score, updated_at) in pending.items():
+                self._add(self._rows, key, city, score, updated_at)
+
+    def _write(self, pending):
+        # caller holds the db lock
+        cur = self._conn.cursor()
+        # read-modify-write in one transaction so concurrent processes don't lose counts
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            for key, (city, score, updated_at) in pending.items():
+                row = cur.execute("SELECT city, score, updated_at FROM popularity WHERE key = ?", (key,)).fetchone()
+                rows = {key: row} if row else {}
+                self._add(rows, key, city, score, updated_at)
+                cur.execute(
+                    "INSERT OR REPLACE INTO popularity (key, city, score, updated_at) VALUES (?, ?, ?, ?)",
+                    (key, *rows[key]),
+                )
+            cur.execute("COMMIT")
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+
+    def top(self, n=None, min_score=None, now=None):
+        """Up to `n` (city, score) pairs, most popular first, scoring at least `min_score` today."""
+        n = n if n is not None else settings.PREWARM_TOP_N
+        min_score = min_score if min_score is not None else settings.PREWARM_MIN_SCORE
+        now = time.time() if now is None else now
+        if self._conn is None:
+            with self._lock:
+                rows = dict(self._rows)
+        else:
+            self.flush()
+            with self._db_lock:
+                try:
+                    rows = {key: (city, score, updated_at) for key, city, score, updated_at in self._conn.execute(
+                        "SELECT key, city, score, updated_at FROM popularity"
+                    )}
+                except sqlite3.Error as e:
+                    print(f"Popularity read error: {e}")
+                    return []
+        scored = [(key, city, self._decayed(score, updated_at, now)) for key, (city, score, updated_at) in rows.items()]
+        self._prune([(key, rows[key][2]) for key, _, score in scored if score < _PRUNE_BELOW])
+        floor = max(min_score, _PRUNE_BELOW)
+        ranked = sorted((item for item in scored if item[2] >= floor), key=lambda item: (-item[2], item[0]))
+        return [(city, round(score, 2)) for _, city, score in ranked[:n]]
+
+    def _prune(self, keys):
+        # keys are (key, updated_at) as read; a city counted again since then is kept
+        if not keys:
+            return
+        if self._conn is None:
+            with self._lock:
+                for key, updated_at in keys:
+                    if key in self._rows and self._rows[key][2] == updated_at:
+                        del self._rows[key]
+            return
+        with self._db_lock:
+            try:
+                self._conn.executemany("DELETE FROM popularity WHERE key = ? AND updated_at = ?", keys)
+            except sqlite3.Error as e:
+                print(f"Popularity write error: {e}")
+
+
+class CacheWarmer:
+    """Refreshes the response cache for the popular cities before their entries expire.
+
+    `kinds` picks which sections of the cache (a subset of KINDS) to refresh.
+    """
+
+    def __init__(self, tracker=None, cache=None, top_n=None, margin=None, interval=None, kinds=KINDS):
+        self.tracker = tracker or get_popularity_tracker()
+        self.cache = cache or get_response_cache()
+        self.top_n = top_n if top_n is not None else settings.PREWARM_TOP_N
+        self.margin = margin if margin is not None else settings.PREWARM_MARGIN
+        self.interval = interval if interval is not None else settings.PREWARM_INTERVAL
+        self.kinds = tuple(kinds)
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_report = None
+
+    def plan(self):
+        """[(city, [kinds to refresh])] for the popular cities whose entries are missing or about to expire."""
+        plan = []
+        for city, _ in self.tracker.top(self.top_n):
+            due = [kind for kind in self.kinds if self._due(kind, city)]
+            if due:
+                plan.append((city, due))
+        return plan
+
+    def _due(self, kind, city):
+        left = self.cache.expires_in(kind, city)
+        return left is None or left < self.margin
+
+    def _providers(self, kind, city):
+        """Rate-limited upstream providers a refresh of `kind` calls."""
+        if kind == "summaries":
+            return set() if city in get_city_index() else {"tavily"}
+        if kind == "weather":
+            return {"openweathermap"}
+        return set(get_image_tool().providers)
+
+    def run_once(self):
+        """One refresh cycle; returns what was refreshed, skipped and why anything failed."""
+        report = {"refreshed": {kind: [] for kind in self.kinds}, "failed": [], "out_of_quota": []}
+        # providers that ran out of budget aren't asked again this cycle
+        exhausted = set()
+        with rate_limit.background():
+            for city, due in self.plan():
+                for kind in due:
+                    providers = set()
+                    try:
+                        providers = self._providers(kind, city)
+                        if providers and providers <= exhausted:
+                            continue
+                        error = getattr(self, f"_refresh_{kind}")(city)
+                    except rate_limit.QuotaExceeded as e:
+                        # image search only gives up on quota once every provider it tried ran out
+                        exhausted |= providers | {e.provider}
+                        report["out_of_quota"].append(str(e))
+                        continue
+                    except Exception as e:
+                        error = str(e)
+                    if error:
+                        report["failed"].append(f"{kind} for {city}: {error}")
+                    else:
+                        report["refreshed"][kind].append(city)
+        self.last_report = report
+        return report
+
+    def _refresh_summaries(self, city):
+        # the summary nodes write the cache themselves; same route as router_node
+        from graph.nodes.city_summary_vector import city_summary_vector_node
+        from graph.nodes.city_summary_web import city_summary_web_node
+
+        node = city_summary_vector_node if city in get_city_index() else city_summary_web_node
+        errors = node(TravelState(user_query=f"Tell me about {city}", city=city)).get("errors")
+        return "; ".join(errors) if errors else None
+
+    def _refresh_weather(self, city):
+        # also renews weather_api's forecast cache, which dated queries read through
+        forecast = get_weather_tool().get_forecast(city)
+        if not forecast:
+            return "no forecast"
+        self.cache.put_weather(city, "", forecast)
+        return None
+
+    def _refresh_images(self, city):
+        urls = get_image_tool().search_images(city, limit=10)
+        if not urls:
+            return "no images"
+        self.cache.put_images(city, urls)
+        get_thumbnail_store().prefetch(urls)
+        return None
+
+    def start(self):
+        """Run a refresh cycle every `interval` seconds on a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="cache-prewarm", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Cache pre-warm error: {e}")
+            self._stop.wait(self.interval)
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_popularity_tracker():
+    """Process-wide PopularityTracker backed by POPULARITY_PATH."""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = PopularityTracker()
+    return _tracker
+
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def start_prewarmer():
+    """Start the process-wide CacheWarmer thread (once) and return it."""
+    global _warmer
+    if _warmer is None:
+        with _warmer_lock:
+            if _warmer is None:
+                _warmer = CacheWarmer()
+    _warmer.start()
+    return _warmer
+
+
+def main(argv=None):
+    # refreshing happens in the serving process (PREWARM_THREAD); this only reports on it
+    parser = argparse.ArgumentParser(description="Show the most asked-about cities the pre-warmer keeps warm")
+    parser.add_argument("--list", action="store_true", help="print the popular cities and their scores")
+    parser.add_argument("--top", type=int, default=settings.PREWARM_TOP_N, help="how many cities to print")
+    args = parser.parse_args(argv)
+
+    if not args.list:
+        parser.error("refreshing runs inside the app/API process (PREWARM_THREAD=true); use --list")
+    if not settings.POPULARITY_PATH:
+        print("POPULARITY_PATH is unset, so this process has no scores to read; set it to the servers' file")
+    print(json.dumps(get_popularity_tracker().top(args.top), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from config import settings
+from graph.schemas.extraction import CityExtraction
+from tools.cache import TTLCache
+from tools import telemetry
+from tools.city_index import normalize_city
+
+_WORDS = re.compile(r"[a-z0-9]+")
+# if a cached parse had no date, a near-duplicate that mentions one is not a duplicate
+_DATE_WORDS = {
+    "today", "tonight", "tomorrow", "yesterday", "weekend", "week", "weeks", "month", "months",
+    "day", "days", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "january", "february", "march", "april", "may", "june", "july", "august", "september",
+    "october", "november", "december", "next", "this", "coming",
+}
+
+
+def normalize_query(query):
+    return " ".join(_WORDS.findall((query or "").lower()))
+
+
+def normalize_date_range(date_range):
+    return normalize_query(date_range)
+
+
+def _default_encode(text):
+    # imported lazily: the parse cache shouldn't force the model to load at import time
+    from tools.vector_store import get_query_embedding
+    return get_query_embedding(text)
+
+
+class ParseCache:
+    """user_query -> CityExtraction, so repeat or near-duplicate phrasings skip the parse LLM.
+
+    Exact matches on the normalized query are checked first. Otherwise the
+    query is embedded and compared against past queries; a hit needs cosine
+    similarity above the threshold *and* the cached city/date mentions must
+    appear in the new query, so "weather in Rome" never reuses "weather in Paris".
+    """
+
+    def __init__(self, max_entries=None, ttl=None, threshold=None, encode=None):
+        self.max_entries = max_entries or settings.PARSE_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else settings.PARSE_CACHE_TTL
+        self.threshold = threshold if threshold is not None else settings.PARSE_SIMILARITY_THRESHOLD
+        self.encode = encode or _default_encode
+        self._exact = TTLCache(max_entries=self.max_entries, ttl=self.ttl, name="parse_exact")
+        # normalized query -> (unit embedding, extraction, expires_at); LRU order
+        self._vectors: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.similar_hits = 0
+        self.similar_misses = 0
+
+    def _embed(self, key):
+        try:
+            vector = np.asarray(self.encode(key), dtype=np.float32)
+        except Exception as e:
+            print(f"Parse cache embedding unavailable: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def get(self, query):
+        key = normalize_query(query)
+        if not key:
+            return None
+        extraction = self._exact.get(key)
+        if extraction is not None:
+            return extraction
+
+        vector = self._embed(key)
+        if vector is None:
+            return None
+        now = time.time()
+        with self._lock:
+            for stale in [k for k, (_, _, expires_at) in self._vectors.items() if expires_at <= now]:
+                del self._vectors[stale]
+            if not self._vectors:
+                self.similar_misses += 1
+                telemetry.record_cache("parse_similar", False)
+                return None
+            keys = list(self._vectors)
+            matrix = np.stack([self._vectors[k][0] for k in keys])
+            scores = matrix @ vector
+            for i in np.argsort(-scores):
+                if scores[i] < self.threshold:
+                    break
+                extraction = self._vectors[keys[i]][1]
+                if _compatible(key, extraction):
+                    self._vectors.move_to_end(keys[i])
+                    self.similar_hits += 1
+                    telemetry.record_cache("parse_similar", True)
+                    return extraction
+            self.similar_misses += 1
+            telemetry.record_cache("parse_similar", False)
+            return None
+
+    def put(self, query, extraction):
+        key = normalize_query(query)
+        if not key:
+            return
+        self._exact.set(key, extraction)
+        vector = self._embed(key)
+        if vector is None:
+            return
+        with self._lock:
+            self._vectors[key] = (vector, extraction, time.time() + self.ttl)
+            self._vectors.move_to_end(key)
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+
+    def stats(self):
+        stats = self._exact.stats()
+        with self._lock:
+            stats.update(
+                name="parse",
+                similar_size=len(self._vectors),
+                similar_hits=self.similar_hits,
+                similar_misses=self.similar_misses,
+            )
+        return stats
+
+
+def _compatible(normalized_query, extraction):
+    words = set(normalized_query.split())
+    mention = normalize_query(extraction.original_city_mention or extraction.city_name)
+    if mention and mention not in normalized_query:
+        return False
+    # a multi-city itinerary only fits a query naming the same cities
+    if any(normalize_query(city) not in normalized_query for city in extraction.cities):
+        return False
+    if extraction.date_reference:
+        return normalize_query(extraction.date_reference) in normalized_query
+    return not (words & _DATE_WORDS or any(w.isdigit() for w in words))
+
+
+class ResponseCache:
+    """Summaries and image search results keyed on city, forecasts on (city, date_range), each with its own TTL."""
+
+    def __init__(self, max_entries=None, summary_ttl=None, weather_ttl=None, image_ttl=None, parse_cache=None):
+        max_entries = max_entries or settings.RESPONSE_CACHE_SIZE
+        self.summaries = TTLCache(
+            max_entries=max_entries,
+            ttl=summary_ttl if summary_ttl is not None else settings.SUMMARY_CACHE_TTL,
+            name="summary",
+        )
+        self.weather = TTLCache(
+            max_entries=max_entries,
+            ttl=weather_ttl if weather_ttl is not None else settings.WEATHER_CACHE_TTL,
+            name="weather",
+        )
+        self.images = TTLCache(
+            max_entries=max_entries,
+            ttl=image_ttl if image_ttl is not None else settings.IMAGE_CACHE_TTL,
+            name="images",
+        )
+        self.parse = parse_cache or ParseCache()
+
+    def get_summary(self, city):
+        return self.summaries.get(normalize_city(city))
+
+    def put_summary(self, city, summary):
+        if city and summary:
+            self.summaries.set(normalize_city(city), summary)
+
+    def get_weather(self, city, date_range):
+        forecast = self.weather.get((normalize_city(city), normalize_date_range(date_range)))
+        return [dict(day) for day in forecast] if forecast is not None else None
+
+    def put_weather(self, city, date_range, forecast):
+        if city and forecast:
+            self.weather.set((normalize_city(city), normalize_date_range(date_range)), [dict(day) for day in forecast])
+
+    def get_images(self, city):
+        urls = self.images.get(normalize_city(city))
+        return list(urls) if urls is not None else None
+
+    def put_images(self, city, urls):
+        # an empty result may be a provider outage; ask again next time
+        if city and urls:
+            self.images.set(normalize_city(city), list(urls))
+
+    def expires_in(self, kind, city):
+        """Seconds left on `city`'s cached "summaries", "images" or undated "weather" entry; None if there is none."""
+        key = normalize_city(city)
+        if kind == "weather":
+            key = (key, normalize_date_range(""))
+        return getattr(self, kind).expires_in(key)
+
+    def get_extraction(self, query):
+        return self.parse.get(query)
+
+    def put_extraction(self, query, extraction: CityExtraction):
+        # low-confidence parses depend on conversation context; don't reuse them
+        if extraction.confidence >= 0.5:
+            self.parse.put(query, extraction)
+
+    def stats(self):
+        return {
+            "summary": self.summaries.stats(),
+            "weather": self.weather.stats(),
+            "images": self.images.stats(),
+            "parse": self.parse.stats(),
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide cache shared by every session and thread."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
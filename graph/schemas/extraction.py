@@ -8,4 +8,8 @@ class CityExtraction(BaseModel):
         default=None,
         description="any date/time reference mentioned in the user query"
     )
-    original_city_mention:Optional[str] = Field(default=None, description="original text that mentioned the city")
\ No newline at end of file
+    original_city_mention:Optional[str] = Field(default=None, description="original text that mentioned the city")
+    cities: list[str] = Field(
+        default_factory=list,
+        description="every city of a multi-city itinerary, in the order mentioned; empty for a single city"
+    )
\ No newline at end of file
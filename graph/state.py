@@ -1,6 +1,9 @@
-from typing import Optional, Literal
+import operator
+from typing import Annotated, Optional, Literal
 from pydantic import BaseModel, Field
 
+from graph.instrumentation import merge_timings
+
 class TravelState(BaseModel):
     class Config:
         arbitrary_types_allowed = True
@@ -9,11 +12,20 @@ class TravelState(BaseModel):
     city: Optional[str] = None
     previous_city: Optional[str] = None
     date_range: Optional[str] = None
-    route: Optional[Literal["vector", "web"]] = None
+    route: Optional[Literal["vector", "web", "cached"]] = None
     city_summary: Optional[str] = None
     weather_forecast: list[dict] = Field(default_factory=list)
     image_urls: list[str] = Field(default_factory=list)
-    errors: list[str] = Field(default_factory=list)
+    # summary and tools branches run in the same superstep; nodes return only
+    # their new messages and the reducer concatenates them
+    errors: Annotated[list[str], operator.add] = Field(default_factory=list)
     conversation_history: list[dict] = Field(default_factory=list)
     skip_summary: bool = False
-    skip_images: bool = False
\ No newline at end of file
+    skip_images: bool = False
+    # multi-city (batch) queries: the cities fanned out to, and one result per city
+    # appended by the city workers (parse clears it at the start of each request)
+    cities: list[str] = Field(default_factory=list)
+    city_outputs: Annotated[list[dict], operator.add] = Field(default_factory=list)
+    # per-request breakdown appended by every instrumented node (wall time, HTTP, cache, tokens)
+    request_id: Optional[str] = None
+    timings: Annotated[list[dict], merge_timings] = Field(default_factory=list)
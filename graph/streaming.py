@@ -0,0 +1,50 @@
+"""Incremental events from a compiled travel graph.
+
+Wraps LangGraph's ``stream_mode=["messages", "updates"]`` into two event
+shapes that UIs and the HTTP server can render as they arrive:
+
+    {"type": "token", "node": "web_summary", "text": "Lisbon is"}
+    {"type": "token", "node": "city", "city": "Porto", "text": "Porto is"}
+    {"type": "update", "node": "tools", "update": {"weather_forecast": [...], ...}}
+"""
+
+# only summary tokens are user-facing; the parse node's structured-output chunks are not.
+# "city" is a batch worker, whose only model calls are its city's summary
+SUMMARY_NODES = {"vector_summary", "web_summary", "city"}
+STREAM_MODES = ["messages", "updates"]
+
+
+def _token_text(message):
+    content = getattr(message, "content", "")
+    if isinstance(content, str):
+        return content
+    # content-block lists (multimodal message format)
+    return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+
+def _to_events(mode, chunk):
+    if mode == "messages":
+        message, metadata = chunk
+        node = metadata.get("langgraph_node")
+        if node in SUMMARY_NODES:
+            text = _token_text(message)
+            if text:
+                event = {"type": "token", "node": node, "text": text}
+                if metadata.get("city"):
+                    # batch workers interleave, so each token names its city
+                    event["city"] = metadata["city"]
+                yield event
+    elif mode == "updates":
+        for node, update in chunk.items():
+            yield {"type": "update", "node": node, "update": update or {}}
+
+
+def iter_travel_events(graph, inputs, config=None):
+    for mode, chunk in graph.stream(inputs, config, stream_mode=STREAM_MODES):
+        yield from _to_events(mode, chunk)
+
+
+async def aiter_travel_events(graph, inputs, config=None):
+    async for mode, chunk in graph.astream(inputs, config, stream_mode=STREAM_MODES):
+        for event in _to_events(mode, chunk):
+            yield event
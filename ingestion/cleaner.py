@@ -0,0 +1,111 @@
+import re
+import sys
+import time
+import unicodedata
+
+# patterns are compiled once at import and each starts with a literal, so the regex engine
+# skips straight to candidate positions instead of trying a match at every character
+_HYPHEN_BREAK = re.compile(r"-(?<=\w-)\s+(?=\w)")  # "Mont-\nmartre" -> "Montmartre"
+_SPACES = re.compile(r"  +")  # tabs are already spaces after translate
+_BLANK_LINES = re.compile(r"\n(?: *\n)+")  # keeping paragraph breaks
+
+# characters every mode rewrites: line endings, tabs, control characters
+_COMMON = {ord("\r"): "\n", ord("\t"): " "}
+_COMMON.update({c: " " for c in range(0x20) if chr(c) not in "\t\n\r"})
+_COMMON[0x7F] = " "
+# PDF typography: exotic spaces, soft hyphens and zero-width marks, curly quotes, ligatures
+_UNICODE = dict(_COMMON)
+_UNICODE.update({c: " " for c in (0x00A0, 0x1680, 0x202F, 0x205F, 0x3000, *range(0x2000, 0x200B))})
+_UNICODE.update({c: None for c in (0x00AD, 0x200B, 0x200C, 0x200D, 0x2060, 0xFEFF)})  # soft hyphen, zero-width
+_UNICODE.update({0x2018: "'", 0x2019: "'", 0x201C: '"', 0x201D: '"'})
+_UNICODE.update({0xFB00: "ff", 0xFB01: "fi", 0xFB02: "fl", 0xFB03: "ffi", 0xFB04: "ffl"})
+
+
+class _AsciiTable(dict):
+    """Translate table that blanks every code point above printable ASCII (memoized on first sight)."""
+
+    def __init__(self, base):
+        super().__init__({c: c for c in range(0x80)})
+        self.update(base)
+
+    def __missing__(self, codepoint):
+        self[codepoint] = " "
+        return " "
+
+
+class TextCleaner:
+    """Normalizes extracted PDF text before chunking.
+
+    Character filtering is one ``str.translate`` pass; whitespace and
+    de-hyphenation use precompiled patterns. With ``preserve_unicode`` accented
+    names such as "Champs-Élysées" survive (NFC-normalized); otherwise non-ASCII
+    characters are blanked like the original ingestion cleaner.
+    """
+
+    def __init__(self, preserve_unicode=True):
+        self.preserve_unicode = preserve_unicode
+        self._table = dict(_UNICODE) if preserve_unicode else _AsciiTable(_COMMON)
+
+    @property
+    def mode(self):
+        return "unicode" if self.preserve_unicode else "ascii"
+
+    def clean(self, text):
+        if not text:
+            return ""
+        if self.preserve_unicode and not unicodedata.is_normalized("NFC", text):
+            # PDF extractors often emit decomposed accents (e + combining acute)
+            text = unicodedata.normalize("NFC", text)
+        text = text.translate(self._table)
+        text = _HYPHEN_BREAK.sub("", text)
+        text = _SPACES.sub(" ", text)
+        text = _BLANK_LINES.sub("\n\n", text)
+        return text.strip()
+
+    __call__ = clean
+
+
+def legacy_clean(text):
+    """The original five-regex cleaner, kept as the benchmark baseline."""
+    normalized = text.replace("\r", "\n")
+    normalized = re.sub(r"\n{2,}", "\n\n", normalized)
+    normalized = re.sub(r"[ \t]+", " ", normalized)
+    normalized = re.sub(r"(\w)-\s+(\w)", r"\1\2", normalized)
+    normalized = re.sub(r"[^\x09\x0A\x0D\x20-\x7E]", " ", normalized)
+    return normalized.strip()
+
+
+def benchmark(paths=None, target_mb=8, repeat=3):
+    """MB/s for each cleaner on text extracted from the sample guides (repeated up to ~target_mb)."""
+    from ingestion.ingest_cities import discover_city_pdfs, iter_pdf_pages
+
+    paths = paths or list(discover_city_pdfs().values())
+    sample = "\n".join(page for path in paths for page in iter_pdf_pages(path))
+    if not sample:
+        raise ValueError("no text extracted from the sample PDFs")
+    text = sample * max(1, int(target_mb * 1024 * 1024 / len(sample.encode("utf-8"))))
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+
+    cleaners = {
+        "legacy": legacy_clean,
+        "ascii": TextCleaner(preserve_unicode=False).clean,
+        "unicode": TextCleaner(preserve_unicode=True).clean,
+    }
+    results = {}
+    for name, clean in cleaners.items():
+        best = min(_timed(clean, text) for _ in range(repeat))
+        results[name] = round(size_mb / best, 1)
+    return {"input_mb": round(size_mb, 2), "mb_per_s": results}
+
+
+def _timed(clean, text):
+    start = time.perf_counter()
+    clean(text)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    report = benchmark(sys.argv[1:] or None)
+    print(f"Cleaning {report['input_mb']} MB of sample guide text")
+    for name, rate in report["mb_per_s"].items():
+        print(f"{name:>8}: {rate} MB/s")
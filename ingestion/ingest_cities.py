@@ -1,24 +1,48 @@
+import argparse
+import hashlib
 import io
+import json
+import mmap
 import os
 import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Dict
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from pypdf import PdfReader
 from sentence_transformers import SentenceTransformer
 import chromadb
+from config import settings
+from config.prompts import VECTOR_QUERY_TEMPLATE
+from ingestion.cleaner import TextCleaner
+from tools.city_index import refresh_city_index
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+
+_cleaner = TextCleaner(preserve_unicode = settings.INGEST_PRESERVE_UNICODE)
+# recorded per source in the manifest; changing the cleaner or chunking re-processes every file
+PIPELINE_VERSION = f"clean={_cleaner.mode};chunk={CHUNK_SIZE}/{CHUNK_OVERLAP}"
+
+#city key used in chroma metadata, e.g. "New York.pdf" -> "new_york"
+def city_key_from_path(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return re.sub(r"[\s\-]+", "_", stem.strip().lower())
+
+#every pdf under data_dir, keyed by city
+def discover_city_pdfs(data_dir = "data/sources"):
+    sources = {}
+    for root, _dirs, files in os.walk(data_dir):
+        for name in files:
+            if name.lower().endswith(".pdf"):
+                sources[city_key_from_path(name)] = os.path.join(root, name)
+    return dict(sorted(sources.items()))
 
 #function to load pdfs
 def load_city_pdfs(data_dir = "data/sources"):
-    cities = {
-        "paris": os.path.join(data_dir, "paris.pdf"),
-        "tokyo": os.path.join(data_dir, "tokyo.pdf"),
-        "new_york": os.path.join(data_dir, "new_york.pdf"),
-    }
-
     pdf_streams= {}
-    for city, path in cities.items():
-        if not os.path.isfile(path):
-            raise FileNotFoundError(f"Missing PDF for {city} at {path}")
+    for city, path in discover_city_pdfs(data_dir).items():
         with open(path, "rb") as f:
             pdf_streams[city] = f.read()
     return pdf_streams
@@ -35,72 +59,310 @@ def extract_pdf_text(pdf_streams):
         extracted[city] = "\n".join(pages)
     return extracted
 
+#streaming extraction: the pdf is memory-mapped (pages live in the OS page cache, not the heap) and
+#each page's text is extracted only when the consumer asks for it
+def iter_pdf_pages(path):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as mapped:
+        reader = PdfReader(mapped)
+        for page in reader.pages:
+            yield page.extract_text() or ""
+
+def clean_text(text):
+    return _cleaner.clean(text)
+
 #cleaning the text using regex
 def clean_city_text(raw_city_text):
     cleaned: Dict[str, str] = {}
     for city, text in raw_city_text.items():
-        normalized = text.replace("\r", "\n")
-        normalized = re.sub(r"\n{2,}", "\n\n", normalized)  # keeping paragraph breaks
-        normalized = re.sub(r"[ \t]+", " ", normalized)
-        normalized = re.sub(r"(\w)-\s+(\w)", r"\1\2", normalized)
-        normalized = re.sub(r"[^\x09\x0A\x0D\x20-\x7E]", " ", normalized)
-        normalized = normalized.strip()
-        cleaned[city] = normalized
+        cleaned[city] = clean_text(text)
     return cleaned
+
+_splitter = None
+
+#one splitter (and tiktoken encoder) per process
+def _get_splitter():
+    global _splitter
+    if _splitter is None:
+        _splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+            chunk_size = CHUNK_SIZE,
+            chunk_overlap = CHUNK_OVERLAP,
+        )
+    return _splitter
+
 #chunking the text to store in db with overlaps for each chunks
 def chunk_city_text(cleaned_city_text):
-    splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size = 500,
-        chunk_overlap = 50,
-    )
+    splitter = _get_splitter()
     chunked = {}
     for city, text in cleaned_city_text.items():
         chunks = splitter.split_text(text)
         chunked[city] = chunks
         print(f"{city.title()}: {len(chunks)} chunks")
-    return chunked 
+    return chunked
+
+#chunking a stream of pages: the last (possibly unfinished) chunk of each page is carried into the next one,
+#so chunks and their overlap run across page boundaries while only one page plus one chunk is held in memory
+def iter_text_chunks(pages, splitter = None):
+    splitter = splitter or _get_splitter()
+    carry = ""
+    for page_text in pages:
+        buffer = clean_text(f"{carry}\n{page_text}" if carry else page_text)
+        chunks = splitter.split_text(buffer) if buffer else []
+        if not chunks:
+            continue
+        yield from chunks[:-1]
+        carry = chunks[-1]
+    if carry:
+        yield carry
+
+def iter_pdf_chunks(path, splitter = None):
+    return iter_text_chunks(iter_pdf_pages(path), splitter)
+
+#hashing file contents in blocks so large guides are never fully in memory just to hash them
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+#content-addressed chunk ids: an unchanged chunk keeps its id across runs and is never re-embedded
+def iter_chunk_ids(city, chunks):
+    seen = {}
+    for chunk in chunks:
+        h = hashlib.sha1(chunk.encode("utf-8")).hexdigest()[:16]
+        n = seen.get(h, 0)
+        seen[h] = n + 1
+        yield (f"{city}_{h}" if n == 0 else f"{city}_{h}_{n}"), chunk
+
+def chunk_ids(city, chunks):
+    return [chunk_id for chunk_id, _ in iter_chunk_ids(city, chunks)]
+
+def load_manifest(path = None):
+    path = path or settings.INGEST_MANIFEST_PATH
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable ingest manifest {path}: {e}")
+        return {}
+
+def save_manifest(manifest, path = None):
+    path = path or settings.INGEST_MANIFEST_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+#worker: one pdf -> cleaned chunks (runs in a separate process)
+def process_city_pdf(city, path):
+    return city, list(iter_pdf_chunks(path))
+
+#which sources changed since the manifest was written, and which cities disappeared
+def plan_ingestion(sources, manifest):
+    hashes = {city: file_sha256(path) for city, path in sources.items()}
+    changed = {
+        city: path for city, path in sources.items()
+        if manifest.get(city, {}).get("file_hash") != hashes[city]
+        or manifest.get(city, {}).get("pipeline") != PIPELINE_VERSION
+    }
+    removed = [city for city in manifest if city not in sources]
+    return hashes, changed, removed
+
+#yields (city, chunks) as each pdf finishes; a broken pdf is reported and retried on the next run
+def extract_chunks_parallel(changed, workers = None):
+    workers = workers or settings.INGEST_WORKERS or os.cpu_count() or 1
+    if workers == 1 or len(changed) <= 1:
+        for city, path in changed.items():
+            try:
+                yield process_city_pdf(city, path)
+            except Exception as e:
+                print(f"{city.title()}: extraction failed ({e})")
+        return
 
-# creating the vector embeddings
-def create_embeddings(chunks, model_name = "all-MiniLM-L6-v2"):
-    model = SentenceTransformer(model_name)
-    embedding_dict = {}
-    for city, city_chunks in chunks.items():
-        embeddings = model.encode(city_chunks, show_progress_bar = True)
-        embedding_dict[city] = embeddings
+    with ProcessPoolExecutor(max_workers = min(workers, len(changed))) as pool:
+        futures = {pool.submit(process_city_pdf, city, path): city for city, path in changed.items()}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                print(f"{futures[future].title()}: extraction failed ({e})")
 
-    return embedding_dict, model
+#streaming mode: one lazy page -> chunk generator per pdf, consumed in this process
+def extract_chunks_streaming(changed):
+    for city, path in changed.items():
+        yield city, iter_pdf_chunks(path)
 
-# storing the vector embeddings in chromadb
-def store_in_chromadb(chunks, embedding_dict, persist_dir = "storage/chroma"):
+class UpsertError(Exception):
+    """Embedding or upserting a batch failed; its chunks are back in the writer's buffer."""
+
+class ChunkWriter:
+    """Buffers new chunks from any number of cities; embeds and upserts them in fixed-size batches."""
+
+    def __init__(self, collection, batch_size = None, model = None):
+        self.collection = collection
+        self.batch_size = batch_size or settings.EMBED_BATCH_SIZE
+        self.written = 0
+        self._model = model
+        self._batch = []
+        self._pending = Counter()  #city -> buffered chunks not in chroma yet
+
+    @property
+    def model(self):
+        # loaded on first use so a run with nothing to embed never pays for it
+        if self._model is None:
+            self._model = SentenceTransformer(EMBEDDING_MODEL)
+        return self._model
+
+    def add(self, chunk_id, document, metadata):
+        self._batch.append((chunk_id, document, metadata))
+        self._pending[metadata["city"]] += 1
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def pending(self, city):
+        return self._pending[city] > 0
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        documents = [document for _, document, _ in batch]
+        try:
+            embeddings = self.model.encode(documents, show_progress_bar = False)
+            self.collection.upsert(
+                ids = [chunk_id for chunk_id, _, _ in batch],
+                embeddings = embeddings.tolist(),
+                documents = documents,
+                metadatas = [metadata for _, _, metadata in batch]
+            )
+        except Exception as e:
+            self._batch = batch + self._batch
+            raise UpsertError(f"embedding/upsert of {len(batch)} chunks failed: {e}") from e
+        self.written += len(batch)
+        self._pending.subtract(metadata["city"] for _, _, metadata in batch)
+
+#diffing one city's chunks (a list or a lazy generator) against what chroma already holds:
+#unseen chunk hashes go to the writer, moved chunks get a metadata-only update, stale ids are deleted
+def sync_city_chunks(collection, city, chunks, writer):
+    stored = collection.get(where = {"city": city}, include = ["metadatas"])
+    stored_index = {
+        chunk_id: (metadata or {}).get("chunk_index")
+        for chunk_id, metadata in zip(stored["ids"], stored["metadatas"])
+    }
+
+    seen = set()
+    moved_ids, moved_metadatas = [], []
+    new = 0
+    for i, (chunk_id, chunk) in enumerate(iter_chunk_ids(city, chunks)):
+        seen.add(chunk_id)
+        metadata = {"city": city, "chunk_index": i}
+        if chunk_id not in stored_index:
+            writer.add(chunk_id, chunk, metadata)
+            new += 1
+        elif stored_index[chunk_id] != i:
+            # same text, new position: no re-embedding
+            moved_ids.append(chunk_id)
+            moved_metadatas.append(metadata)
+            if len(moved_ids) >= writer.batch_size:
+                collection.update(ids = moved_ids, metadatas = moved_metadatas)
+                moved_ids, moved_metadatas = [], []
+    if moved_ids:
+        collection.update(ids = moved_ids, metadatas = moved_metadatas)
+
+    stale = [chunk_id for chunk_id in stored_index if chunk_id not in seen]
+    if stale:
+        collection.delete(ids = stale)
+
+    print(f"{city.title()}: {len(seen)} chunks, {new} new, {len(stale)} removed")
+    return len(seen)
+
+# precomputing the retrieval query embedding per city so the summary node never runs the model
+def store_query_embeddings(cities, model, persist_dir = "storage/chroma"):
     client = chromadb.PersistentClient(path = persist_dir)
-    collection = client.get_or_create_collection(name = "cities")
+    collection = client.get_or_create_collection(name = "city_queries")
 
-    for city, city_chunks in chunks.items():
-        city_embeddings = embedding_dict[city]
-        ids = [f"{city}_{i}" for i in range(len(city_chunks))]
-        metadatas = [{"city": city, "chunk_index": i} for i in range(len(city_chunks))]
-
-        # ensure idempotent writes
-        collection.delete(ids=ids)
-        
-        collection.add(
-            ids=ids,
-            embeddings= city_embeddings.tolist(),
-            documents=city_chunks,
-            metadatas=metadatas
-        )
-        print(f"{city.title()}: {len(city_chunks)} chunks stored")
+    cities = list(cities)
+    query_texts = [VECTOR_QUERY_TEMPLATE.format(city = city.replace("_", " ")) for city in cities]
+    embeddings = model.encode(query_texts)
 
+    collection.upsert(
+        ids=cities,
+        embeddings=embeddings.tolist(),
+        metadatas=[{"city": city, "query_text": text} for city, text in zip(cities, query_texts)]
+    )
+    print(f"Stored query embeddings for {len(cities)} cities")
     return collection
 
-def ingest_pipeline(data_dir = "data/sources", persist_dir = "storage/chroma"):
-    pdf_streams = load_city_pdfs(data_dir)  #load
-    raw_text = extract_pdf_text(pdf_streams)    #extract raw text
-    cleaned_text = clean_city_text(raw_text)    #clean the raw text
-    chunks = chunk_city_text(cleaned_text)      #chunk the text
-    embeddings_dict, model = create_embeddings(chunks)  #embed the text
-    collection = store_in_chromadb(chunks, embeddings_dict, persist_dir)    #store in chroma db
+def remove_cities(cities, collection, persist_dir = "storage/chroma"):
+    queries = chromadb.PersistentClient(path = persist_dir).get_or_create_collection(name = "city_queries")
+    for city in cities:
+        collection.delete(where = {"city": city})
+        queries.delete(ids = [city])
+        print(f"{city.title()}: source removed, chunks deleted")
+
+def ingest_pipeline(data_dir = "data/sources", persist_dir = "storage/chroma", manifest_path = None, workers = None, full = False, streaming = False, batch_size = None):
+    sources = discover_city_pdfs(data_dir)  #discover
+    manifest = {} if full else load_manifest(manifest_path)
+    hashes, changed, removed = plan_ingestion(sources, manifest)    #skip files whose hash is unchanged
+    print(f"{len(sources)} sources: {len(changed)} changed, {len(sources) - len(changed)} unchanged, {len(removed)} removed")
+
+    client = chromadb.PersistentClient(path = persist_dir)
+    collection = client.get_or_create_collection(name = "cities")
+
+    if streaming:
+        city_chunks = extract_chunks_streaming(changed)    #page by page, bounded memory
+    else:
+        city_chunks = extract_chunks_parallel(changed, workers)    #extract, clean, chunk in a process pool
+
+    writer = ChunkWriter(collection, batch_size)
+    synced = {}
+    upsert_error = None
+    try:
+        for city, chunks in city_chunks:
+            try:
+                count = sync_city_chunks(collection, city, chunks, writer)  #only unseen chunk hashes get embedded
+            except UpsertError:
+                raise
+            except Exception as e:
+                print(f"{city.title()}: extraction failed ({e})")
+                continue
+            synced[city] = {"file_hash": hashes[city], "pipeline": PIPELINE_VERSION, "chunks": count}
+        writer.flush()  #embed across cities in fixed-size batches, upserting each as it is encoded
+    except UpsertError as e:
+        #stop: chroma is failing, so every further batch would too
+        print(f"Upsert failed, stopping ingestion ({e})")
+        upsert_error = e
+    #a city counts as ingested once all of its new chunks are in chroma; the rest are retried next run
+    ingested = {city: entry for city, entry in synced.items() if not writer.pending(city)}
+
+    model = None
+    if ingested:
+        print(f"Embedded and stored {writer.written} chunks")
+        model = writer.model
+        store_query_embeddings(ingested.keys(), model, persist_dir)    #precompute retrieval queries
+    if removed:
+        remove_cities(removed, collection, persist_dir)
+
+    for city in removed:
+        manifest.pop(city, None)
+    manifest.update(ingested)
+    save_manifest(manifest, manifest_path)
+
+    if ingested or removed:
+        refresh_city_index(collection)  #route newly ingested cities to the vector store
+    if upsert_error is not None:
+        raise upsert_error
     return collection, model
 
 if __name__ == "__main__":
-    collection, model = ingest_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description = "Ingest city guide PDFs into the vector store")
+    parser.add_argument("--data-dir", default = "data/sources")
+    parser.add_argument("--persist-dir", default = settings.CHROMA_PERSIST_DIR)
+    parser.add_argument("--workers", type = int, default = None, help = "extraction processes (default: one per CPU)")
+    parser.add_argument("--stream", action = "store_true", help = "extract page by page in this process with bounded memory")
+    parser.add_argument("--full", action = "store_true", help = "ignore the manifest and re-check every source")
+    args = parser.parse_args()
+    collection, model = ingest_pipeline(args.data_dir, args.persist_dir, workers = args.workers, full = args.full, streaming = args.stream)
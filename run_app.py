@@ -0,0 +1,24 @@
+"""Streamlit entrypoint that warms the serving process before the first page view.
+
+`streamlit run app.py` executes app.py only when a browser session connects, so
+its boot() would leave the process cold (and the container healthcheck waiting)
+until then. Running Streamlit's CLI from here lets warm_start() compile the
+graph, create the tools and load the vector store first; the vector store
+writes VECTOR_STORE_READY_FILE once it is warm in this process.
+
+    python run_app.py --server.port=8501 --server.address=0.0.0.0
+"""
+
+import os
+import sys
+
+from streamlit.web import cli
+
+from graph.build_graph import warm_start
+
+
+if __name__ == "__main__":
+	warm_start()
+	script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+	sys.argv = ["streamlit", "run", script, *sys.argv[1:]]
+	sys.exit(cli.main())
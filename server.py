@@ -0,0 +1,246 @@
+"""Headless JSON API around the compiled travel graph.
+
+    uvicorn server:app --host 0.0.0.0 --port 8000 --workers 4
+
+Endpoints:
+
+    POST /query          {"query": ..., "thread_id"?: ..., "timeout_s"?: ...} -> TravelOutput
+    POST /query/stream   same body -> server-sent events (token / update / result / error)
+    GET  /healthz        liveness
+    GET  /readyz         200 once the graph is compiled and the vector store is warm, else 503
+    GET  /metrics        Prometheus metrics (tools/telemetry.py)
+    GET  /quota          remaining client-side quota per upstream provider (tools/rate_limit.py)
+
+Each worker process runs at most SERVER_MAX_CONCURRENCY graph runs at once
+and lets SERVER_MAX_QUEUE more wait; further requests get 429 with a
+Retry-After header. Every request has a deadline (SERVER_REQUEST_TIMEOUT, or
+a shorter ``timeout_s``) that bounds the HTTP calls made by the tools and
+turns into 504 if the graph has not finished by then.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from config import settings
+from graph import build_graph
+from graph.output_schema import TravelOutput, to_output_schema
+from graph.state import TravelState
+from graph.streaming import aiter_travel_events
+from tools import http_client, rate_limit, telemetry, vector_store
+
+REJECTED = telemetry.REGISTRY.counter("travel_server_rejected_total", "API requests turned away.", ["reason"])
+
+
+class QueryRequest(BaseModel):
+    query: str = Field(..., min_length=1, description="travel question, e.g. 'Paris, Tokyo and Lisbon next month'")
+    thread_id: Optional[str] = Field(default=None, description="conversation id; reuse it to keep context across queries")
+    timeout_s: Optional[float] = Field(default=None, gt=0, description="deadline for this request, capped at the server's")
+
+
+class Saturated(Exception):
+    """Every worker slot is busy and the wait queue is full."""
+
+
+class AdmissionControl:
+    """At most `concurrency` graph runs at once and `queue_size` more waiting; anything beyond is rejected."""
+
+    def __init__(self, concurrency=None, queue_size=None):
+        self.concurrency = concurrency or settings.SERVER_MAX_CONCURRENCY
+        self.queue_size = queue_size if queue_size is not None else settings.SERVER_MAX_QUEUE
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self.running = 0
+        self.waiting = 0
+
+    @asynccontextmanager
+    async def slot(self, timeout):
+        """Hold a worker slot; raises Saturated at once, or TimeoutError if none frees up within `timeout`."""
+        if self.running + self.waiting >= self.concurrency + self.queue_size:
+            raise Saturated()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+
+admission = AdmissionControl()
+_started = False
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global _started
+    # compile the shared async graph and start warming the vector store before taking traffic
+    build_graph.warm_start(async_app=True)
+    _started = True
+    yield
+
+
+app = FastAPI(title="Multimodal Travel Agent", lifespan=lifespan)
+
+
+def _request_timeout(body: QueryRequest) -> float:
+    if body.timeout_s:
+        return min(body.timeout_s, settings.SERVER_REQUEST_TIMEOUT)
+    return settings.SERVER_REQUEST_TIMEOUT
+
+
+def _config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+async def _admit(stack: AsyncExitStack, timeout: float):
+    """Enter a worker slot on `stack`, mapping saturation to 429 and a queue wait past the deadline to 504."""
+    try:
+        await stack.enter_async_context(admission.slot(timeout))
+    except Saturated:
+        REJECTED.inc(reason="saturated")
+        raise HTTPException(
+            status_code=429,
+            detail="Server is busy; retry shortly",
+            headers={"Retry-After": str(settings.SERVER_RETRY_AFTER)},
+        )
+    except asyncio.TimeoutError:
+        REJECTED.inc(reason="queue_timeout")
+        raise HTTPException(status_code=504, detail="Deadline passed while waiting for a worker")
+
+
+@app.post("/query", response_model=TravelOutput)
+async def query(body: QueryRequest, response: Response):
+    thread_id = body.thread_id or str(uuid.uuid4())
+    timeout = _request_timeout(body)
+    deadline = time.monotonic() + timeout
+    graph = build_graph.get_async_app()
+
+    async with AsyncExitStack() as stack:
+        await _admit(stack, timeout)
+        remaining = deadline - time.monotonic()
+        try:
+            with http_client.deadline(remaining):
+                result = await asyncio.wait_for(graph.ainvoke({"user_query": body.query}, _config(thread_id)), remaining)
+        except asyncio.TimeoutError:
+            REJECTED.inc(reason="deadline")
+            raise HTTPException(status_code=504, detail=f"Request did not finish within {timeout:g}s")
+
+    response.headers["X-Thread-Id"] = thread_id
+    return to_output_schema(TravelState(**result))
+
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+_DONE = object()
+
+
+async def _produce(graph, query, config, queue):
+    # the whole stream runs in this one task (LangGraph keeps context across its steps)
+    try:
+        async for event in aiter_travel_events(graph, {"user_query": query}, config):
+            await queue.put(event)
+    finally:
+        await queue.put(_DONE)
+
+
+class _SlotStreamingResponse(StreamingResponse):
+    """StreamingResponse that gives its worker slot back however the response ends.
+
+    The slot is taken before the response starts; a client that disconnects
+    before the first chunk means the event generator never runs, so it can't
+    be the one to release it.
+    """
+
+    def __init__(self, content, stack: AsyncExitStack, **kwargs):
+        super().__init__(content, **kwargs)
+        self._stack = stack
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # stops the graph run if the generator is still suspended, then frees the slot (both idempotent)
+            await self.body_iterator.aclose()
+            await self._stack.aclose()
+
+
+@app.post("/query/stream")
+async def query_stream(body: QueryRequest):
+    thread_id = body.thread_id or str(uuid.uuid4())
+    timeout = _request_timeout(body)
+    deadline = time.monotonic() + timeout
+    graph = build_graph.get_async_app()
+
+    # admit before the response starts, so saturation is still a plain 429
+    stack = AsyncExitStack()
+    await _admit(stack, timeout)
+
+    async def events():
+        async with stack:
+            queue = asyncio.Queue()
+            with http_client.deadline(deadline - time.monotonic()):
+                producer = asyncio.create_task(_produce(graph, body.query, _config(thread_id), queue))
+            try:
+                while True:
+                    event = await asyncio.wait_for(queue.get(), max(deadline - time.monotonic(), 0))
+                    if event is _DONE:
+                        break
+                    yield _sse(event["type"], event)
+                await producer
+            except asyncio.TimeoutError:
+                REJECTED.inc(reason="deadline")
+                yield _sse("error", {"detail": f"Request did not finish within {timeout:g}s"})
+                return
+            except Exception as e:
+                # the 200 and maybe some tokens are already out; end with the documented error event
+                print(f"Stream {thread_id} failed: {e!r}")
+                yield _sse("error", {"detail": f"Request failed ({type(e).__name__})"})
+                return
+            finally:
+                # deadline passed or the client went away
+                producer.cancel()
+
+            state = await graph.aget_state(_config(thread_id))
+            yield _sse("result", to_output_schema(TravelState(**state.values)).model_dump())
+
+    return _SlotStreamingResponse(events(), stack, media_type="text/event-stream", headers={"X-Thread-Id": thread_id})
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    ready = _started and vector_store.is_ready()
+    payload = {
+        "status": "ready" if ready else "starting",
+        "vector_store": vector_store.is_ready(),
+        "running": admission.running,
+        "waiting": admission.waiting,
+    }
+    return JSONResponse(payload, status_code=200 if ready else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(telemetry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/quota")
+async def quota():
+    return rate_limit.report()
@@ -0,0 +1,105 @@
+"""Shared pytest fixtures."""
+
+import asyncio
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from config import settings
+from graph import prewarm, response_cache
+from graph.nodes import city_summary_web, parse_query, tool_executor
+from graph.schemas.extraction import CityExtraction
+from tools.thumbnails import ThumbnailStore
+
+# how long the fake summary and weather calls take in the sync graph
+BRANCH_DELAY = 0.3
+
+
+@pytest.fixture(autouse=True)
+def _no_popularity_file(monkeypatch):
+    # queries run by the tests must not count towards the real storage/ popularity file
+    monkeypatch.setattr(settings, "POPULARITY_PATH", "")
+    monkeypatch.setattr(settings, "POPULARITY_TRACKING", False)
+    monkeypatch.setattr(prewarm, "_tracker", None)
+
+
+class FakeSearch:
+    def search(self, query, max_results=5):
+        return [{"title": "Guide", "snippet": "Lisbon is hilly.", "url": "https://example.com"}]
+
+    async def asearch(self, query, max_results=5):
+        await asyncio.sleep(0.01)
+        return self.search(query, max_results)
+
+
+class FakeWeather:
+    def get_forecast(self, city):
+        time.sleep(BRANCH_DELAY)
+        return []
+
+
+class FakeImages:
+    def search_images(self, city, limit=10):
+        return ["https://example.com/lisbon.jpg"]
+
+
+def _no_encoder(text):
+    raise RuntimeError("no embedding model in tests")
+
+
+def _slow_summary(_inputs):
+    time.sleep(BRANCH_DELAY)
+    return "Lisbon summary."
+
+
+@pytest.fixture
+def branch_delay():
+    return BRANCH_DELAY
+
+
+@pytest.fixture
+def no_embedding_model(monkeypatch):
+    # parse caches fall back to exact matches only
+    monkeypatch.setattr(response_cache, "_default_encode", _no_encoder)
+
+
+@pytest.fixture
+def fresh_response_cache(monkeypatch, no_embedding_model):
+    cache = response_cache.ResponseCache()
+    monkeypatch.setattr(response_cache, "_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def graph_fakes(monkeypatch, fresh_response_cache):
+    """Sync graph wiring: a slow summary and a slow, empty forecast, so branch overlap is measurable."""
+    extraction = CityExtraction(city_name="Lisbon", confidence=0.9)
+    monkeypatch.setattr(parse_query, "_build_extractor", lambda: RunnableLambda(lambda _: extraction))
+    monkeypatch.setattr(city_summary_web, "get_web_search_tool", lambda: FakeSearch())
+    monkeypatch.setattr(city_summary_web, "_summary_chain", lambda: RunnableLambda(_slow_summary))
+    monkeypatch.setattr(tool_executor, "get_weather_tool", lambda: FakeWeather())
+    monkeypatch.setattr(tool_executor, "get_image_tool", lambda: FakeImages())
+    monkeypatch.setattr(tool_executor, "get_thumbnail_store", lambda: ThumbnailStore(root=""))
+
+
+@pytest.fixture
+def async_graph_fakes(monkeypatch, fresh_response_cache):
+    """Async graph wiring: quick async tools and a one-day sunny forecast."""
+
+    async def extract(_prompt):
+        return CityExtraction(city_name="Lisbon", confidence=0.9, date_reference="next week")
+
+    async def weather(city):
+        await asyncio.sleep(0.01)
+        return [{"date": "2025-01-01", "temp_min": 10, "temp_max": 15, "description": "sunny"}]
+
+    async def images(city):
+        await asyncio.sleep(0.01)
+        return FakeImages().search_images(city)
+
+    monkeypatch.setattr(parse_query, "_build_extractor", lambda: RunnableLambda(extract))
+    monkeypatch.setattr(city_summary_web, "get_web_search_tool", lambda: FakeSearch())
+    monkeypatch.setattr(city_summary_web, "_summary_chain", lambda: RunnableLambda(lambda _: "Lisbon summary."))
+    monkeypatch.setattr(tool_executor, "ASYNC_TOOL_REGISTRY", {"fetch_weather": weather, "fetch_images": images})
+    monkeypatch.setattr(tool_executor, "get_thumbnail_store", lambda: ThumbnailStore(root=""))
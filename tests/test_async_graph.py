@@ -0,0 +1,26 @@
+"""Test script for the async graph path with stubbed LLM and tools (no network needed)"""
+
+import asyncio
+
+from graph import build_graph
+
+
+def test_async_graph_end_to_end(async_graph_fakes):
+    app = build_graph.build_async_app(enable_checkpointer=False)
+
+    result = asyncio.run(app.ainvoke({"user_query": "Lisbon next week"}))
+
+    assert result["city"] == "Lisbon"
+    assert result["city_summary"] == "Lisbon summary."
+    assert result["weather_forecast"][0]["description"] == "sunny"
+    assert result["image_urls"] == ["https://example.com/lisbon.jpg"]
+
+
+def test_many_queries_share_one_loop(async_graph_fakes):
+    app = build_graph.build_async_app(enable_checkpointer=False)
+
+    async def run_all():
+        return await asyncio.gather(*(app.ainvoke({"user_query": "Lisbon"}) for _ in range(50)))
+
+    results = asyncio.run(run_all())
+    assert all(r["city_summary"] == "Lisbon summary." for r in results)
@@ -0,0 +1,86 @@
+"""Test script for multi-city (batch) queries with stubbed LLM and tools (no network needed)"""
+
+import asyncio
+import threading
+import time
+
+from graph import build_graph
+from graph.nodes import city_batch
+from graph.output_schema import to_output_schema
+from graph.state import TravelState
+
+ITINERARY = "Paris, Tokyo, Rome, Oslo and Lisbon next week"
+CITIES = ["Paris", "Tokyo", "Rome", "Oslo", "Lisbon"]
+
+
+def test_cities_run_concurrently_and_merge_in_order(graph_fakes, branch_delay):
+    app = build_graph.build_app(enable_checkpointer=False)
+
+    start = time.perf_counter()
+    result = app.invoke({"user_query": ITINERARY})
+    elapsed = time.perf_counter() - start
+
+    assert result["cities"] == CITIES
+    # five cities take about as long as one
+    assert elapsed < branch_delay * 2.5
+
+    output = to_output_schema(TravelState(**result))
+    assert [c.city for c in output.cities] == CITIES
+    assert all(c.city_summary == "Lisbon summary." for c in output.cities)
+    assert output.city_summary == output.cities[0].city_summary
+    assert "Tokyo: Weather data unavailable for Tokyo" in result["errors"]
+
+
+def test_next_single_city_query_clears_batch_results(graph_fakes):
+    app = build_graph.build_app(enable_checkpointer=True)
+    config = {"configurable": {"thread_id": "batch"}}
+
+    app.invoke({"user_query": ITINERARY}, config)
+    result = app.invoke({"user_query": "Tell me about Lisbon"}, config)
+
+    assert result["cities"] == [] and result["city_outputs"] == []
+    output = to_output_schema(TravelState(**result))
+    assert [c.city for c in output.cities] == ["Lisbon"]
+
+
+def test_single_city_after_a_batch_is_fetched_in_full(monkeypatch, graph_fakes):
+    from langchain_core.runnables import RunnableLambda
+
+    from graph.nodes import city_summary_web, tool_executor
+
+    class Images:
+        def search_images(self, city, limit=10):
+            return [f"https://example.com/{city.lower()}.jpg"]
+
+    monkeypatch.setattr(city_summary_web, "_summary_chain", lambda: RunnableLambda(lambda i: f"{i['city']} summary."))
+    monkeypatch.setattr(tool_executor, "get_image_tool", lambda: Images())
+    app = build_graph.build_app(enable_checkpointer=True)
+    config = {"configurable": {"thread_id": "single-batch-single"}}
+
+    app.invoke({"user_query": "Tell me about Lisbon"}, config)
+    batch = app.invoke({"user_query": "Paris and Tokyo"}, config)
+    assert batch["city_summary"] is None and batch["image_urls"] == []
+    result = app.invoke({"user_query": "Weather in Paris"}, config)
+
+    assert result["skip_summary"] is False and result["skip_images"] is False
+    assert result["city_summary"] == "Paris summary."
+    assert result["image_urls"] == ["https://example.com/paris.jpg"]
+
+
+def test_global_concurrency_limit(monkeypatch, graph_fakes, branch_delay):
+    monkeypatch.setattr(city_batch, "_slots", threading.BoundedSemaphore(2))
+    app = build_graph.build_app(enable_checkpointer=False)
+
+    start = time.perf_counter()
+    app.invoke({"user_query": "Paris, Tokyo, Rome and Oslo"})
+
+    # four cities through two slots: two rounds
+    assert time.perf_counter() - start >= branch_delay * 2
+
+
+def test_async_batch(graph_fakes):
+    app = build_graph.build_async_app(enable_checkpointer=False)
+
+    result = asyncio.run(app.ainvoke({"user_query": ITINERARY}))
+
+    assert sorted(o["city"] for o in result["city_outputs"]) == sorted(CITIES)
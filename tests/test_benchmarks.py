@@ -0,0 +1,57 @@
+"""Test script for the benchmark harness (fake providers, real graph, no network needed)"""
+
+import os
+
+import pytest
+
+from benchmarks import run as bench
+from config import settings
+from graph import prewarm, response_cache
+from tools import geocoding, image_api, rate_limit, weather_api, web_search
+
+_CONFIGURED = (
+    "OPENWEATHER_API_KEY", "UNSPLASH_API_KEY", "PEXELS_API_KEY", "TAVILY_API_KEY", "GEOCODE_CACHE_PATH", "RATE_LIMITS",
+    "OPENWEATHER_BASE_URL", "UNSPLASH_BASE_URL", "PEXELS_BASE_URL", "TAVILY_BASE_URL", "THUMBNAIL_DIR", "POPULARITY_PATH",
+)
+
+
+@pytest.fixture
+def isolated(monkeypatch, no_embedding_model):
+    # the harness repoints settings, env and tool singletons; restore all of it afterwards
+    for name in _CONFIGURED:
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+    for name in ("OPENAI_API_KEY", "OPENAI_BASE_URL"):
+        monkeypatch.setenv(name, os.environ.get(name, ""))
+    monkeypatch.setattr(weather_api, "_weather_tool", None)
+    monkeypatch.setattr(image_api, "_image_tool", None)
+    monkeypatch.setattr(web_search, "_search_tool", None)
+    monkeypatch.setattr(geocoding, "_cache", None)
+    monkeypatch.setattr(rate_limit, "_limiter", None)
+    monkeypatch.setattr(response_cache, "_cache", None)
+    monkeypatch.setattr(prewarm, "_tracker", None)
+    weather_api.forecast_cache.clear()
+    yield
+    weather_api.forecast_cache.clear()
+
+
+def test_percentiles_interpolate():
+    assert bench.percentile([1, 2, 3, 4], 50) == 2.5
+    assert bench.percentile([5], 99) == 5
+    assert bench.summarize([0.001, 0.002, 0.003])["p50"] == 2.0
+
+
+def test_web_and_skip_scenarios_report_per_node_latency(isolated):
+    results = bench.run(
+        scenarios=["web", "skip"], iterations=2, warmup=0, concurrency=(2,), requests_per_thread=1,
+    )
+
+    web = results["scenarios"]["web"]
+    assert set(web["latency_ms"]["nodes"]) >= {"parse", "router", "web_summary", "tools", "final"}
+    assert web["latency_ms"]["total"]["count"] == 2
+    assert web["throughput"]["2"]["errors"] == 0
+    assert web["provider_calls"]["openai"] >= 2
+    assert web["provider_calls"]["tavily"] >= 2
+
+    skip = results["scenarios"]["skip"]
+    assert "web_summary" not in skip["latency_ms"]["nodes"]
+    assert results["meta"]["config"]["concurrency"] == [2]
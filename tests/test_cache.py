@@ -0,0 +1,100 @@
+"""Test script for the shared TTL cache and forecast caching (no network needed)"""
+
+import threading
+import time
+
+from config import settings
+from tools import weather_api
+from tools.cache import TTLCache
+from tools.weather_api import WeatherTool
+
+
+def test_entries_expire():
+    cache = TTLCache(ttl=0.05)
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    time.sleep(0.1)
+    assert cache.get("k") is None
+
+
+def test_single_flight_under_concurrency():
+    cache = TTLCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("paris", loader)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ["value"] * 8
+
+
+def test_loader_errors_are_not_cached():
+    cache = TTLCache()
+
+    def failing():
+        raise RuntimeError("boom")
+
+    try:
+        cache.get_or_load("k", failing)
+    except RuntimeError:
+        pass
+    assert cache.get_or_load("k", lambda: 1) == 1
+
+
+def test_forecast_is_fetched_once_per_refresh_step(monkeypatch):
+    monkeypatch.setattr(settings, "OPENWEATHER_API_KEY", "test")
+    weather_api.forecast_cache.clear()
+    fetches = []
+
+    def fake_fetch(self, lat, lon):
+        fetches.append((lat, lon))
+        return {"list": [{"dt": 1700000000, "main": {"temp": 10, "temp_min": 8, "temp_max": 12},
+                          "weather": [{"description": "clear sky"}]}]}
+
+    monkeypatch.setattr(WeatherTool, "_geocode_city", lambda self, city: (48.8566, 2.3522))
+    monkeypatch.setattr(WeatherTool, "_fetch_forecast", fake_fetch)
+
+    first = WeatherTool().get_forecast("Paris")
+    second = WeatherTool().get_forecast("paris")
+    assert first == second
+    assert len(fetches) == 1
+
+    # copies are handed out, so callers can't corrupt the cached entry
+    first[0]["description"] = "changed"
+    assert WeatherTool().get_forecast("Paris")[0]["description"] == "clear sky"
+
+
+def test_refresh_boundary_is_aligned():
+    step = settings.FORECAST_REFRESH_SECONDS
+    boundary = weather_api._next_refresh_boundary(now=step * 10 + 5)
+    assert boundary == step * 11
+
+
+def test_async_single_flight():
+    import asyncio
+
+    cache = TTLCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def run_all():
+        return await asyncio.gather(*(cache.aget_or_load("tokyo", loader) for _ in range(10)))
+
+    assert asyncio.run(run_all()) == ["value"] * 10
+    assert len(calls) == 1
@@ -0,0 +1,82 @@
+"""Test script for the bounded SQLite checkpointer (no network needed)"""
+
+import asyncio
+import time
+
+from graph import build_graph
+from graph.checkpointer import BoundedSqliteSaver, make_checkpointer
+
+
+def _run(app, query, thread_id):
+    return app.invoke({"user_query": query}, config={"configurable": {"thread_id": thread_id}})
+
+
+def test_state_survives_across_invocations(tmp_path, graph_fakes):
+    saver = BoundedSqliteSaver(path=str(tmp_path / "checkpoints.sqlite3"))
+    app = build_graph.build_app(checkpointer=saver)
+
+    _run(app, "Tell me about Lisbon", "t1")
+    second = _run(app, "Weather in Lisbon", "t1")
+
+    assert second["skip_summary"] is True
+    assert second["city_summary"] == "Lisbon summary."
+
+    # a second app on the same file (another worker) sees the same conversation
+    other = build_graph.build_app(checkpointer=BoundedSqliteSaver(path=str(tmp_path / "checkpoints.sqlite3")))
+    state = other.get_state({"configurable": {"thread_id": "t1"}})
+    assert state.values["city"] == "Lisbon"
+
+
+def test_compaction_keeps_one_snapshot_per_finished_run(graph_fakes):
+    saver = BoundedSqliteSaver(path=":memory:", max_checkpoints=0, compact=True)
+    app = build_graph.build_app(checkpointer=saver)
+
+    _run(app, "Tell me about Lisbon", "t1")
+    per_run = saver.stats()["checkpoints"]
+    _run(app, "Weather in Lisbon", "t1")
+    _run(app, "Weather in Lisbon tomorrow", "t1")
+
+    history = list(app.get_state_history({"configurable": {"thread_id": "t1"}}))
+    sources = [h.metadata["source"] for h in history]
+    # current run in full, earlier runs reduced to their final checkpoint
+    assert len(history) == per_run + 2
+    assert sources[-2:] == ["loop", "loop"]
+    assert history[-1].values["city_summary"] == "Lisbon summary."
+
+
+def test_cap_bounds_checkpoints_per_thread(graph_fakes):
+    saver = BoundedSqliteSaver(path=":memory:", max_checkpoints=3, compact=False)
+    app = build_graph.build_app(checkpointer=saver)
+
+    for _ in range(3):
+        _run(app, "Tell me about Lisbon", "t1")
+
+    assert len(list(saver.list({"configurable": {"thread_id": "t1"}}))) == 3
+    assert _run(app, "Weather in Lisbon", "t1")["skip_summary"] is True
+
+
+def test_idle_threads_expire(graph_fakes):
+    saver = BoundedSqliteSaver(path=":memory:", ttl=60)
+    app = build_graph.build_app(checkpointer=saver)
+    _run(app, "Tell me about Lisbon", "old")
+    _run(app, "Tell me about Lisbon", "fresh")
+
+    assert saver.sweep(now=time.time() + 30) == 0
+    saver._transaction(lambda cur: cur.execute("UPDATE threads SET updated_at = 0 WHERE thread_id = 'old'"))
+    assert saver.sweep() == 1
+
+    assert saver.get_tuple({"configurable": {"thread_id": "old"}}) is None
+    assert saver.get_tuple({"configurable": {"thread_id": "fresh"}}) is not None
+    assert saver.stats()["threads"] == 1
+
+
+def test_async_app_uses_the_same_saver(graph_fakes):
+    saver = make_checkpointer("sqlite")
+    app = build_graph.build_async_app(checkpointer=saver)
+    config = {"configurable": {"thread_id": "a1"}}
+
+    async def run():
+        await app.ainvoke({"user_query": "Tell me about Lisbon"}, config=config)
+        return await app.ainvoke({"user_query": "Weather in Lisbon"}, config=config)
+
+    assert asyncio.run(run())["skip_summary"] is True
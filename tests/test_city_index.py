@@ -0,0 +1,86 @@
+"""Test script for the routing city index (no Chroma store needed)"""
+
+from tools.city_index import CityIndex, normalize_city
+
+
+def test_normalize_city():
+    assert normalize_city("New_York") == "new york"
+    assert normalize_city(" new-york ") == "new york"
+    assert normalize_city("N.Y.C.") == "nyc"
+
+
+def test_resolves_stored_keys_and_aliases():
+    index = CityIndex(["paris", "tokyo", "new_york"])
+    assert index.resolve("New York") == "new_york"
+    assert index.resolve("NYC") == "new_york"
+    assert index.resolve("the Big Apple") == "new_york"
+    assert index.resolve("PARIS") == "paris"
+    assert "Lisbon" not in index
+
+
+def test_aliases_need_an_ingested_target():
+    index = CityIndex(["paris"])
+    assert index.resolve("NYC") is None
+    assert index.cities() == ["paris"]
+
+
+class _FakeCollection:
+    def get(self, include=None):
+        return {"metadatas": [{"city": "lisbon", "chunk_index": 0}, {"city": "lisbon", "chunk_index": 1}]}
+
+
+def test_built_from_collection_metadata():
+    from tools.city_index import build_city_index
+
+    index = build_city_index(_FakeCollection())
+    assert index.cities() == ["lisbon"]
+
+
+class _CountingCollection(_FakeCollection):
+    def __init__(self):
+        self.chunks = 2
+        self.reads = 0
+
+    def count(self):
+        return self.chunks
+
+    def get(self, include=None):
+        self.reads += 1
+        return super().get(include)
+
+
+def test_refresh_only_rereads_metadata_when_the_count_changes(monkeypatch):
+    from tools import city_index
+
+    collection = _CountingCollection()
+    monkeypatch.setattr(city_index, "get_collection", lambda: collection)
+    monkeypatch.setattr(city_index, "_index", None)
+    monkeypatch.setattr(city_index, "_next_refresh", 0.0)
+
+    assert "Lisbon" in city_index.get_city_index()
+    monkeypatch.setattr(city_index, "_next_refresh", 0.0)
+    city_index.get_city_index()
+    assert collection.reads == 1
+
+    collection.chunks = 3
+    monkeypatch.setattr(city_index, "_next_refresh", 0.0)
+    city_index.get_city_index()
+    assert collection.reads == 2
+
+
+def test_unavailable_store_is_retried_after_a_backoff(monkeypatch):
+    from tools import city_index
+
+    attempts = []
+
+    def unavailable():
+        attempts.append(1)
+        raise RuntimeError("no chroma")
+
+    monkeypatch.setattr(city_index, "get_collection", unavailable)
+    monkeypatch.setattr(city_index, "_index", None)
+    monkeypatch.setattr(city_index, "_next_refresh", 0.0)
+
+    for _ in range(3):
+        assert "Lisbon" not in city_index.get_city_index()
+    assert len(attempts) == 1
@@ -0,0 +1,34 @@
+"""Test script for the ingestion text cleaner"""
+
+import unicodedata
+
+from ingestion.cleaner import TextCleaner, legacy_clean
+
+
+def test_unicode_mode_keeps_accented_names():
+    cleaner = TextCleaner()
+    assert cleaner("Walk the Champs-Élysées to the café") == "Walk the Champs-Élysées to the café"
+    # decomposed accents from the PDF extractor are composed
+    assert cleaner(unicodedata.normalize("NFD", "Élysées")) == "Élysées"
+
+
+def test_ascii_mode_blanks_non_ascii_like_the_original():
+    assert TextCleaner(preserve_unicode=False)("café au lait") == "caf au lait"
+
+
+def test_pdf_typography_is_normalized():
+    cleaner = TextCleaner()
+    assert cleaner("a b c") == "a b c"
+    assert cleaner("ﬁne­ly ‘quoted’") == "finely 'quoted'"
+    assert cleaner("zero​width﻿") == "zerowidth"
+
+
+def test_whitespace_and_hyphenation_match_legacy_on_ascii_text():
+    text = "  Mont-\nmartre is\tnice.\r\n\r\n\r\nNext   paragraph -  dash \n"
+    cleaned = TextCleaner()(text)
+    assert cleaned == legacy_clean(text)
+    assert cleaned == "Montmartre is nice.\n\nNext paragraph - dash"
+
+
+def test_blank_lines_with_spaces_collapse_to_one_paragraph_break():
+    assert TextCleaner()("one\n \n\t\n\ntwo") == "one\n\ntwo"
@@ -0,0 +1,102 @@
+"""Test script for the vectorized forecast normalizer (no network needed)"""
+
+import random
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tools.forecast import normalize_forecast, normalize_forecasts
+
+START = int(datetime(2025, 6, 1, tzinfo=timezone.utc).timestamp())
+
+
+def _entry(dt, temp, description="clear sky", rain=None, wind=3.0, humidity=60):
+    item = {
+        "dt": dt,
+        "main": {"temp": temp, "temp_min": temp - 1, "temp_max": temp + 1, "humidity": humidity},
+        "weather": [{"description": description}],
+        "wind": {"speed": wind},
+    }
+    if rain is not None:
+        item["rain"] = {"3h": rain}
+    return item
+
+
+def _forecast(entries, tz=0):
+    return {"list": entries, "city": {"timezone": tz}}
+
+
+def test_days_follow_the_city_timezone():
+    # 22:00 and 23:00 UTC on May 31 are already June 1 in Tokyo (UTC+9)
+    entries = [_entry(START - 2 * 3600, 20), _entry(START - 3600, 22), _entry(START + 3 * 3600, 24)]
+
+    tokyo = normalize_forecast(_forecast(entries, tz=9 * 3600))
+    utc = normalize_forecast(_forecast(entries))
+
+    assert [d["date"] for d in tokyo] == ["2025-06-01"]
+    assert [d["date"] for d in utc] == ["2025-05-31", "2025-06-01"]
+
+
+def test_daily_aggregates():
+    entries = [
+        _entry(START, 10, "light rain", rain=1.5, wind=2.0, humidity=80),
+        _entry(START + 3 * 3600, 14, "light rain", rain=0.5, wind=6.5, humidity=70),
+        _entry(START + 6 * 3600, 18, "clear sky", wind=4.0, humidity=60),
+    ]
+    entries[2]["snow"] = {"3h": 1.0}
+
+    [day] = normalize_forecast(_forecast(entries))
+
+    assert day == {
+        "date": "2025-06-01",
+        "temp_min": 9.0,
+        "temp_max": 19.0,
+        "temp_avg": 14.0,
+        "description": "light rain",
+        "precip_mm": 3.0,
+        "wind_max": 6.5,
+        "humidity": 70.0,
+    }
+
+
+def test_matches_a_per_entry_reference():
+    rng = random.Random(7)
+    descriptions = ["clear sky", "few clouds", "light rain", "overcast clouds"]
+    tz = -4 * 3600
+    entries = [
+        _entry(START + i * 3 * 3600, round(rng.uniform(-5, 30), 2), rng.choice(descriptions),
+               rain=rng.choice([None, round(rng.uniform(0, 5), 2)]), wind=round(rng.uniform(0, 12), 2),
+               humidity=rng.randint(20, 100))
+        for i in range(40)
+    ]
+
+    by_day = defaultdict(list)
+    for item in entries:
+        local = datetime.fromtimestamp(item["dt"], timezone.utc) + timedelta(seconds=tz)
+        by_day[local.strftime("%Y-%m-%d")].append(item)
+
+    normalized = normalize_forecast(_forecast(entries, tz))
+    assert [d["date"] for d in normalized] == sorted(by_day)[:7]
+    for day in normalized:
+        items = by_day[day["date"]]
+        temps = [i["main"]["temp"] for i in items]
+        counts = Counter(i["weather"][0]["description"] for i in items)
+        assert day["temp_min"] == round(min(i["main"]["temp_min"] for i in items), 1)
+        assert day["temp_max"] == round(max(i["main"]["temp_max"] for i in items), 1)
+        # summation order differs from the reference; allow for the last rounding step
+        assert day["temp_avg"] == pytest.approx(sum(temps) / len(temps), abs=0.051)
+        assert counts[day["description"]] == max(counts.values())
+        assert day["precip_mm"] == pytest.approx(sum(i.get("rain", {}).get("3h", 0) for i in items), abs=0.051)
+
+
+def test_batch_keeps_order_and_skips_empty_responses():
+    paris = _forecast([_entry(START + d * 86400, 15 + d) for d in range(9)])
+    lima = _forecast([_entry(START, 25)], tz=-5 * 3600)
+
+    results = normalize_forecasts([paris, {"cod": "404"}, lima, {"list": []}])
+
+    assert [len(r) for r in results] == [7, 0, 1, 0]
+    assert results[0][0]["temp_avg"] == 15.0
+    assert results[2][0]["date"] == "2025-05-31"
+    assert normalize_forecasts([]) == []
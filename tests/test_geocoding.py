@@ -0,0 +1,41 @@
+"""Test script for the geocode cache (no network needed)"""
+
+import time
+
+from tools.geocoding import GeocodeCache, normalize_city_key
+
+
+def test_normalize_city_key():
+    assert normalize_city_key("  New   York ") == "new york"
+    assert normalize_city_key("PARIS") == "paris"
+
+
+def test_positive_entries_persist(tmp_path):
+    path = str(tmp_path / "geo.sqlite3")
+    cache = GeocodeCache(path=path)
+    assert cache.get("Paris") is None
+
+    cache.set("Paris", 48.85, 2.35)
+    assert cache.get("paris ") == (48.85, 2.35)
+
+    # a fresh instance (new process) reads it back from disk
+    reopened = GeocodeCache(path=path)
+    assert reopened.get("PARIS") == (48.85, 2.35)
+
+
+def test_negative_entries_expire(tmp_path):
+    cache = GeocodeCache(path=str(tmp_path / "geo.sqlite3"), negative_ttl=0.05)
+    cache.set_missing("InvalidCity123")
+    assert cache.get("InvalidCity123") == (None, None)
+
+    time.sleep(0.1)
+    assert cache.get("InvalidCity123") is None
+
+
+def test_lru_is_bounded():
+    cache = GeocodeCache(path="", max_entries=2)
+    cache.set("a", 1.0, 1.0)
+    cache.set("b", 2.0, 2.0)
+    cache.set("c", 3.0, 3.0)
+    assert cache.get("a") is None
+    assert cache.get("c") == (3.0, 3.0)
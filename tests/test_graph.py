@@ -0,0 +1,83 @@
+"""Test script for the sync graph topology with stubbed LLM and tools (no network needed)"""
+
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from graph import build_graph, checkpointer
+from graph.nodes import city_summary_web
+from tools.thumbnails import ThumbnailStore
+
+
+def test_summary_and_tools_run_concurrently(graph_fakes, branch_delay):
+    app = build_graph.build_app(enable_checkpointer=False)
+
+    start = time.perf_counter()
+    result = app.invoke({"user_query": "Tell me about Lisbon"})
+    elapsed = time.perf_counter() - start
+
+    assert result["city_summary"] == "Lisbon summary."
+    assert result["image_urls"] == ["https://example.com/lisbon.jpg"]
+    # max(summary, tools), not the sum
+    assert elapsed < branch_delay * 1.8
+
+
+def test_errors_from_both_branches_are_merged(graph_fakes):
+    app = build_graph.build_app(enable_checkpointer=False)
+
+    result = app.invoke({"user_query": "Tell me about Lisbon"})
+
+    assert "Weather data unavailable for Lisbon" in result["errors"]
+    assert "Final: weather data unavailable; showing no forecast" in result["errors"]
+    assert len(result["errors"]) == len(set(result["errors"]))
+
+
+def test_repeat_city_skips_summary(monkeypatch, graph_fakes):
+    app = build_graph.build_app(enable_checkpointer=True)
+    config = {"configurable": {"thread_id": "t1"}}
+
+    app.invoke({"user_query": "Tell me about Lisbon"}, config)
+    monkeypatch.setattr(city_summary_web, "_summary_chain", lambda: RunnableLambda(lambda _: "should not run"))
+    result = app.invoke({"user_query": "Lisbon again"}, config)
+
+    assert result["skip_summary"] is True
+    assert result["city_summary"] == "Lisbon summary."
+
+
+def test_cached_summary_skips_summary_node_across_threads(monkeypatch, graph_fakes):
+    app = build_graph.build_app(enable_checkpointer=True)
+
+    app.invoke({"user_query": "Tell me about Lisbon"}, {"configurable": {"thread_id": "a"}})
+    monkeypatch.setattr(city_summary_web, "_summary_chain", lambda: RunnableLambda(lambda _: "should not run"))
+    result = app.invoke({"user_query": "Tell me about Lisbon"}, {"configurable": {"thread_id": "b"}})
+
+    assert result["route"] == "cached"
+    assert result["city_summary"] == "Lisbon summary."
+
+
+def test_shared_app_is_compiled_once_and_isolates_threads(monkeypatch, graph_fakes):
+    monkeypatch.setattr(build_graph, "_app", None)
+    monkeypatch.setattr(checkpointer, "_checkpointer", None)
+
+    app = build_graph.get_app()
+    assert build_graph.get_app() is app
+    assert app.checkpointer is checkpointer.get_checkpointer()
+
+    app.invoke({"user_query": "Tell me about Lisbon"}, {"configurable": {"thread_id": "session-1"}})
+    other = app.get_state({"configurable": {"thread_id": "session-2"}})
+    assert other.values == {}
+
+
+def test_warm_start_builds_the_shared_app(monkeypatch, graph_fakes):
+    monkeypatch.setattr(build_graph, "_app", None)
+    monkeypatch.setattr(checkpointer, "_checkpointer", None)
+    monkeypatch.setattr(build_graph.vector_store, "warm_up_in_background", lambda: None)
+    monkeypatch.setattr(build_graph, "get_thumbnail_store", lambda: ThumbnailStore(root=""))
+
+    def missing_key():
+        raise ValueError("Missing env var: TAVILY_API_KEY")
+
+    for name in ("get_weather_tool", "get_image_tool", "get_web_search_tool"):
+        monkeypatch.setattr(build_graph, name, missing_key)
+
+    assert build_graph.warm_start() is build_graph.get_app()
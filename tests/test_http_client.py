@@ -0,0 +1,58 @@
+"""Test script for the shared HTTP client (no network needed)"""
+
+from config import settings
+from tools import http_client
+
+
+def test_session_is_shared():
+    assert http_client.get_session() is http_client.get_session()
+
+
+def test_adapter_pools_and_retries():
+    adapter = http_client.get_session().get_adapter("https://api.openweathermap.org")
+    assert adapter._pool_maxsize == settings.HTTP_POOL_MAXSIZE
+    assert adapter.max_retries.total == settings.HTTP_MAX_RETRIES
+    assert 503 in adapter.max_retries.status_forcelist
+    # a 429 is left to the rate limiter; retrying it would spend calls outside the budget
+    assert not adapter.max_retries.is_retry("GET", 429, has_retry_after=True)
+
+
+def test_async_client_does_not_retry_a_429(monkeypatch):
+    import asyncio
+
+    import httpx
+
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(429, headers={"Retry-After": "30"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_client, "get_async_client", lambda: client)
+
+    response = asyncio.run(http_client._aget_with_retries("https://api.example.com/x", None, None, None))
+    assert response.status_code == 429
+    assert len(calls) == 1
+
+
+def test_default_timeout_splits_connect_and_read():
+    assert http_client.default_timeout() == (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT)
+
+
+def test_deadline_shortens_timeouts_and_expires():
+    with http_client.deadline(0.5):
+        connect, read = http_client.default_timeout()
+        assert connect <= 0.5 and read <= 0.5
+        # an inner, longer deadline never extends the outer one
+        with http_client.deadline(60):
+            assert http_client.remaining_time() <= 0.5
+    assert http_client.default_timeout() == (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT)
+
+    with http_client.deadline(-1):
+        try:
+            http_client.remaining_time()
+        except http_client.DeadlineExceeded:
+            pass
+        else:
+            raise AssertionError("expected DeadlineExceeded")
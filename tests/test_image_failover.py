@@ -0,0 +1,141 @@
+"""Test script for hedged image search and provider failover (no network needed)"""
+
+import asyncio
+import time
+
+import pytest
+
+from config import settings
+from tools import image_api, rate_limit
+from tools.failover import CircuitBreaker, CircuitOpen, LatencyWindow
+
+
+class FakeResponse:
+    def __init__(self, provider, status=200):
+        self.provider = provider
+        self.status_code = status
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"{self.status_code} from {self.provider}")
+
+    def json(self):
+        if self.provider == "unsplash":
+            return {"results": [{"width": 3, "height": 2, "urls": {"regular": "https://unsplash/1.jpg"}}]}
+        return {"photos": [{"src": {"landscape": "https://pexels/1.jpg"}}]}
+
+
+@pytest.fixture
+def tool(monkeypatch):
+    monkeypatch.setattr(settings, "UNSPLASH_API_KEY", "test")
+    monkeypatch.setattr(settings, "PEXELS_API_KEY", "test")
+    monkeypatch.setattr(settings, "IMAGE_HEDGE_DELAY", 0.05)
+    monkeypatch.setattr(settings, "IMAGE_BREAKER_FAILURES", 2)
+    monkeypatch.setattr(rate_limit, "_limiter", rate_limit.RateLimiter("", path=""))
+    return image_api.ImageTool()
+
+
+def _fake_providers(monkeypatch, delays=None, statuses=None):
+    calls = []
+
+    def get(url, params=None, headers=None, provider=None, priority=None):
+        calls.append(provider)
+        time.sleep((delays or {}).get(provider, 0))
+        return FakeResponse(provider, (statuses or {}).get(provider, 200))
+
+    async def aget(url, params=None, headers=None, provider=None, priority=None):
+        calls.append(provider)
+        await asyncio.sleep((delays or {}).get(provider, 0))
+        return FakeResponse(provider, (statuses or {}).get(provider, 200))
+
+    monkeypatch.setattr(image_api.http_client, "get", get)
+    monkeypatch.setattr(image_api.http_client, "aget", aget)
+    return calls
+
+
+def test_primary_answers_without_a_hedge(tool, monkeypatch):
+    calls = _fake_providers(monkeypatch)
+    assert tool.search_images("Paris") == ["https://unsplash/1.jpg"]
+    assert calls == ["unsplash"]
+
+
+def test_slow_primary_is_hedged(tool, monkeypatch):
+    calls = _fake_providers(monkeypatch, delays={"unsplash": 1.0})
+
+    start = time.monotonic()
+    assert tool.search_images("Paris") == ["https://pexels/1.jpg"]
+    assert time.monotonic() - start < 0.5
+    assert calls == ["unsplash", "pexels"]
+
+
+def test_failed_primary_fails_over_at_once(tool, monkeypatch):
+    calls = _fake_providers(monkeypatch, statuses={"unsplash": 503})
+    monkeypatch.setattr(settings, "IMAGE_HEDGE_DELAY", 5.0)
+
+    start = time.monotonic()
+    assert tool.search_images("Paris") == ["https://pexels/1.jpg"]
+    assert time.monotonic() - start < 1.0
+    assert calls == ["unsplash", "pexels"]
+
+
+def test_breaker_skips_a_failing_provider(tool, monkeypatch):
+    calls = _fake_providers(monkeypatch, statuses={"unsplash": 500})
+    tool.search_images("Paris")
+    tool.search_images("Rome")
+    assert tool.breakers["unsplash"].state == "open"
+
+    calls.clear()
+    assert tool.search_images("Lisbon") == ["https://pexels/1.jpg"]
+    assert calls == ["pexels"]
+
+    _fake_providers(monkeypatch, statuses={"unsplash": 500, "pexels": 500})
+    tool.search_images("Oslo")
+    tool.search_images("Oslo")
+    with pytest.raises(CircuitOpen):
+        tool.search_images("Oslo")
+
+
+def test_async_hedge_cancels_the_loser(tool, monkeypatch):
+    _fake_providers(monkeypatch, delays={"unsplash": 5.0})
+
+    async def run():
+        start = time.monotonic()
+        urls = await tool.asearch_images("Paris")
+        return urls, time.monotonic() - start
+
+    urls, elapsed = asyncio.run(run())
+    assert urls == ["https://pexels/1.jpg"]
+    assert elapsed < 1.0
+    # the cancelled request doesn't count against Unsplash
+    assert tool.breakers["unsplash"].state == "closed"
+
+
+def test_hedge_delay_follows_recent_latency(tool, monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_HEDGE_MIN_SAMPLES", 10)
+    assert tool.hedge_delay("unsplash") == 0.05
+    for ms in range(1, 101):
+        tool.latency["unsplash"].record(ms / 1000)
+    assert tool.hedge_delay("unsplash") == pytest.approx(0.095)
+
+
+def test_latency_percentile_and_half_open_breaker():
+    window = LatencyWindow(size=4)
+    assert window.percentile(95) is None
+    for seconds in (0.4, 0.1, 0.2, 0.3, 0.5):
+        window.record(seconds)
+    assert window.percentile(50) == 0.2
+    assert window.percentile(95) == 0.5
+
+    breaker = CircuitBreaker("p", failures=1, cooldown=0.05)
+    breaker.failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    # one trial call after the cooldown; a failed trial re-opens
+    assert breaker.allow() and not breaker.allow()
+    breaker.failure()
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed" and breaker.allow()
@@ -0,0 +1,207 @@
+"""Test script for incremental ingestion with a fake Chroma client and embedding model"""
+
+import numpy as np
+import pytest
+
+from ingestion import ingest_cities
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.rows = {}
+        self.upserted = 0
+
+    def get(self, ids=None, where=None, include=None):
+        keys = [k for k, row in self.rows.items() if where is None or row["metadata"]["city"] == where["city"]]
+        return {"ids": keys, "metadatas": [self.rows[k]["metadata"] for k in keys]}
+
+    def delete(self, ids=None, where=None):
+        for key in list(ids or self.get(where=where)["ids"]):
+            self.rows.pop(key, None)
+
+    def update(self, ids, metadatas):
+        for key, metadata in zip(ids, metadatas):
+            self.rows[key]["metadata"] = metadata
+
+    def upsert(self, ids, embeddings=None, documents=None, metadatas=None):
+        for i, key in enumerate(ids):
+            self.rows[key] = {"document": documents[i] if documents else None, "metadata": metadatas[i]}
+        self.upserted += len(ids)
+
+
+class _FakeClient:
+    def __init__(self):
+        self.collections = {}
+
+    def get_or_create_collection(self, name):
+        return self.collections.setdefault(name, _FakeCollection())
+
+
+class _FakeModel:
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        self.encoded += len(texts)
+        return np.zeros((len(texts), 3))
+
+
+def _setup(monkeypatch, tmp_path, guides):
+    sources = tmp_path / "sources"
+    sources.mkdir()
+    for name, text in guides.items():
+        (sources / name).write_text(text)
+
+    client = _FakeClient()
+    model = _FakeModel()
+    monkeypatch.setattr(ingest_cities.chromadb, "PersistentClient", lambda path=None: client)
+    monkeypatch.setattr(ingest_cities, "SentenceTransformer", lambda name: model)
+    monkeypatch.setattr(ingest_cities, "refresh_city_index", lambda collection: None)
+    # the "pdf" is plain text, one chunk per paragraph
+    monkeypatch.setattr(
+        ingest_cities, "process_city_pdf",
+        lambda city, path: (city, open(path).read().split("\n\n")),
+    )
+
+    def run(batch_size=None):
+        model.encoded = 0
+        ingest_cities.ingest_pipeline(
+            data_dir=str(sources), persist_dir="unused",
+            manifest_path=str(tmp_path / "manifest.json"), workers=1, batch_size=batch_size,
+        )
+        return client.collections["cities"], model
+
+    return sources, run
+
+
+def test_discovery_keys_cities_by_file_name(tmp_path):
+    (tmp_path / "New York.pdf").write_bytes(b"")
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "rio-de-janeiro.PDF").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("")
+
+    assert list(ingest_cities.discover_city_pdfs(str(tmp_path))) == ["new_york", "rio_de_janeiro"]
+
+
+def test_chunk_ids_are_content_addressed():
+    first = ingest_cities.chunk_ids("paris", ["a", "b", "a"])
+    assert first == ingest_cities.chunk_ids("paris", ["a", "b", "a"])
+    assert len(set(first)) == 3
+    assert ingest_cities.chunk_ids("paris", ["b"])[0] == first[1]
+
+
+def test_rerun_without_changes_embeds_nothing(monkeypatch, tmp_path):
+    _, run = _setup(monkeypatch, tmp_path, {"paris.pdf": "one\n\ntwo", "tokyo.pdf": "three"})
+
+    collection, model = run()
+    assert model.encoded == 3 + 2  # chunks + per-city query embeddings
+    assert len(collection.rows) == 3
+
+    collection.upserted = 0
+    collection, model = run()
+    assert model.encoded == 0
+    assert collection.upserted == 0
+
+
+def test_changed_file_only_embeds_new_chunks(monkeypatch, tmp_path):
+    sources, run = _setup(monkeypatch, tmp_path, {"paris.pdf": "one\n\ntwo", "tokyo.pdf": "three"})
+    run()
+
+    (sources / "paris.pdf").write_text("zero\n\none\n\ntwo")
+    collection, model = run()
+
+    assert model.encoded == 1 + 1  # "zero" + paris query embedding
+    paris = sorted(row["document"] for row in collection.rows.values() if row["metadata"]["city"] == "paris")
+    assert paris == ["one", "two", "zero"]
+    # "one" moved from index 0 to 1 without being re-embedded
+    indexes = {row["document"]: row["metadata"]["chunk_index"] for row in collection.rows.values()}
+    assert indexes["one"] == 1
+
+
+def test_edited_and_removed_sources_drop_stale_chunks(monkeypatch, tmp_path):
+    sources, run = _setup(monkeypatch, tmp_path, {"paris.pdf": "one\n\ntwo", "tokyo.pdf": "three"})
+    run()
+
+    (sources / "paris.pdf").write_text("one")
+    (sources / "tokyo.pdf").unlink()
+    collection, _ = run()
+
+    assert [row["document"] for row in collection.rows.values()] == ["one"]
+
+
+def test_failed_upsert_keeps_unwritten_cities_out_of_the_manifest(monkeypatch, tmp_path):
+    _, run = _setup(monkeypatch, tmp_path, {"paris.pdf": "one\n\ntwo\n\nthree", "tokyo.pdf": "four\n\nfive"})
+    collection = ingest_cities.chromadb.PersistentClient().get_or_create_collection("cities")
+    upsert = collection.upsert
+    calls = []
+
+    def flaky_upsert(**kwargs):
+        calls.append(kwargs["ids"])
+        if len(calls) == 2:
+            raise RuntimeError("disk full")
+        upsert(**kwargs)
+
+    monkeypatch.setattr(collection, "upsert", flaky_upsert)
+    # batches of two: paris one/two are written, then paris three + tokyo four fail
+    with pytest.raises(ingest_cities.UpsertError, match="disk full"):
+        run(batch_size=2)
+    assert ingest_cities.load_manifest(str(tmp_path / "manifest.json")) == {}
+
+    monkeypatch.setattr(collection, "upsert", upsert)
+    collection, _ = run(batch_size=2)
+    assert sorted(row["document"] for row in collection.rows.values()) == ["five", "four", "one", "three", "two"]
+    assert set(ingest_cities.load_manifest(str(tmp_path / "manifest.json"))) == {"paris", "tokyo"}
+
+
+def _char_splitter():
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(chunk_size=40, chunk_overlap=10)
+
+
+def test_pdf_pages_are_extracted_lazily():
+    pages = ingest_cities.iter_pdf_pages("data/sources/paris.pdf")
+    first = next(pages)
+    assert isinstance(first, str)
+    assert len(list(pages)) > 0
+
+
+def test_streamed_chunks_carry_across_page_boundaries():
+    pages = ["The Seine runs through the middle of", "Paris and divides it into the Left and Right Banks."]
+    chunks = list(ingest_cities.iter_text_chunks(iter(pages), _char_splitter()))
+
+    # same chunks (and overlap) as splitting the whole document at once
+    assert chunks == _char_splitter().split_text("\n".join(pages))
+    assert chunks[-1].endswith("Right Banks.")
+
+
+def test_streaming_pipeline_embeds_in_fixed_batches(monkeypatch, tmp_path):
+    sources = tmp_path / "sources"
+    sources.mkdir()
+    for name in ("paris.pdf", "tokyo.pdf"):
+        (sources / name).write_bytes(b"")
+
+    client = _FakeClient()
+    batches = []
+
+    class _RecordingModel(_FakeModel):
+        def encode(self, texts, **kwargs):
+            batches.append(len(texts))
+            return super().encode(texts, **kwargs)
+
+    monkeypatch.setattr(ingest_cities.chromadb, "PersistentClient", lambda path=None: client)
+    monkeypatch.setattr(ingest_cities, "SentenceTransformer", lambda name: _RecordingModel())
+    monkeypatch.setattr(ingest_cities, "refresh_city_index", lambda collection: None)
+    monkeypatch.setattr(ingest_cities, "_get_splitter", _char_splitter)
+    monkeypatch.setattr(
+        ingest_cities, "iter_pdf_pages",
+        lambda path: (f"{path} page {i} has a few words on it." for i in range(10)),
+    )
+
+    ingest_cities.ingest_pipeline(
+        data_dir=str(sources), persist_dir="unused",
+        manifest_path=str(tmp_path / "manifest.json"), streaming=True, batch_size=4,
+    )
+
+    chunk_batches = batches[:-1]  # last encode is the per-city query embeddings
+    assert max(chunk_batches) <= 4
+    assert sum(chunk_batches) == len(client.collections["cities"].rows)
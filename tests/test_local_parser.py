@@ -0,0 +1,73 @@
+"""Test script for the local (non-LLM) query parser"""
+
+from config import settings
+from graph.local_parser import LocalParser, extract_date_reference
+
+parser = LocalParser()
+
+
+def test_exact_city_and_date():
+    extraction = parser.parse("What's the weather in Paris next week?")
+    assert extraction.city_name == "Paris"
+    assert extraction.confidence >= 0.9
+    assert extraction.date_reference == "next week"
+
+
+def test_aliases_and_prompt_examples():
+    assert parser.parse("What's the weather like in NYC next week?").city_name == "New York"
+    assert parser.parse("Tell me about Paras").city_name == "Paris"
+    assert parser.parse("Japan's capital").city_name == "Tokyo"
+    assert parser.parse("trip to the big apple").city_name == "New York"
+
+
+def test_multi_word_city_wins_over_parts():
+    assert parser.parse("Things to do in Rio de Janeiro").city_name == "Rio de Janeiro"
+    assert parser.parse("hotels in new york city").original_city_mention == "new york city"
+
+
+def test_fuzzy_typo_is_only_a_hint():
+    extraction = parser.parse("weather in Barcelonna")
+    assert extraction.city_name == "Barcelona"
+    assert 0.5 <= extraction.confidence < settings.LOCAL_PARSE_THRESHOLD
+
+
+def test_ordinary_words_near_city_names_go_to_the_llm():
+    # one edit away from Seoul, Rome and Porto
+    for query in ("Food for the soul", "Romeo and Juliet", "Best port towns in Portugal"):
+        assert parser.parse(query).confidence < settings.LOCAL_PARSE_THRESHOLD, query
+
+
+def test_unknown_or_ambiguous_defers_to_llm():
+    assert parser.parse("Tell me about Snohomish").confidence == 0.0
+    assert parser.parse("Paris or Rome in spring?").confidence < 0.5
+
+
+def test_date_phrases():
+    assert extract_date_reference("Lisbon tomorrow") == "tomorrow"
+    assert extract_date_reference("Rome from March 3 to March 7") == "March 3 to March 7"
+    assert extract_date_reference("Tokyo in a few days") == "in a few days"
+    assert extract_date_reference("Berlin on 2025-06-01") == "2025-06-01"
+    assert extract_date_reference("Tell me about Oslo") is None
+
+
+def test_itinerary_lists_every_city():
+    extraction = parser.parse("Paris, Tokyo and Lisbon next month")
+    assert extraction.cities == ["Paris", "Tokyo", "Lisbon"]
+    assert extraction.city_name == "Paris"
+    assert extraction.confidence >= 0.8
+    assert extraction.date_reference == "next month"
+    # a choice between cities is not an itinerary
+    assert parser.parse("Paris or Rome in spring?").cities == []
+
+
+def test_only_plain_city_lists_are_itineraries():
+    assert parser.parse("Paris, Tokyo & Rome").cities == ["Paris", "Tokyo", "Rome"]
+    assert parser.parse("Paris, and Rome next week").cities == ["Paris", "Rome"]
+    for query in (
+        "I live in London, what is the weather in Paris?",
+        "Flights from New York to Tokyo",
+        "Is Paris better than Rome",
+    ):
+        extraction = parser.parse(query)
+        assert extraction.cities == [], query
+        assert extraction.confidence < settings.LOCAL_PARSE_THRESHOLD, query
@@ -0,0 +1,164 @@
+"""Test script for the popularity tracker and cache pre-warmer (no network needed)"""
+
+import pytest
+
+from config import settings
+from graph import prewarm, response_cache
+from graph.prewarm import CacheWarmer, PopularityTracker
+from tools import rate_limit
+from tools.rate_limit import LOW, QuotaExceeded, RateLimiter
+from tools.thumbnails import ThumbnailStore
+
+DAY = 24 * 3600
+
+
+@pytest.mark.parametrize("path", ["", ":memory:"])
+def test_popularity_decays_and_ranks(path):
+    tracker = PopularityTracker(path=path, half_life=DAY)
+    for _ in range(4):
+        tracker.record(["Lisbon"], now=0)
+    tracker.record(["Paris", "paris "], now=0)
+    tracker.record(["Paris"], now=DAY)
+
+    # Lisbon: 4 halved once; Paris: 1 halved once, plus 1
+    assert tracker.top(10, min_score=0, now=DAY) == [("Lisbon", 2.0), ("Paris", 1.5)]
+    assert tracker.top(1, min_score=0, now=DAY) == [("Lisbon", 2.0)]
+    assert tracker.top(10, min_score=1.8, now=DAY) == [("Lisbon", 2.0)]
+    # long forgotten cities are dropped
+    assert tracker.top(10, min_score=0, now=30 * DAY) == []
+
+
+def test_popularity_is_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "popularity.sqlite3")
+    first, second = PopularityTracker(path=path), PopularityTracker(path=path)
+    first.record(["Rome", "Rome"], now=100)
+    second.record(["Rome"], now=100)
+    second.record(["Oslo"], now=100)
+
+    # counts are buffered off the request path until the next flush
+    assert PopularityTracker(path=path).top(5, min_score=0, now=100) == []
+    first.flush()
+    second.flush()
+    assert PopularityTracker(path=path).top(5, min_score=0, now=100) == [("Rome", 2.0), ("Oslo", 1.0)]
+
+
+def test_queries_are_only_counted_while_prewarming(monkeypatch):
+    from graph.nodes import parse_query
+    from graph.schemas.extraction import CityExtraction
+    from graph.state import TravelState
+
+    tracker = PopularityTracker(path="")
+    monkeypatch.setattr(parse_query, "get_popularity_tracker", lambda: tracker)
+    extraction = CityExtraction(city_name="Lisbon", confidence=0.9)
+
+    monkeypatch.setattr(settings, "POPULARITY_TRACKING", False)
+    parse_query._apply_extraction(TravelState(user_query="Lisbon"), extraction)
+    assert tracker.top(5, min_score=0) == []
+
+    monkeypatch.setattr(settings, "POPULARITY_TRACKING", True)
+    parse_query._apply_extraction(TravelState(user_query="Lisbon"), extraction)
+    assert [city for city, _ in tracker.top(5, min_score=0)] == ["Lisbon"]
+
+
+class _Images:
+    providers = ["unsplash", "pexels"]
+
+    def __init__(self, quota=False):
+        self.quota = quota
+        self.searches = []
+
+    def search_images(self, city, limit=10):
+        self.searches.append(city)
+        if self.quota:
+            raise QuotaExceeded("unsplash", 60)
+        return [f"https://example.com/{city}.jpg"]
+
+
+class _Weather:
+    def get_forecast(self, city):
+        return [{"date": "2025-06-01", "temp_avg": 20.0}] if city != "Atlantis" else []
+
+
+def _warmer(monkeypatch, images, kinds=("weather", "images")):
+    monkeypatch.setattr(prewarm, "get_image_tool", lambda: images)
+    monkeypatch.setattr(prewarm, "get_weather_tool", lambda: _Weather())
+    monkeypatch.setattr(prewarm, "get_thumbnail_store", lambda: ThumbnailStore(root=""))
+    tracker = PopularityTracker(path="")
+    for city in ("Lisbon", "Lisbon", "Lisbon", "Lisbon", "Atlantis", "Atlantis", "Atlantis", "Porto"):
+        tracker.record([city])
+    cache = response_cache.ResponseCache()
+    return CacheWarmer(tracker=tracker, cache=cache, top_n=5, margin=60, kinds=kinds), cache
+
+
+def test_warmer_refreshes_popular_cities_before_expiry(monkeypatch):
+    images = _Images()
+    warmer, cache = _warmer(monkeypatch, images)
+    cache.put_images("Atlantis", ["https://example.com/cached.jpg"])
+
+    # Porto was asked about once, below PREWARM_MIN_SCORE
+    assert warmer.plan() == [("Lisbon", ["weather", "images"]), ("Atlantis", ["weather"])]
+    report = warmer.run_once()
+
+    assert report["refreshed"] == {"weather": ["Lisbon"], "images": ["Lisbon"]}
+    assert report["failed"] == ["weather for Atlantis: no forecast"]
+    assert cache.get_weather("lisbon", "") == [{"date": "2025-06-01", "temp_avg": 20.0}]
+    assert cache.get_images("Lisbon") == ["https://example.com/Lisbon.jpg"]
+    assert images.searches == ["Lisbon"]
+    # nothing left to do until the entries get close to expiring
+    assert warmer.plan() == [("Atlantis", ["weather"])]
+
+
+def test_warmer_stops_asking_a_provider_that_ran_out(monkeypatch):
+    images = _Images(quota=True)
+    warmer, cache = _warmer(monkeypatch, images)
+
+    report = warmer.run_once()
+
+    # both image providers are out, so Atlantis isn't searched; the forecasts still are
+    assert images.searches == ["Lisbon"]
+    assert report["refreshed"] == {"weather": ["Lisbon"], "images": []}
+    assert report["out_of_quota"] == ["unsplash rate limit reached; next call allowed in 60s"]
+
+
+def test_web_search_quota_reaches_the_prewarmer_only(monkeypatch):
+    from tools.web_search import WebSearchTool
+
+    limiter = RateLimiter("tavily=1/3600", path="", max_wait=0)
+    limiter.block("tavily", until=10 ** 10)
+    monkeypatch.setattr(rate_limit, "get_limiter", lambda: limiter)
+    tool = WebSearchTool.__new__(WebSearchTool)
+
+    assert tool.search("Lisbon") == []
+    with rate_limit.background(), pytest.raises(QuotaExceeded):
+        tool.search("Lisbon")
+
+
+def test_cli_only_lists_popular_cities(monkeypatch, tmp_path, capsys):
+    path = str(tmp_path / "popularity.sqlite3")
+    server = PopularityTracker(path=path)
+    for cities in (["Lisbon"], ["Lisbon"], ["Lisbon", "Porto"], ["Lisbon", "Porto"], ["Porto"]):
+        server.record(cities)
+    server.flush()
+    monkeypatch.setattr(settings, "POPULARITY_PATH", path)
+
+    prewarm.main(["--list", "--top", "1"])
+    out = capsys.readouterr().out
+    assert '"Lisbon"' in out and "Porto" not in out
+    # refreshing from a separate process would only fill a cache nobody reads
+    with pytest.raises(SystemExit):
+        prewarm.main([])
+
+
+def test_background_calls_leave_the_reserve_to_users(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKGROUND_RESERVE", 0.5)
+    limiter = RateLimiter("p=4/3600", path="", max_wait=5)
+
+    with rate_limit.background():
+        limiter.acquire("p", LOW)
+        limiter.acquire("p", LOW)
+        with pytest.raises(QuotaExceeded):
+            limiter.acquire("p", LOW)
+    # interactive callers still get the last two
+    limiter.acquire("p", LOW)
+    limiter.acquire("p", LOW)
+    assert limiter.report()["p"]["remaining"] == 0
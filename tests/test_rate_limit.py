@@ -0,0 +1,121 @@
+"""Test script for the client-side rate limiter (no network needed)"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from config import settings
+from tools import image_api, rate_limit
+from tools.rate_limit import HIGH, LOW, NORMAL, QuotaExceeded, RateLimiter
+
+
+def _response(status=200, **headers):
+    return SimpleNamespace(status_code=status, headers=headers)
+
+
+def test_parse_limits_skips_bad_entries():
+    budgets = rate_limit.parse_limits("unsplash=50/3600, tavily=100/60, broken, zero=0/10")
+    assert budgets == {"unsplash": rate_limit.Budget(50, 3600.0), "tavily": rate_limit.Budget(100, 60.0)}
+
+
+def test_burst_then_low_priority_gives_up_at_once():
+    limiter = RateLimiter("p=2/3600", path="", max_wait=5)
+    limiter.acquire("p", LOW)
+    limiter.acquire("p", LOW)
+
+    start = time.monotonic()
+    with pytest.raises(QuotaExceeded) as exc:
+        limiter.acquire("p", LOW)
+    assert time.monotonic() - start < 0.1
+    assert exc.value.retry_after == pytest.approx(1800, rel=0.01)
+    # providers without a budget are not limited
+    limiter.acquire("other", LOW)
+
+
+def test_high_priority_waits_for_the_next_token():
+    limiter = RateLimiter("p=1/0.2", path="", max_wait=2)
+    limiter.acquire("p", HIGH)
+
+    start = time.monotonic()
+    limiter.acquire("p", HIGH)
+    assert 0.1 < time.monotonic() - start < 1.0
+    # the wait is bounded by the caller's own deadline too
+    limiter.acquire("p", HIGH)
+    with pytest.raises(QuotaExceeded):
+        limiter.acquire("p", HIGH, max_wait=0.05)
+
+
+def test_queued_weather_call_is_served_before_images():
+    limiter = RateLimiter("p=1/0.5", path="", max_wait=2)
+    limiter.acquire("p", HIGH)
+
+    waiter = threading.Thread(target=limiter.acquire, args=("p", HIGH))
+    waiter.start()
+    while not limiter.report()["p"]["queued"]:
+        time.sleep(0.005)
+    with pytest.raises(QuotaExceeded):
+        limiter.acquire("p", NORMAL, max_wait=0.1)
+    waiter.join()
+    assert limiter.report()["p"]["queued"] == 0
+
+
+def test_async_acquire_waits_without_blocking_the_loop():
+    limiter = RateLimiter("p=1/0.2", path="", max_wait=2)
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        await limiter.aacquire("p", HIGH)
+        await limiter.aacquire("p", HIGH)
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(run()) > 5
+
+
+def test_budget_is_shared_through_the_sqlite_store(tmp_path):
+    path = str(tmp_path / "rate_limits.sqlite3")
+    first = RateLimiter("p=3/3600", path=path)
+    second = RateLimiter("p=3/3600", path=path)
+
+    first.acquire("p")
+    second.acquire("p")
+    assert first.report()["p"]["remaining"] == 1
+    first.acquire("p")
+    with pytest.raises(QuotaExceeded):
+        second.acquire("p", LOW)
+
+
+def test_provider_feedback_updates_the_bucket():
+    limiter = RateLimiter("p=50/3600", path="")
+
+    limiter.observe("p", _response(**{"X-Ratelimit-Remaining": "3"}))
+    assert limiter.report()["p"]["remaining"] == 3
+
+    with pytest.raises(QuotaExceeded) as exc:
+        limiter.observe("p", _response(429, **{"Retry-After": "30"}))
+    assert exc.value.retry_after == pytest.approx(30, abs=1)
+    report = limiter.report()["p"]
+    assert report["remaining"] == 0
+    assert 28 < report["next_call_in_s"] <= 30
+    with pytest.raises(QuotaExceeded):
+        limiter.acquire("p", HIGH, max_wait=0.1)
+
+
+def test_image_tool_reports_an_exhausted_quota(monkeypatch):
+    monkeypatch.setattr(settings, "UNSPLASH_API_KEY", "test")
+    monkeypatch.setattr(rate_limit, "_limiter", RateLimiter("unsplash=1/3600", path=""))
+    rate_limit.get_limiter().acquire("unsplash")
+
+    with pytest.raises(QuotaExceeded, match="unsplash rate limit reached"):
+        image_api.ImageTool().search_images("Paris")
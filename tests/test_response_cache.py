@@ -0,0 +1,70 @@
+"""Test script for the response and parse caches (no network or model needed)"""
+
+import time
+
+import numpy as np
+
+from graph.response_cache import ParseCache, ResponseCache, normalize_query
+from graph.schemas.extraction import CityExtraction
+
+VOCAB = ["weather", "paris", "rome", "next", "week", "tomorrow", "in", "the", "what", "is"]
+
+
+def _bag_of_words(text):
+    words = text.split()
+    return np.array([words.count(w) for w in VOCAB] + [1.0], dtype=np.float32)
+
+
+def _parse_cache(**kwargs):
+    return ParseCache(encode=_bag_of_words, threshold=0.9, **kwargs)
+
+
+def test_normalize_query():
+    assert normalize_query("Paris weather next week?") == "paris weather next week"
+
+
+def test_near_duplicate_phrasing_hits():
+    cache = _parse_cache()
+    extraction = CityExtraction(city_name="Paris", confidence=0.9, date_reference="next week")
+    cache.put("weather in Paris next week", extraction)
+
+    assert cache.get("Weather in Paris next week!") is extraction
+    assert cache.get("paris weather next week?") is extraction
+    assert cache.stats()["similar_hits"] == 1
+
+
+def test_different_city_or_date_misses():
+    cache = _parse_cache()
+    cache.put("weather in Paris next week", CityExtraction(city_name="Paris", confidence=0.9, date_reference="next week"))
+    cache.put("weather in Paris", CityExtraction(city_name="Paris", confidence=0.9))
+
+    assert cache.get("weather in Rome next week") is None
+    assert cache.get("weather in Paris tomorrow") is None
+
+
+def test_parse_cache_is_bounded():
+    cache = _parse_cache(max_entries=2)
+    for city in ["paris", "rome", "tokyo"]:
+        cache.put(f"weather in {city}", CityExtraction(city_name=city, confidence=0.9))
+    assert cache.stats()["similar_size"] == 2
+
+
+def test_summary_and_weather_have_separate_ttls():
+    cache = ResponseCache(summary_ttl=60, weather_ttl=0.05, parse_cache=_parse_cache())
+    cache.put_summary("Paris", "Paris summary")
+    cache.put_weather("Paris", "next week", [{"date": "2025-01-01"}])
+
+    assert cache.get_summary(" paris ") == "Paris summary"
+    assert cache.get_weather("PARIS", "Next week") == [{"date": "2025-01-01"}]
+    assert cache.get_weather("Paris", "tomorrow") is None
+
+    time.sleep(0.1)
+    assert cache.get_weather("Paris", "next week") is None
+    assert cache.get_summary("Paris") == "Paris summary"
+    assert cache.stats()["weather"]["hits"] == 1
+
+
+def test_low_confidence_parses_are_not_cached():
+    cache = ResponseCache(parse_cache=_parse_cache())
+    cache.put_extraction("hmm", CityExtraction(city_name="", confidence=0.1))
+    assert cache.get_extraction("hmm") is None
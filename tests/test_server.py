@@ -0,0 +1,130 @@
+"""Test script for the headless API server with stubbed LLM and tools (no network needed)"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from graph import build_graph
+from graph.checkpointer import make_checkpointer
+from graph.nodes import tool_executor
+
+
+@pytest.fixture
+def client(monkeypatch, async_graph_fakes):
+    monkeypatch.setattr(build_graph, "_async_app", build_graph.build_async_app(checkpointer=make_checkpointer("sqlite")))
+    monkeypatch.setattr(build_graph, "warm_start", lambda async_app=False: None)
+    monkeypatch.setattr(server, "admission", server.AdmissionControl(concurrency=2, queue_size=2))
+    with TestClient(server.app) as client:
+        yield client
+
+
+def _sse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_query_returns_travel_output(client):
+    response = client.post("/query", json={"query": "Lisbon next week"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["city_summary"] == "Lisbon summary."
+    assert body["image_urls"] == ["https://example.com/lisbon.jpg"]
+    assert body["cities"][0]["city"] == "Lisbon"
+    assert response.headers["X-Thread-Id"]
+
+
+def test_stream_ends_with_result(client):
+    response = client.post("/query/stream", json={"query": "Lisbon next week", "thread_id": "s1"})
+
+    assert response.status_code == 200
+    events = _sse_events(response.text)
+    nodes = [payload["node"] for kind, payload in events if kind == "update"]
+    assert nodes[0] == "parse" and "tools" in nodes
+    kind, result = events[-1]
+    assert kind == "result"
+    assert result["city_summary"] == "Lisbon summary."
+
+
+def test_stream_releases_its_slot_when_the_client_leaves_before_it_starts(client, monkeypatch):
+    from starlette.requests import ClientDisconnect
+
+    monkeypatch.setattr(server, "admission", server.AdmissionControl(concurrency=1, queue_size=0))
+
+    async def disconnect_at_once():
+        response = await server.query_stream(server.QueryRequest(query="Lisbon next week"))
+        assert server.admission.running == 1
+
+        async def send(message):
+            raise OSError("client went away")
+
+        scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        with pytest.raises(ClientDisconnect):
+            await response(scope, None, send)
+        # checked while the loop still runs; shutting it down would finalize a leaked slot anyway
+        assert server.admission.running == 0
+
+    asyncio.run(disconnect_at_once())
+    assert client.post("/query", json={"query": "Lisbon next week"}).status_code == 200
+
+
+def test_stream_failure_ends_with_an_error_event(client, monkeypatch):
+    from langchain_core.runnables import RunnableLambda
+
+    from graph.nodes import parse_query
+
+    def broken_extractor(_prompt):
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(parse_query, "_build_extractor", lambda: RunnableLambda(broken_extractor))
+
+    # no city the local parser knows, so the LLM extractor runs
+    response = client.post("/query/stream", json={"query": "somewhere sunny and quiet"})
+
+    assert response.status_code == 200
+    kind, payload = _sse_events(response.text)[-1]
+    assert kind == "error"
+    assert payload["detail"] == "Request failed (RuntimeError)"
+    assert server.admission.running == 0
+
+
+def test_saturated_server_answers_429(client, monkeypatch):
+    busy = server.AdmissionControl(concurrency=1, queue_size=0)
+    busy.running = 1
+    monkeypatch.setattr(server, "admission", busy)
+
+    response = client.post("/query", json={"query": "Lisbon"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_deadline_turns_into_504(client, monkeypatch):
+    async def slow_weather(city):
+        await asyncio.sleep(2)
+        return []
+
+    registry = dict(tool_executor.ASYNC_TOOL_REGISTRY, fetch_weather=slow_weather)
+    monkeypatch.setattr(tool_executor, "ASYNC_TOOL_REGISTRY", registry)
+
+    response = client.post("/query", json={"query": "Lisbon", "timeout_s": 0.2})
+
+    assert response.status_code == 504
+
+
+def test_health_and_readiness(client, monkeypatch):
+    assert client.get("/healthz").json() == {"status": "ok"}
+
+    monkeypatch.setattr(server.vector_store, "is_ready", lambda: False)
+    assert client.get("/readyz").status_code == 503
+
+    monkeypatch.setattr(server.vector_store, "is_ready", lambda: True)
+    assert client.get("/readyz").json()["status"] == "ready"
+
+    assert "travel_node_duration_seconds" in client.get("/metrics").text
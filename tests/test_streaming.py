@@ -0,0 +1,81 @@
+"""Test script for streamed summary tokens and node updates (no network needed)"""
+
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+
+from graph import build_graph
+from graph.nodes import city_summary_web, parse_query
+from graph.schemas.extraction import CityExtraction
+from graph.streaming import aiter_travel_events, iter_travel_events
+
+SUMMARY = "Lisbon is a hilly coastal capital."
+
+
+def _streaming_chain():
+    # the fake model streams its message one whitespace-separated chunk at a time
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content=SUMMARY)]))
+    return PromptTemplate.from_template("{city}: {context}") | llm | StrOutputParser()
+
+
+@pytest.fixture
+def streaming_fakes(monkeypatch, graph_fakes, async_graph_fakes):
+    extraction = CityExtraction(city_name="Lisbon", confidence=0.9)
+    monkeypatch.setattr(parse_query, "_cheap_extraction", lambda _query: extraction)
+    monkeypatch.setattr(city_summary_web, "_summary_chain", _streaming_chain)
+
+
+def test_summary_tokens_stream_before_final(monkeypatch, streaming_fakes):
+    # force the web branch regardless of what the local vector store holds
+    monkeypatch.setattr(build_graph, "router_node", lambda state: {"route": "web"})
+    app = build_graph.build_app(enable_checkpointer=False)
+
+    events = list(iter_travel_events(app, {"user_query": "Tell me about Lisbon"}))
+
+    tokens = [e for e in events if e["type"] == "token"]
+    assert len(tokens) > 1
+    assert all(e["node"] == "web_summary" for e in tokens)
+    assert "".join(e["text"] for e in tokens) == SUMMARY
+
+    updates = {e["node"]: e["update"] for e in events if e["type"] == "update"}
+    assert updates["web_summary"]["city_summary"] == SUMMARY
+    assert updates["tools"]["image_urls"] == ["https://example.com/lisbon.jpg"]
+    assert "final" in updates
+
+    # every token arrives before the final node's update
+    last_token = max(i for i, e in enumerate(events) if e["type"] == "token")
+    final_index = next(i for i, e in enumerate(events) if e["type"] == "update" and e["node"] == "final")
+    assert last_token < final_index
+
+
+def test_async_stream_yields_tokens(monkeypatch, streaming_fakes):
+    monkeypatch.setattr(build_graph, "router_node", lambda state: {"route": "web"})
+    app = build_graph.build_async_app(enable_checkpointer=False)
+
+    async def collect():
+        return [e async for e in aiter_travel_events(app, {"user_query": "Tell me about Lisbon"})]
+
+    events = asyncio.run(collect())
+
+    tokens = [e["text"] for e in events if e["type"] == "token"]
+    assert "".join(tokens) == SUMMARY
+
+
+def test_batch_workers_stream_tokens_per_city(monkeypatch, streaming_fakes):
+    from graph.nodes import city_batch
+
+    extraction = CityExtraction(city_name="Lisbon", confidence=0.9, cities=["Lisbon", "Porto"])
+    monkeypatch.setattr(parse_query, "_cheap_extraction", lambda _query: extraction)
+    monkeypatch.setattr(city_batch, "router_node", lambda state: {"route": "web"})
+    app = build_graph.build_app(enable_checkpointer=False)
+
+    events = list(iter_travel_events(app, {"user_query": "Lisbon then Porto"}))
+
+    tokens = [e for e in events if e["type"] == "token"]
+    assert {e["node"] for e in tokens} == {"city"}
+    for city in ("Lisbon", "Porto"):
+        assert "".join(e["text"] for e in tokens if e["city"] == city) == SUMMARY
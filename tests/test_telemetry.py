@@ -0,0 +1,82 @@
+"""Test script for node instrumentation and the metrics registry (no network needed)"""
+
+import asyncio
+
+from graph import build_graph
+from graph.instrumentation import instrument_node, merge_timings
+from graph.state import TravelState
+from tools import telemetry
+from tools.cache import TTLCache
+
+
+def test_registry_renders_prometheus_text():
+    registry = telemetry.Registry()
+    calls = registry.counter("demo_calls_total", "Demo calls.", ["provider"])
+    latency = registry.histogram("demo_seconds", "Demo latency.", ["provider"], buckets=(0.1, 1.0))
+    calls.inc(provider="owm")
+    calls.inc(2, provider="owm")
+    latency.observe(0.5, provider="owm")
+
+    text = registry.render()
+
+    assert "# TYPE demo_calls_total counter" in text
+    assert 'demo_calls_total{provider="owm"} 3' in text
+    assert 'demo_seconds_bucket{provider="owm",le="0.1"} 0' in text
+    assert 'demo_seconds_bucket{provider="owm",le="1.0"} 1' in text
+    assert 'demo_seconds_bucket{provider="owm",le="+Inf"} 1' in text
+    assert 'demo_seconds_count{provider="owm"} 1' in text
+
+
+def test_node_wrapper_records_http_and_cache_activity():
+    cache = TTLCache(max_entries=4, ttl=60, name="demo")
+
+    def node(state):
+        with telemetry.http_call("demo", "GET", "http://example.com") as call:
+            call.done(200, 128)
+        cache.get_or_load("k", lambda: "v")
+        cache.get_or_load("k", lambda: "v")
+        return {"city": "Lisbon"}
+
+    update = instrument_node("demo", node, starts_request=True)(TravelState(user_query="q"))
+
+    assert update["city"] == "Lisbon"
+    entry = update["timings"][0]
+    assert update["request_id"] == entry["request_id"]
+    assert entry["node"] == "demo"
+    assert entry["http_calls"] == 1 and entry["http_bytes"] == 128
+    assert entry["cache_hits"] == 1 and entry["cache_misses"] == 1
+    assert telemetry.HTTP_SECONDS.count(provider="demo", status="200") >= 1
+
+
+def test_async_node_wrapper_keeps_request_id():
+    async def node(state):
+        return {}
+
+    state = TravelState(user_query="q", request_id="abc")
+    update = asyncio.run(instrument_node("later", node)(state))
+
+    assert update["timings"][0]["request_id"] == "abc"
+    assert "request_id" not in update
+
+
+def test_merge_timings_starts_over_for_a_new_request():
+    first = [{"request_id": "a", "node": "parse"}]
+    same = merge_timings(first, [{"request_id": "a", "node": "router"}])
+    assert [t["node"] for t in same] == ["parse", "router"]
+
+    assert merge_timings(same, [{"request_id": "b", "node": "parse"}]) == [{"request_id": "b", "node": "parse"}]
+
+
+def test_timings_cover_every_node_and_reset_per_request(graph_fakes):
+    app = build_graph.build_app(enable_checkpointer=True)
+    config = {"configurable": {"thread_id": "timings"}}
+
+    first = app.invoke({"user_query": "Tell me about Lisbon"}, config=config)
+    nodes = {t["node"] for t in first["timings"]}
+    assert {"parse", "router", "tools", "final"} <= nodes
+    assert {t["request_id"] for t in first["timings"]} == {first["request_id"]}
+
+    second = app.invoke({"user_query": "Weather in Lisbon"}, config=config)
+    assert second["request_id"] != first["request_id"]
+    assert {t["request_id"] for t in second["timings"]} == {second["request_id"]}
+    assert len(second["timings"]) <= len(first["timings"])
@@ -0,0 +1,115 @@
+"""Test script for the image result cache and thumbnail store (no network needed)"""
+
+import io
+import os
+import threading
+
+import pytest
+
+from graph import response_cache
+from graph.nodes import tool_executor
+from graph.state import TravelState
+from tools import thumbnails
+from tools.thumbnails import ThumbnailStore, cdn_thumbnail
+
+
+def test_cdn_thumbnail_asks_the_cdn_to_downscale():
+    unsplash = cdn_thumbnail("https://images.unsplash.com/photo-1?ixid=abc&w=1080&q=80", width=400)
+    assert unsplash == "https://images.unsplash.com/photo-1?ixid=abc&w=400&fm=webp&q=75&fit=max"
+
+    pexels = cdn_thumbnail("https://images.pexels.com/photos/1/p.jpeg?auto=compress&cs=tinysrgb&fit=crop&h=627&w=1200", 400)
+    assert pexels == "https://images.pexels.com/photos/1/p.jpeg?auto=compress&cs=tinysrgb&w=400"
+
+    assert cdn_thumbnail("https://example.com/a.jpg", 400) == "https://example.com/a.jpg"
+
+
+def test_disabled_store_falls_back_to_cdn_renditions():
+    store = ThumbnailStore(root="")
+    assert not store.enabled
+    store.prefetch(["https://images.unsplash.com/photo-1"])
+    assert store.thumbnails(["https://images.unsplash.com/photo-1"]) == [
+        "https://images.unsplash.com/photo-1?w=480&fm=webp&q=75&fit=max"
+    ]
+
+
+def test_store_downscales_once_and_dedupes_by_content(monkeypatch, tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    source = io.BytesIO()
+    Image.new("RGB", (2000, 1000), "teal").save(source, "PNG")
+    downloads = []
+
+    class Response:
+        content = source.getvalue()
+
+        def raise_for_status(self):
+            pass
+
+    def get(url, **kwargs):
+        downloads.append(url)
+        return Response()
+
+    monkeypatch.setattr(thumbnails.http_client, "get", get)
+    store = ThumbnailStore(root=str(tmp_path), width=480)
+
+    first = store.thumbnail("https://images.unsplash.com/a")
+    same_picture = store.thumbnail("https://images.pexels.com/b")
+    assert first == same_picture
+    assert first.endswith(".webp") and os.path.dirname(first).startswith(str(tmp_path))
+    with Image.open(first) as thumb:
+        assert thumb.format == "WEBP"
+        assert thumb.size == (480, 240)
+
+    # another process finds it through the index without downloading again
+    assert ThumbnailStore(root=str(tmp_path)).thumbnail("https://images.unsplash.com/a") == first
+    assert downloads == ["https://images.unsplash.com/a", "https://images.pexels.com/b"]
+    assert store.stats()["thumbnails"] == 1
+
+
+def test_rendering_never_waits_for_a_download(monkeypatch, tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    source = io.BytesIO()
+    Image.new("RGB", (800, 400), "teal").save(source, "PNG")
+    release = threading.Event()
+
+    class Response:
+        content = source.getvalue()
+
+        def raise_for_status(self):
+            pass
+
+    def slow_get(url, **kwargs):
+        release.wait(5)
+        return Response()
+
+    monkeypatch.setattr(thumbnails.http_client, "get", slow_get)
+    store = ThumbnailStore(root=str(tmp_path))
+    url = "https://images.unsplash.com/a"
+
+    assert store.thumbnails([url], wait=False) == [cdn_thumbnail(url, store.width)]
+    release.set()
+    local = store.path(url)
+    assert local.endswith(".webp")
+    assert store.thumbnails([url], wait=False) == [local]
+
+
+def test_image_results_are_cached_per_city(monkeypatch):
+    monkeypatch.setattr(response_cache, "_cache", response_cache.ResponseCache())
+    monkeypatch.setattr(tool_executor, "get_thumbnail_store", lambda: ThumbnailStore(root=""))
+    searches = []
+
+    class Images:
+        def search_images(self, city, limit=10):
+            searches.append(city)
+            return [f"https://example.com/{city}.jpg"]
+
+    class Weather:
+        def get_forecast(self, city):
+            return []
+
+    monkeypatch.setattr(tool_executor, "get_image_tool", lambda: Images())
+    monkeypatch.setattr(tool_executor, "get_weather_tool", lambda: Weather())
+
+    for city in ("Lisbon", "lisbon ", "Porto"):
+        result = tool_executor.execute_tool_calls_node(TravelState(user_query="x", city=city))
+    assert result["image_urls"] == ["https://example.com/Porto.jpg"]
+    assert searches == ["Lisbon", "Porto"]
@@ -0,0 +1,62 @@
+"""Test script for query embedding lookup (no model or Chroma store needed)"""
+
+import threading
+
+import numpy as np
+
+from config import settings
+from tools import city_index, vector_store
+
+
+class _CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts):
+        self.calls += 1
+        return np.array([[0.5, 0.5]])
+
+
+def test_precomputed_embedding_skips_the_model(monkeypatch):
+    model = _CountingModel()
+    monkeypatch.setattr(vector_store, "get_vector_store", lambda: (None, model))
+    monkeypatch.setattr(vector_store, "_query_embeddings", {"overview and information about paris": [0.1, 0.2]})
+
+    assert vector_store.get_query_embedding("Overview and information about Paris") == [0.1, 0.2]
+    assert model.calls == 0
+
+
+def test_adhoc_queries_are_encoded_once(monkeypatch):
+    model = _CountingModel()
+    monkeypatch.setattr(vector_store, "get_vector_store", lambda: (None, model))
+    monkeypatch.setattr(vector_store, "_query_embeddings", {})
+    vector_store._encode_query.cache_clear()
+
+    first = vector_store.get_query_embedding("Overview and information about Lyon")
+    second = vector_store.get_query_embedding("overview and information about  lyon")
+    assert first == second == [0.5, 0.5]
+    assert model.calls == 1
+
+
+class _Collection:
+    def query(self, query_embeddings, n_results):
+        return {}
+
+
+def test_only_the_serving_process_marks_the_ready_file(monkeypatch, tmp_path):
+    ready_file = tmp_path / "vector-store.ready"
+    ready_file.write_text("left over from the last run")
+    monkeypatch.setattr(settings, "VECTOR_STORE_READY_FILE", str(ready_file))
+    monkeypatch.setattr(vector_store, "get_vector_store", lambda: (_Collection(), _CountingModel()))
+    monkeypatch.setattr(vector_store, "_query_embeddings", {})
+    monkeypatch.setattr(city_index, "refresh_city_index", lambda collection: None)
+
+    # the pre-start process warms up and exits
+    vector_store.clear_ready_file()
+    monkeypatch.setattr(vector_store, "_ready", threading.Event())
+    assert vector_store.warm_up(mark_ready=False)
+    assert not ready_file.exists()
+
+    monkeypatch.setattr(vector_store, "_ready", threading.Event())
+    assert vector_store.warm_up()
+    assert ready_file.exists()
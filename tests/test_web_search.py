@@ -33,18 +33,18 @@ def test_web_summary_node():
         city="Snohomish"
     )
     
-    # Run node
+    # Run node (returns a partial state update)
     result = city_summary_web_node(state)
     
     # Display results
     print("\n" + "="*60)
     print("RESULTS")
     print("="*60)
-    print(f"\nCity: {result.city}")
-    print(f"\nSummary:\n{result.city_summary}")
+    print(f"\nCity: {state.city}")
+    print(f"\nSummary:\n{result['city_summary']}")
     
-    if result.errors:
-        print(f"\nErrors: {result.errors}")
+    if result.get("errors"):
+        print(f"\nErrors: {result['errors']}")
 
 if __name__ == "__main__":
     # Make sure API key is set
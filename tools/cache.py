@@ -0,0 +1,201 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from tools import telemetry
+
+
+class _Flight:
+    """A load in progress; concurrent callers for the same key wait on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and single-flight loading.
+
+    One instance is meant to be shared by every session and worker thread in
+    the process. get_or_load() guarantees that N concurrent misses for the
+    same key run the loader once; the other callers block and reuse its result.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = None, name: str = "cache"):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: dict = {}
+        self._ainflight: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def _expiry(self, ttl, expires_at):
+        if expires_at is not None:
+            return expires_at
+        ttl = self.ttl if ttl is None else ttl
+        return time.time() + ttl if ttl is not None else None
+
+    def _lookup(self, key, now):
+        # caller holds the lock
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def _insert(self, key, value, expires_at):
+        # caller holds the lock
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            found, value = self._lookup(key, time.time())
+            if found:
+                self.hits += 1
+                telemetry.record_cache(self.name, True)
+                return value
+            self.misses += 1
+            telemetry.record_cache(self.name, False)
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._insert(key, value, self._expiry(ttl, expires_at))
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        """Seconds until `key` expires (inf if it never does), or None if it isn't cached; not counted as a lookup."""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None:
+            return None
+        left = entry[1] - time.time() if entry[1] is not None else float("inf")
+        return left if left > 0 else None
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        expires_at: Optional[float] = None,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Return the cached value or call loader() exactly once across threads.
+
+        Loader exceptions are re-raised in every waiting caller and nothing is
+        cached. cache_if lets callers skip caching e.g. empty results.
+        """
+        with self._lock:
+            found, value = self._lookup(key, time.time())
+            if found:
+                self.hits += 1
+                telemetry.record_cache(self.name, True)
+                return value
+            self.misses += 1
+            telemetry.record_cache(self.name, False)
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = loader()
+            flight.value = value
+            with self._lock:
+                self.loads += 1
+                if cache_if is None or cache_if(value):
+                    self._insert(key, value, self._expiry(ttl, expires_at))
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    async def aget_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        expires_at: Optional[float] = None,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Async counterpart of get_or_load(); coroutines in one loop share a single load."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            found, value = self._lookup(key, time.time())
+            if found:
+                self.hits += 1
+                telemetry.record_cache(self.name, True)
+                return value
+            self.misses += 1
+            telemetry.record_cache(self.name, False)
+            flight = self._ainflight.get((loop, key))
+            leader = flight is None
+            if leader:
+                flight = loop.create_future()
+                self._ainflight[(loop, key)] = flight
+
+        if not leader:
+            # shield so one cancelled waiter doesn't cancel the shared load
+            return await asyncio.shield(flight)
+
+        try:
+            value = await loader()
+            with self._lock:
+                self.loads += 1
+                if cache_if is None or cache_if(value):
+                    self._insert(key, value, self._expiry(ttl, expires_at))
+            flight.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            # mark retrieved so an unawaited flight doesn't log "exception never retrieved"
+            flight.exception()
+            raise
+        finally:
+            with self._lock:
+                self._ainflight.pop((loop, key), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "loads": self.loads,
+            }
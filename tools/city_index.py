@@ -0,0 +1,91 @@
+import re
+import threading
+import time
+
+from config import settings
+from config.cities import CITY_ALIASES
+from tools.vector_store import get_collection
+
+_PUNCTUATION = re.compile(r"[^\w\s-]")
+_SEPARATORS = re.compile(r"[_\-\s]+")
+
+
+def normalize_city(name):
+    """'New_York', 'new-york', ' NEW YORK ' -> 'new york'; 'N.Y.C.' -> 'nyc'."""
+    name = _PUNCTUATION.sub("", (name or "").lower())
+    return _SEPARATORS.sub(" ", name).strip()
+
+
+class CityIndex:
+    """Maps normalized city names and aliases to the `city` metadata key stored in Chroma."""
+
+    def __init__(self, stored_keys=(), aliases=None):
+        aliases = CITY_ALIASES if aliases is None else aliases
+        self._keys = {}
+        for key in stored_keys:
+            self._keys[normalize_city(key)] = key
+        for alias, target in aliases.items():
+            key = self._keys.get(normalize_city(target))
+            if key is not None:
+                self._keys.setdefault(normalize_city(alias), key)
+
+    def resolve(self, city):
+        """Stored metadata key for a user-facing city name, or None if not ingested."""
+        return self._keys.get(normalize_city(city))
+
+    def __contains__(self, city):
+        return self.resolve(city) is not None
+
+    def cities(self):
+        return sorted(set(self._keys.values()))
+
+
+def build_city_index(collection):
+    stored = collection.get(include=["metadatas"])
+    keys = {m["city"] for m in stored.get("metadatas") or [] if m and m.get("city")}
+    return CityIndex(keys)
+
+
+_index = None
+# chunk count the index was built from; an unchanged count skips the rebuild
+_chunk_count = None
+_next_refresh = 0.0
+_index_lock = threading.Lock()
+
+
+def get_city_index():
+    """Process-wide index, built from the Chroma collection on first use.
+
+    Every CITY_INDEX_REFRESH_SECONDS the collection's chunk count is checked,
+    and the index rebuilt if it changed, so cities ingested by another
+    process start routing to the vector store without a restart.
+    """
+    global _next_refresh
+    if time.time() >= _next_refresh:
+        with _index_lock:
+            if time.time() >= _next_refresh:
+                try:
+                    _refresh(force=False)
+                except Exception as e:
+                    # keep the last good index; with none, everything goes to web until a retry succeeds
+                    print(f"City index unavailable: {e}")
+                    _next_refresh = time.time() + min(settings.CITY_INDEX_RETRY_SECONDS, settings.CITY_INDEX_REFRESH_SECONDS)
+    return _index or CityIndex()
+
+
+def refresh_city_index(collection=None):
+    """Rebuild now, e.g. right after ingestion."""
+    return _refresh(collection, force=True)
+
+
+def _refresh(collection=None, force=True):
+    global _index, _chunk_count, _next_refresh
+    if collection is None:
+        collection = get_collection()
+    # counted before reading, so chunks added in between trigger the next rebuild
+    count = collection.count()
+    if force or _index is None or count != _chunk_count:
+        _index = build_city_index(collection)
+    _chunk_count = count
+    _next_refresh = time.time() + settings.CITY_INDEX_REFRESH_SECONDS
+    return _index
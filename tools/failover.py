@@ -0,0 +1,103 @@
+"""Building blocks for spreading calls over interchangeable providers.
+
+LatencyWindow tracks a provider's recent response times, so a hedge can be
+sent once the primary is slower than it usually is. CircuitBreaker stops
+calling a provider after repeated failures and lets a single trial call
+through after a cooldown.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+from config import settings
+from tools import telemetry
+
+BREAKER_OPENED = telemetry.REGISTRY.counter(
+    "travel_circuit_opened_total", "Times a provider's circuit breaker opened.", ["provider"]
+)
+
+
+class CircuitOpen(Exception):
+    """Every provider that could serve the call is failing; none was tried."""
+
+
+class LatencyWindow:
+    """The last `size` successful response times of one provider."""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, q):
+        """Nearest-rank percentile of the window; None while it is empty."""
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return None
+        rank = min(max(math.ceil(q / 100 * len(ordered)), 1), len(ordered))
+        return ordered[rank - 1]
+
+
+class CircuitBreaker:
+    """closed -> (N failures in a row) -> open -> (cooldown) -> half-open: one trial call decides."""
+
+    def __init__(self, name, failures=None, cooldown=None):
+        self.name = name
+        self.failures = failures or settings.IMAGE_BREAKER_FAILURES
+        self.cooldown = cooldown if cooldown is not None else settings.IMAGE_BREAKER_COOLDOWN
+        self._consecutive = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at < self.cooldown:
+            return "open"
+        return "half-open"
+
+    def allow(self):
+        """Whether a call may go out now; in half-open state only one trial call is let through."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self._consecutive = 0
+            self._opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self._consecutive += 1
+            # a failed trial re-opens at once; otherwise open after N failures in a row
+            if self._trial or (self._opened_at is None and self._consecutive >= self.failures):
+                self._opened_at = time.monotonic()
+                BREAKER_OPENED.inc(provider=self.name)
+            self._trial = False
+
+    def release(self):
+        """The call allowed by allow() never reached the provider (e.g. it was rate limited client-side)."""
+        with self._lock:
+            self._trial = False
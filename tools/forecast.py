@@ -0,0 +1,106 @@
+"""Columnar normalization of OpenWeatherMap 5-day / 3-hour forecasts.
+
+The ~40 entries of a forecast are read into NumPy columns in one pass,
+grouped by the city's local date (OWM's `city.timezone` offset, not the
+server's timezone) and reduced per day with ufunc.reduceat. Several
+forecasts can be normalized together (normalize_forecasts), e.g. when a
+cache-warming job refreshes many cities at once.
+
+Each day comes out as:
+
+    {"date": "2025-06-01", "temp_min": 14.2, "temp_max": 23.9, "temp_avg": 18.7,
+     "description": "light rain", "precip_mm": 3.4, "wind_max": 7.1, "humidity": 68.0}
+
+`description` is the most frequent one of the day (ties go to the
+alphabetically first), `precip_mm` sums rain and snow, `humidity` is the
+mean relative humidity in percent (None if the provider sent none).
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+MAX_DAYS = 7
+_SECONDS_PER_DAY = 86400
+# columns of the per-entry matrix
+_DT, _TEMP, _TEMP_MIN, _TEMP_MAX, _PRECIP, _WIND, _HUMIDITY = range(7)
+
+
+def _columns(raw):
+    """(entries x 7 float matrix, descriptions, utc offset in seconds) for one raw forecast."""
+    rows = []
+    descriptions = []
+    for item in raw.get("list") or []:
+        main = item["main"]
+        wind = item.get("wind") or {}
+        precip = (item.get("rain") or {}).get("3h", 0.0) + (item.get("snow") or {}).get("3h", 0.0)
+        rows.append((
+            item["dt"], main["temp"], main["temp_min"], main["temp_max"], precip,
+            wind.get("speed", np.nan), main.get("humidity", np.nan),
+        ))
+        descriptions.append(item["weather"][0]["description"] if item.get("weather") else "")
+    values = np.array(rows, dtype=np.float64).reshape(-1, 7)
+    return values, descriptions, (raw.get("city") or {}).get("timezone", 0)
+
+
+def normalize_forecasts(raws, max_days=MAX_DAYS) -> List[List[Dict[str, Any]]]:
+    """Daily summaries for each raw /forecast response, in the order given (at most `max_days` each)."""
+    parsed = [_columns(raw) if "list" in raw else (np.empty((0, 7)), [], 0) for raw in raws]
+    lengths = [len(values) for values, _, _ in parsed]
+    result = [[] for _ in raws]
+    if not sum(lengths):
+        return result
+
+    values = np.concatenate([values for values, _, _ in parsed])
+    city = np.repeat(np.arange(len(parsed)), lengths)
+    offset = np.repeat([tz for _, _, tz in parsed], lengths)
+    day = (values[:, _DT].astype(np.int64) + offset) // _SECONDS_PER_DAY
+
+    # sort by (city, local day) so each group is one contiguous run
+    order = np.lexsort((values[:, _DT], day, city))
+    values, city, day = values[order], city[order], day[order]
+    boundary = np.r_[True, (city[1:] != city[:-1]) | (day[1:] != day[:-1])]
+    starts = np.flatnonzero(boundary)
+    group = np.cumsum(boundary) - 1
+
+    counts = np.diff(np.r_[starts, len(values)])
+    temp_min = np.minimum.reduceat(values[:, _TEMP_MIN], starts)
+    temp_max = np.maximum.reduceat(values[:, _TEMP_MAX], starts)
+    temp_avg = np.add.reduceat(values[:, _TEMP], starts) / counts
+    precip = np.add.reduceat(values[:, _PRECIP], starts)
+    # fmax skips entries without a wind reading
+    wind_max = np.fmax.reduceat(values[:, _WIND], starts)
+    humidity_seen = ~np.isnan(values[:, _HUMIDITY])
+    humidity_n = np.add.reduceat(humidity_seen, starts)
+    humidity_sum = np.add.reduceat(np.where(humidity_seen, values[:, _HUMIDITY], 0.0), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        humidity = humidity_sum / humidity_n
+
+    # mode of the descriptions: count (day, description) pairs, take the most frequent per day
+    descriptions = np.array([d for _, day_descriptions, _ in parsed for d in day_descriptions])[order]
+    labels, codes = np.unique(descriptions, return_inverse=True)
+    tally = np.zeros((len(starts), len(labels)), dtype=np.int32)
+    np.add.at(tally, (group, codes), 1)
+    description = labels[tally.argmax(axis=1)]
+
+    dates = np.datetime_as_string(day[starts].astype("datetime64[D]"))
+    for g, start in enumerate(starts):
+        days = result[city[start]]
+        if len(days) >= max_days:
+            continue
+        days.append({
+            "date": str(dates[g]),
+            "temp_min": round(float(temp_min[g]), 1),
+            "temp_max": round(float(temp_max[g]), 1),
+            "temp_avg": round(float(temp_avg[g]), 1),
+            "description": str(description[g]),
+            "precip_mm": round(float(precip[g]), 1),
+            "wind_max": None if np.isnan(wind_max[g]) else round(float(wind_max[g]), 1),
+            "humidity": None if np.isnan(humidity[g]) else round(float(humidity[g]), 1),
+        })
+    return result
+
+
+def normalize_forecast(raw, max_days=MAX_DAYS) -> List[Dict[str, Any]]:
+    """Daily summaries of one raw /forecast response ([] if it has no 'list')."""
+    return normalize_forecasts([raw], max_days)[0]
@@ -0,0 +1,137 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+from config import settings
+from tools import telemetry
+
+
+def normalize_city_key(city_name):
+    """Lowercase and collapse whitespace so 'New  York ' and 'new york' share an entry."""
+    return " ".join((city_name or "").strip().lower().split())
+
+
+class GeocodeCache:
+    """City -> (lat, lon) cache: in-process LRU in front of a SQLite store.
+
+    Coordinates never change, so positive entries don't expire. Cities the
+    provider couldn't resolve are cached as (None, None) for a short TTL so a
+    typo doesn't hit the API on every request but a later fix is picked up.
+    """
+
+    def __init__(self, path=None, max_entries=None, negative_ttl=None):
+        self.path = path if path is not None else settings.GEOCODE_CACHE_PATH
+        self.max_entries = max_entries or settings.GEOCODE_CACHE_SIZE
+        self.negative_ttl = negative_ttl if negative_ttl is not None else settings.GEOCODE_NEGATIVE_TTL
+        self._lru: "OrderedDict[str, Tuple[Optional[float], Optional[float], Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self):
+        if not self.path:
+            return None
+        try:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                "key TEXT PRIMARY KEY, lat REAL, lon REAL, expires_at REAL)"
+            )
+            conn.commit()
+            return conn
+        except sqlite3.Error as e:
+            # a read-only volume shouldn't break weather lookups; keep the LRU only
+            print(f"Geocode cache disabled on disk ({self.path}): {e}")
+            return None
+
+    def get(self, city_name):
+        """Return (lat, lon), (None, None) for a cached miss, or None if unknown."""
+        cached = self._get(city_name)
+        telemetry.record_cache("geocode", cached is not None)
+        return cached
+
+    def _get(self, city_name):
+        key = normalize_city_key(city_name)
+        if not key:
+            return None
+        now = time.time()
+
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                lat, lon, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._lru.move_to_end(key)
+                    return lat, lon
+                del self._lru[key]
+
+            if self._conn is None:
+                return None
+            try:
+                row = self._conn.execute(
+                    "SELECT lat, lon, expires_at FROM geocode WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"Geocode cache read error: {e}")
+                return None
+            if row is None:
+                return None
+            lat, lon, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                return None
+            self._remember(key, lat, lon, expires_at)
+            return lat, lon
+
+    def set(self, city_name, lat, lon):
+        self._store(normalize_city_key(city_name), lat, lon, None)
+
+    def set_missing(self, city_name):
+        self._store(normalize_city_key(city_name), None, None, time.time() + self.negative_ttl)
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM geocode")
+                self._conn.commit()
+
+    def _store(self, key, lat, lon, expires_at):
+        if not key:
+            return
+        with self._lock:
+            self._remember(key, lat, lon, expires_at)
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO geocode (key, lat, lon, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, lat, lon, expires_at),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Geocode cache write error: {e}")
+
+    def _remember(self, key, lat, lon, expires_at):
+        # caller holds the lock
+        self._lru[key] = (lat, lon, expires_at)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_geocode_cache():
+    """Process-wide cache shared by every WeatherTool instance."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = GeocodeCache()
+    return _cache
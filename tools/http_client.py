@@ -0,0 +1,175 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import settings
+from tools import rate_limit, telemetry
+
+# 429 is not retried here: a retry would bypass the token bucket; rate_limit's observe() handles it
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+# httpx pools are bound to the event loop that opened them, so keep one client per loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+# monotonic deadline of the request being served; tasks and copied contexts (tool threads) inherit it
+_deadline: ContextVar[Optional[float]] = ContextVar("travel_request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before an upstream call could be made."""
+
+
+@contextmanager
+def deadline(seconds):
+    """Bound every upstream call made in this context to finish within `seconds` from now."""
+    current = _deadline.get()
+    new = time.monotonic() + seconds if seconds else None
+    if current is not None and (new is None or current < new):
+        new = current
+    token = _deadline.set(new)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time():
+    """Seconds left before the current request's deadline (None if it has none); raises once it has passed."""
+    current = _deadline.get()
+    if current is None:
+        return None
+    left = current - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return left
+
+
+def _build_session():
+    retry = Retry(
+        total=settings.HTTP_MAX_RETRIES,
+        backoff_factor=settings.HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        # a 503's Retry-After can be long; back off briefly instead of sleeping on it
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    # urllib3 keeps one pool per host; pool_maxsize is the keep-alive connections per host
+    adapter = HTTPAdapter(
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """Process-wide keep-alive session shared by all REST tools."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def default_timeout():
+    """(connect, read) timeout tuple in seconds, shortened to the request's remaining time."""
+    return request_timeout(None)
+
+
+def request_timeout(timeout):
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    connect = connect or settings.HTTP_CONNECT_TIMEOUT
+    read = read or settings.HTTP_READ_TIMEOUT
+    left = remaining_time()
+    if left is not None:
+        connect, read = min(connect, left), min(read, left)
+    return connect, read
+
+
+def _provider(url):
+    return urlsplit(url).hostname or "unknown"
+
+
+def get(url, params=None, headers=None, timeout=None, provider=None, priority=rate_limit.NORMAL):
+    """GET through the shared session, within `provider`'s rate limit; raises rate_limit.QuotaExceeded."""
+    provider = provider or _provider(url)
+    limiter = rate_limit.get_limiter()
+    limiter.acquire(provider, priority, max_wait=remaining_time())
+    with telemetry.http_call(provider, "GET", url) as call:
+        response = get_session().get(url, params=params, headers=headers, timeout=request_timeout(timeout))
+        call.done(response.status_code, len(response.content))
+    limiter.observe(provider, response)
+    return response
+
+
+def get_async_client():
+    """Keep-alive httpx client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_POOL_CONNECTIONS * settings.HTTP_POOL_MAXSIZE,
+                max_keepalive_connections=settings.HTTP_POOL_MAXSIZE,
+            ),
+            timeout=httpx.Timeout(settings.HTTP_READ_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def _async_timeout(timeout):
+    connect, read = request_timeout(timeout)
+    return httpx.Timeout(read, connect=connect)
+
+
+async def aget(url, params=None, headers=None, timeout=None, provider=None, priority=rate_limit.NORMAL):
+    """Async GET with the same retry/backoff policy and rate limits as the sync path."""
+    provider = provider or _provider(url)
+    limiter = rate_limit.get_limiter()
+    await limiter.aacquire(provider, priority, max_wait=remaining_time())
+    with telemetry.http_call(provider, "GET", url) as call:
+        response = await _aget_with_retries(url, params, headers, timeout)
+        call.done(response.status_code, len(response.content))
+    limiter.observe(provider, response)
+    return response
+
+
+async def _aget_with_retries(url, params, headers, timeout):
+    client = get_async_client()
+    attempt = 0
+    while True:
+        response = None
+        try:
+            response = await client.get(url, params=params, headers=headers, timeout=_async_timeout(timeout))
+        except httpx.TransportError:
+            if attempt >= settings.HTTP_MAX_RETRIES:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt >= settings.HTTP_MAX_RETRIES:
+                return response
+        backoff = settings.HTTP_BACKOFF_FACTOR * (2 ** attempt)
+        left = remaining_time()
+        if left is not None and backoff >= left:
+            # no time left for another attempt; surface the last answer we got
+            if response is not None:
+                return response
+            raise DeadlineExceeded("request deadline exceeded during retries")
+        await asyncio.sleep(backoff)
+        attempt += 1
@@ -1,41 +1,193 @@
+import asyncio
+import contextvars
 import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from typing import List
-import requests
 
 from config import settings
+from tools import http_client, rate_limit, telemetry
+from tools.failover import CircuitBreaker, CircuitOpen, LatencyWindow
+
+HEDGES = telemetry.REGISTRY.counter(
+	"travel_image_hedges_total", "Image searches hedged to a second provider, by the one that answered first.", ["winner"]
+)
+
+# sync searches run here so the caller can stop waiting on a slow provider; a losing
+# request can't be cancelled mid-flight and finishes in the background
+_pool = ThreadPoolExecutor(max_workers=settings.HTTP_POOL_MAXSIZE, thread_name_prefix="image-search")
 
 
 class ImageTool:
 	def __init__(self):
-		# Pick provider based on available keys
-		self.provider = None
 		self.unsplash_key = settings.UNSPLASH_API_KEY
 		self.pexels_key = settings.PEXELS_API_KEY
+		self.base_urls = {"unsplash": settings.UNSPLASH_BASE_URL, "pexels": settings.PEXELS_BASE_URL}
 
-		if self.unsplash_key:
-			self.provider = "unsplash"
-			self.base_url = "https://api.unsplash.com"
-		elif self.pexels_key:
-			self.provider = "pexels"
-			self.base_url = "https://api.pexels.com"
-		else:
+		# Providers in preference order; with both keys the second one hedges and backs up the first
+		keys = (("unsplash", self.unsplash_key), ("pexels", self.pexels_key))
+		self.providers = [name for name, key in keys if key]
+		if not self.providers:
 			raise ValueError(
 				"No image API key found. Set UNSPLASH_API_KEY or PEXELS_API_KEY in .env"
 			)
+		self.provider = self.providers[0]
+		self.breakers = {name: CircuitBreaker(name) for name in self.providers}
+		self.latency = {name: LatencyWindow() for name in self.providers}
+
+	def hedge_delay(self, provider: str) -> float:
+		"""How long to wait on `provider` before asking the next one: its recent p95 latency."""
+		window = self.latency[provider]
+		if len(window) < settings.IMAGE_HEDGE_MIN_SAMPLES:
+			return settings.IMAGE_HEDGE_DELAY
+		return window.percentile(settings.IMAGE_HEDGE_PERCENTILE)
 
 	def search_images(self, query: str, limit: int = 10) -> List[str]:
+		limit = max(1, min(limit, 15))
+		remaining = iter(self.providers)
+		pending = {}
+		errors = []
+
+		def launch():
+			provider = self._next_provider(remaining)
+			if provider is not None:
+				# copy the context so the deadline and request id follow the call onto the pool
+				future = _pool.submit(contextvars.copy_context().run, self._fetch, provider, query, limit)
+				pending[future] = provider
+			return provider
+
+		primary = launch()
+		if primary is None:
+			raise self._all_open()
+		timeout = self.hedge_delay(primary) if len(self.providers) > 1 else None
+		hedged = False
+		while pending:
+			done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+			if not done:
+				# slower than usual: hedge with the next provider and take whichever answers first
+				timeout = None
+				hedged = launch() is not None or hedged
+				continue
+			for future in done:
+				provider = pending.pop(future)
+				try:
+					urls = future.result()
+				except Exception as e:
+					errors.append((provider, e))
+					continue
+				if hedged:
+					HEDGES.inc(winner=provider)
+				return urls
+			# fail over at once rather than waiting out the hedge delay
+			if not pending:
+				launch()
+		return self._give_up(errors)
+
+	async def asearch_images(self, query: str, limit: int = 10) -> List[str]:
+		limit = max(1, min(limit, 15))
+		remaining = iter(self.providers)
+		pending = {}
+		errors = []
+
+		def launch():
+			provider = self._next_provider(remaining)
+			if provider is not None:
+				pending[asyncio.ensure_future(self._afetch(provider, query, limit))] = provider
+			return provider
+
+		primary = launch()
+		if primary is None:
+			raise self._all_open()
+		timeout = self.hedge_delay(primary) if len(self.providers) > 1 else None
+		hedged = False
 		try:
-			limit = max(1, min(limit, 15))
-			if self.provider == "unsplash":
-				return self._search_unsplash(query, limit)
-			else:
-				return self._search_pexels(query, limit)
-		except Exception as e:
-			print(f"Image search error: {e}")
-			return []
-
-	def _search_unsplash(self, query: str, limit: int) -> List[str]:
-		url = f"{self.base_url}/search/photos"
+			while pending:
+				done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+				if not done:
+					timeout = None
+					hedged = launch() is not None or hedged
+					continue
+				for task in done:
+					provider = pending.pop(task)
+					try:
+						urls = task.result()
+					except Exception as e:
+						errors.append((provider, e))
+						continue
+					if hedged:
+						HEDGES.inc(winner=provider)
+					return urls
+				if not pending:
+					launch()
+		finally:
+			# unlike threads, the losing request can be dropped
+			for task in pending:
+				task.cancel()
+		return self._give_up(errors)
+
+	def _next_provider(self, remaining):
+		"""Next provider in preference order whose circuit lets a call through, or None."""
+		for provider in remaining:
+			if self.breakers[provider].allow():
+				return provider
+		return None
+
+	def _all_open(self):
+		return CircuitOpen(f"{' and '.join(self.providers)} failing repeatedly; image search paused")
+
+	def _give_up(self, errors) -> List[str]:
+		# an exhausted quota is an error to report, not "no photos of this city"
+		quota = [e for _, e in errors if isinstance(e, rate_limit.QuotaExceeded)]
+		if quota and len(quota) == len(errors):
+			raise quota[0]
+		for provider, e in errors:
+			print(f"Image search error ({provider}): {e}")
+		return []
+
+	@contextmanager
+	def _tracked(self, provider: str):
+		"""Feed one call's outcome into the provider's breaker and latency window."""
+		breaker = self.breakers[provider]
+		start = time.perf_counter()
+		try:
+			yield
+		except rate_limit.QuotaExceeded:
+			# held back by the rate limiter, not a provider fault
+			breaker.release()
+			raise
+		except Exception:
+			breaker.failure()
+			raise
+		except BaseException:
+			# cancelled as the losing side of a hedge
+			breaker.release()
+			raise
+		breaker.success()
+		self.latency[provider].record(time.perf_counter() - start)
+
+	def _fetch(self, provider: str, query: str, limit: int) -> List[str]:
+		url, params, headers, parse = self._build_request(provider, query, limit)
+		with self._tracked(provider):
+			r = http_client.get(url, params=params, headers=headers, provider=provider, priority=rate_limit.LOW)
+			r.raise_for_status()
+			return parse(r.json())
+
+	async def _afetch(self, provider: str, query: str, limit: int) -> List[str]:
+		url, params, headers, parse = self._build_request(provider, query, limit)
+		with self._tracked(provider):
+			r = await http_client.aget(url, params=params, headers=headers, provider=provider, priority=rate_limit.LOW)
+			r.raise_for_status()
+			return parse(r.json())
+
+	def _build_request(self, provider: str, query: str, limit: int):
+		if provider == "unsplash":
+			return self._unsplash_request(query, limit) + (self._parse_unsplash,)
+		return self._pexels_request(query, limit) + (self._parse_pexels,)
+
+	def _unsplash_request(self, query: str, limit: int):
+		url = f"{self.base_urls['unsplash']}/search/photos"
 		params = {
 			"query": query,
 			"per_page": limit,
@@ -43,10 +195,9 @@ class ImageTool:
 			"order_by": "relevant",
 		}
 		headers = {"Authorization": f"Client-ID {self.unsplash_key}"}
-		r = requests.get(url, params=params, headers=headers, timeout=10)
-		r.raise_for_status()
-		data = r.json()
+		return url, params, headers
 
+	def _parse_unsplash(self, data) -> List[str]:
 		urls: List[str] = []
 		for item in data.get("results", []):
 			width = item.get("width")
@@ -60,18 +211,17 @@ class ImageTool:
 				urls.append(url_choice)
 		return urls
 
-	def _search_pexels(self, query: str, limit: int) -> List[str]:
-		url = f"{self.base_url}/v1/search"
+	def _pexels_request(self, query: str, limit: int):
+		url = f"{self.base_urls['pexels']}/v1/search"
 		params = {
 			"query": query,
 			"per_page": limit,
 			"orientation": "landscape",
 		}
 		headers = {"Authorization": self.pexels_key}
-		r = requests.get(url, params=params, headers=headers, timeout=10)
-		r.raise_for_status()
-		data = r.json()
+		return url, params, headers
 
+	def _parse_pexels(self, data) -> List[str]:
 		urls: List[str] = []
 		for item in data.get("photos", []):
 			src = item.get("src", {})
@@ -81,3 +231,16 @@ class ImageTool:
 				urls.append(url_choice)
 		return urls
 
+
+_image_tool = None
+_image_tool_lock = threading.Lock()
+
+
+def get_image_tool():
+	"""Reusable ImageTool; raises ValueError if no image API key is set."""
+	global _image_tool
+	if _image_tool is None:
+		with _image_tool_lock:
+			if _image_tool is None:
+				_image_tool = ImageTool()
+	return _image_tool
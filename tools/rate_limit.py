@@ -0,0 +1,389 @@
+"""Client-side rate limits for the upstream APIs.
+
+Each provider listed in RATE_LIMITS gets a token bucket: "unsplash=50/3600"
+allows a burst of 50 calls and refills them evenly over an hour. Buckets
+are shared by every thread (and event loop) of the process, and by every
+process pointing RATE_LIMIT_PATH at the same SQLite file.
+
+When a bucket is empty, callers queue by priority: a weather lookup
+(HIGH) waits up to RATE_LIMIT_MAX_WAIT for the next token, a web search
+(NORMAL) half of that, and an image search (LOW) gives up at once. Calls
+made inside background() (the cache pre-warmer) never wait and leave
+RATE_LIMIT_BACKGROUND_RESERVE of every bucket to interactive traffic. Giving
+up raises QuotaExceeded, which the tools report instead of returning an
+empty result. A 429 from the provider blocks its bucket until Retry-After,
+and X-Ratelimit-Remaining headers pull the bucket down to what the
+provider says is left.
+
+    python -m tools.rate_limit      # remaining quota per provider, as JSON
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, NamedTuple
+
+from config import settings
+from tools import telemetry
+
+HIGH, NORMAL, LOW, BACKGROUND = 0, 1, 2, 3
+PRIORITY_NAMES = {HIGH: "high", NORMAL: "normal", LOW: "low", BACKGROUND: "background"}
+# share of RATE_LIMIT_MAX_WAIT each priority will queue for a token
+_WAIT_SHARE = {HIGH: 1.0, NORMAL: 0.5, LOW: 0.0, BACKGROUND: 0.0}
+# set by background(); every call in the context runs at BACKGROUND priority
+_background: ContextVar[bool] = ContextVar("travel_rate_limit_background", default=False)
+# queued callers that aren't first in line re-check this often
+_POLL_INTERVAL = 0.01
+
+DECISIONS = telemetry.REGISTRY.counter(
+    "travel_rate_limit_total", "Upstream calls checked against the client-side budgets.", ["provider", "priority", "outcome"]
+)
+
+
+@contextmanager
+def background():
+    """Run the upstream calls made in this context at BACKGROUND priority, whatever the tools ask for."""
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+def in_background():
+    """True inside background()."""
+    return _background.get()
+
+
+class QuotaExceeded(Exception):
+    """No call to `provider` is allowed for another `retry_after` seconds."""
+
+    def __init__(self, provider, retry_after):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(f"{provider} rate limit reached; next call allowed in {retry_after:.0f}s")
+
+
+class Budget(NamedTuple):
+    calls: int
+    per: float
+
+    @property
+    def rate(self):
+        return self.calls / self.per
+
+    def refill(self, row, now):
+        """Tokens of a stored (tokens, updated_at) row brought forward to `now`."""
+        if row is None:
+            return float(self.calls)
+        tokens, updated_at = row
+        return min(self.calls, tokens + max(now - updated_at, 0) * self.rate)
+
+    def wait(self, tokens):
+        """Seconds until a bucket holding `tokens` has a whole one to spend."""
+        return max((1 - tokens) / self.rate, 0.0)
+
+
+def parse_limits(spec):
+    """'unsplash=50/3600, tavily=100/60' -> {'unsplash': Budget(50, 3600.0), ...}; bad entries are skipped."""
+    budgets = {}
+    for entry in (spec or "").split(","):
+        if not entry.strip():
+            continue
+        try:
+            name, limit = entry.split("=")
+            calls, per = limit.split("/")
+            budget = Budget(int(calls), float(per))
+            if budget.calls <= 0 or budget.per <= 0:
+                raise ValueError("calls and seconds must be positive")
+        except ValueError as e:
+            print(f"Ignoring rate limit {entry.strip()!r}: {e}")
+            continue
+        budgets[name.strip()] = budget
+    return budgets
+
+
+class _MemoryStore:
+    def __init__(self):
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    def update(self, provider, change):
+        """Apply change(row) -> (new_row, result) atomically; rows are (tokens, updated_at)."""
+        with self._lock:
+            row, result = change(self._rows.get(provider))
+            self._rows[provider] = row
+            return result
+
+
+class _SqliteStore:
+    """Bucket rows in a SQLite file, so every process using the same path draws on one budget."""
+
+    def __init__(self, path):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "provider TEXT PRIMARY KEY, tokens REAL, updated_at REAL)"
+        )
+        self._lock = threading.Lock()
+
+    def update(self, provider, change):
+        with self._lock:
+            cur = self._conn.cursor()
+            # take the write lock up front so two processes can't both spend the last token
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                row = cur.execute(
+                    "SELECT tokens, updated_at FROM buckets WHERE provider = ?", (provider,)
+                ).fetchone()
+                new_row, result = change(row)
+                cur.execute(
+                    "INSERT OR REPLACE INTO buckets (provider, tokens, updated_at) VALUES (?, ?, ?)",
+                    (provider, *new_row),
+                )
+                cur.execute("COMMIT")
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+            return result
+
+
+def _make_store(path):
+    if not path:
+        return _MemoryStore()
+    try:
+        return _SqliteStore(path)
+    except sqlite3.Error as e:
+        # an unwritable volume shouldn't stop upstream calls; budget per process instead
+        print(f"Rate limit store disabled on disk ({path}): {e}")
+        return _MemoryStore()
+
+
+def _header_number(headers, name):
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Token buckets per provider with a priority queue in front of each."""
+
+    def __init__(self, limits=None, path=None, max_wait=None):
+        self.budgets: Dict[str, Budget] = parse_limits(settings.RATE_LIMITS if limits is None else limits)
+        self.max_wait = max_wait if max_wait is not None else settings.RATE_LIMIT_MAX_WAIT
+        self._store = _make_store(settings.RATE_LIMIT_PATH if path is None else path)
+        # provider -> heap of (priority, arrival) for callers waiting on an empty bucket
+        self._queues = {}
+        self._queues_lock = threading.Lock()
+        self._arrivals = itertools.count()
+
+    # -- bucket operations -------------------------------------------------
+
+    def _take(self, provider, budget, reserve=0.0):
+        """0 if a call was taken from the bucket (leaving `reserve` tokens in it), else seconds until one can be."""
+        now = time.time()
+
+        def change(row):
+            tokens = budget.refill(row, now)
+            if tokens >= 1 + reserve:
+                return (tokens - 1, now), 0.0
+            return (tokens, now), budget.wait(tokens - reserve)
+
+        return self._store.update(provider, change)
+
+    def _peek(self, provider, budget):
+        """(tokens, seconds until the next call is allowed) without spending anything."""
+        now = time.time()
+
+        def change(row):
+            tokens = budget.refill(row, now)
+            return (tokens, now), (tokens, budget.wait(tokens))
+
+        return self._store.update(provider, change)
+
+    def block(self, provider, until=None):
+        """Spend `provider`'s bucket and refuse calls until `until` (epoch seconds; default: one refill step)."""
+        budget = self.budgets.get(provider)
+        if budget is None:
+            return
+        now = time.time()
+        until = until if until is not None else now + 1 / budget.rate
+        # run the bucket into debt so the next whole token arrives exactly at `until`
+        debt = 1 - max(until - now, 0) * budget.rate
+        self._store.update(provider, lambda row: ((min(budget.refill(row, now), debt), now), None))
+
+    def observe(self, provider, response):
+        """Fold the provider's own quota headers into its bucket; raises QuotaExceeded on a 429."""
+        budget = self.budgets.get(provider)
+        if budget is None:
+            return
+        now = time.time()
+        headers = response.headers
+        if response.status_code == 429:
+            retry_after = _header_number(headers, "Retry-After")
+            reset = _header_number(headers, "X-Ratelimit-Reset")
+            until = now + retry_after if retry_after is not None else reset if reset and reset > now else None
+            self.block(provider, until)
+            DECISIONS.inc(provider=provider, priority="-", outcome="throttled")
+            raise QuotaExceeded(provider, (until or now + 1 / budget.rate) - now)
+
+        remaining = _header_number(headers, "X-Ratelimit-Remaining")
+        if remaining is None:
+            return
+
+        def change(row):
+            return (min(budget.refill(row, now), remaining), now), None
+
+        self._store.update(provider, change)
+
+    # -- queueing ------------------------------------------------------------
+
+    def _effective(self, priority, budget):
+        """(priority, tokens to leave in the bucket) for a call made in the current context."""
+        if _background.get() or priority == BACKGROUND:
+            return BACKGROUND, budget.calls * settings.RATE_LIMIT_BACKGROUND_RESERVE
+        return priority, 0.0
+
+    def _wait_limit(self, priority, max_wait):
+        limit = self.max_wait * _WAIT_SHARE.get(priority, 0.0)
+        return limit if max_wait is None else min(limit, max_wait)
+
+    def _enqueue(self, provider, priority):
+        ticket = (priority, next(self._arrivals))
+        with self._queues_lock:
+            heapq.heappush(self._queues.setdefault(provider, []), ticket)
+        return ticket
+
+    def _dequeue(self, provider, ticket):
+        with self._queues_lock:
+            queue = self._queues[provider]
+            queue.remove(ticket)
+            heapq.heapify(queue)
+
+    def _queued(self, provider):
+        with self._queues_lock:
+            return bool(self._queues.get(provider))
+
+    def _poll(self, provider, budget, ticket):
+        """Like _take, but only for the caller first in line; None for everyone else."""
+        with self._queues_lock:
+            if self._queues[provider][0] != ticket:
+                return None
+        return self._take(provider, budget)
+
+    def _reject(self, provider, budget, priority, wait):
+        DECISIONS.inc(provider=provider, priority=PRIORITY_NAMES.get(priority, str(priority)), outcome="rejected")
+        return QuotaExceeded(provider, wait if wait is not None else self._peek(provider, budget)[1])
+
+    def _granted(self, provider, priority):
+        DECISIONS.inc(provider=provider, priority=PRIORITY_NAMES.get(priority, str(priority)), outcome="granted")
+
+    def acquire(self, provider, priority=NORMAL, max_wait=None):
+        """Spend one call of `provider`'s budget, queueing as long as `priority` allows (and at most `max_wait`).
+
+        Providers without a budget pass straight through. Raises QuotaExceeded.
+        """
+        budget = self.budgets.get(provider)
+        if budget is None:
+            return
+        priority, reserve = self._effective(priority, budget)
+        # nobody queued: take a token if there is one
+        wait = None if self._queued(provider) else self._take(provider, budget, reserve)
+        if wait == 0:
+            self._granted(provider, priority)
+            return
+        limit = self._wait_limit(priority, max_wait)
+        if limit <= 0 or (wait is not None and wait > limit):
+            raise self._reject(provider, budget, priority, wait)
+
+        give_up_at = time.monotonic() + limit
+        ticket = self._enqueue(provider, priority)
+        try:
+            while True:
+                wait = self._poll(provider, budget, ticket)
+                if wait == 0:
+                    self._granted(provider, priority)
+                    return
+                left = give_up_at - time.monotonic()
+                if left <= 0 or (wait is not None and wait > left):
+                    raise self._reject(provider, budget, priority, wait)
+                time.sleep(min(wait, left) if wait is not None else min(_POLL_INTERVAL, left))
+        finally:
+            self._dequeue(provider, ticket)
+
+    async def aacquire(self, provider, priority=NORMAL, max_wait=None):
+        """Async twin of acquire(); waits without blocking the event loop."""
+        budget = self.budgets.get(provider)
+        if budget is None:
+            return
+        priority, reserve = self._effective(priority, budget)
+        wait = None if self._queued(provider) else self._take(provider, budget, reserve)
+        if wait == 0:
+            self._granted(provider, priority)
+            return
+        limit = self._wait_limit(priority, max_wait)
+        if limit <= 0 or (wait is not None and wait > limit):
+            raise self._reject(provider, budget, priority, wait)
+
+        give_up_at = time.monotonic() + limit
+        ticket = self._enqueue(provider, priority)
+        try:
+            while True:
+                wait = self._poll(provider, budget, ticket)
+                if wait == 0:
+                    self._granted(provider, priority)
+                    return
+                left = give_up_at - time.monotonic()
+                if left <= 0 or (wait is not None and wait > left):
+                    raise self._reject(provider, budget, priority, wait)
+                await asyncio.sleep(min(wait, left) if wait is not None else min(_POLL_INTERVAL, left))
+        finally:
+            # also runs on cancellation, so an abandoned request never holds the queue
+            self._dequeue(provider, ticket)
+
+    def report(self):
+        """Remaining quota per provider, e.g. {'unsplash': {'limit': 50, 'per_seconds': 3600, 'remaining': 12, ...}}."""
+        out = {}
+        for provider, budget in self.budgets.items():
+            tokens, wait = self._peek(provider, budget)
+            out[provider] = {
+                "limit": budget.calls,
+                "per_seconds": budget.per,
+                "remaining": max(int(tokens), 0),
+                "next_call_in_s": round(wait, 1),
+                "full_in_s": round((budget.calls - tokens) / budget.rate, 1),
+                "queued": len(self._queues.get(provider, ())),
+            }
+        return out
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """Process-wide RateLimiter built from RATE_LIMITS / RATE_LIMIT_PATH."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
+
+
+def report():
+    return get_limiter().report()
+
+
+if __name__ == "__main__":
+    print(json.dumps(report(), indent=2))
@@ -0,0 +1,305 @@
+"""Metrics, spans and per-request timing for graph nodes and outbound calls.
+
+Metrics are kept in a small in-process registry and rendered in the
+Prometheus text format (``render_prometheus``). Spans go to OpenTelemetry
+when ``opentelemetry-api`` is installed (configure an SDK/exporter to ship
+them) and are no-ops otherwise. While a node runs, a ``NodeRecorder`` in a
+context variable collects its HTTP calls, cache lookups and token usage so
+the node wrapper can attach a breakdown to the graph state.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+try:
+    from opentelemetry import trace as _otel_trace
+except ImportError:  # optional dependency
+    _otel_trace = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _label_text(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._label_text(key)} {value}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels):
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{self._label_text(key, [('le', repr(bound))])} {bucket_count}")
+            lines.append(f"{self.name}_bucket{self._label_text(key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {total}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+NODE_SECONDS = REGISTRY.histogram("travel_node_duration_seconds", "Wall time of each graph node run.", ["node"])
+NODE_ERRORS = REGISTRY.counter("travel_node_errors_total", "Graph node runs that raised.", ["node"])
+HTTP_SECONDS = REGISTRY.histogram(
+    "travel_http_request_duration_seconds", "Upstream HTTP latency per provider.", ["provider", "status"]
+)
+HTTP_BYTES = REGISTRY.counter("travel_http_response_bytes_total", "Upstream response payload bytes.", ["provider"])
+CACHE_REQUESTS = REGISTRY.counter("travel_cache_requests_total", "Cache lookups by outcome.", ["cache", "result"])
+LLM_TOKENS = REGISTRY.counter("travel_llm_tokens_total", "LLM tokens used per node.", ["node", "kind"])
+
+
+def render_prometheus():
+    return REGISTRY.render()
+
+
+# -- per-node recording ------------------------------------------------------
+
+class NodeRecorder:
+    """Everything one node run did upstream; filled in by record_* while the node is current."""
+
+    def __init__(self, node):
+        self.node = node
+        self.http_calls = 0
+        self.http_seconds = 0.0
+        self.http_bytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+
+    def as_dict(self):
+        return {
+            "node": self.node,
+            "http_calls": self.http_calls,
+            "http_ms": round(self.http_seconds * 1000, 2),
+            "http_bytes": self.http_bytes,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+_current: "contextvars.ContextVar[Optional[NodeRecorder]]" = contextvars.ContextVar("travel_node_recorder", default=None)
+
+
+@contextmanager
+def recording(node):
+    """Make a fresh NodeRecorder current for the duration of a node run."""
+    recorder = NodeRecorder(node)
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+
+
+def record_http(provider, seconds, status, nbytes=0):
+    HTTP_SECONDS.observe(seconds, provider=provider, status=status)
+    if nbytes:
+        HTTP_BYTES.inc(nbytes, provider=provider)
+    recorder = _current.get()
+    if recorder is not None:
+        with recorder._lock:
+            recorder.http_calls += 1
+            recorder.http_seconds += seconds
+            recorder.http_bytes += nbytes
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+    recorder = _current.get()
+    if recorder is not None:
+        with recorder._lock:
+            if hit:
+                recorder.cache_hits += 1
+            else:
+                recorder.cache_misses += 1
+
+
+def record_tokens(node, input_tokens, output_tokens):
+    if input_tokens:
+        LLM_TOKENS.inc(input_tokens, node=node, kind="input")
+    if output_tokens:
+        LLM_TOKENS.inc(output_tokens, node=node, kind="output")
+    recorder = _current.get()
+    if recorder is not None:
+        with recorder._lock:
+            recorder.input_tokens += input_tokens
+            recorder.output_tokens += output_tokens
+
+
+# -- spans -------------------------------------------------------------------
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def record_exception(self, exception):
+        pass
+
+
+@contextmanager
+def span(name, **attributes):
+    """OpenTelemetry span when the API is installed, otherwise a no-op."""
+    if _otel_trace is None:
+        yield _NoopSpan()
+        return
+    with _otel_trace.get_tracer("travel_agent").start_as_current_span(name) as current:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, value)
+        yield current
+
+
+@contextmanager
+def http_call(provider, method, url):
+    """Span + latency/size metrics around one outbound request; call .done(status, nbytes) inside."""
+    call = _HttpCall(provider)
+    with span(f"http {provider}", **{"http.method": method, "http.url": url, "provider": provider}) as current:
+        try:
+            yield call
+        except Exception as e:
+            current.record_exception(e)
+            call.status = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - call.started
+            current.set_attribute("http.status_code", str(call.status))
+            current.set_attribute("http.response_bytes", call.nbytes)
+            record_http(provider, elapsed, call.status, call.nbytes)
+
+
+class _HttpCall:
+    def __init__(self, provider):
+        self.provider = provider
+        self.started = time.perf_counter()
+        self.status = "unknown"
+        self.nbytes = 0
+
+    def done(self, status, nbytes=0):
+        self.status = status
+        self.nbytes = nbytes
+
+
+# -- scrape endpoint ---------------------------------------------------------
+
+_server = None
+_server_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """Serve /metrics for Prometheus from a daemon thread (once per process)."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
@@ -0,0 +1,177 @@
+"""Local content-addressed store of downscaled WebP thumbnails.
+
+Image search returns full-size renditions (often 1-2 MB each). The store
+downloads each source image once, shrinks it to THUMBNAIL_WIDTH and keeps
+it as THUMBNAIL_DIR/<digest[:2]>/<digest>.webp, where digest is the SHA-256
+of the WebP bytes. A SQLite index maps source URLs to digests so the next
+session (or process) finds a thumbnail without downloading anything.
+
+Pillow is optional. Without it, or with an empty THUMBNAIL_DIR, thumbnail()
+asks the CDN for a downscaled rendition instead.
+"""
+
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import settings
+from tools import http_client
+from tools.cache import TTLCache
+
+try:
+    from PIL import Image
+except ImportError:  # optional dependency
+    Image = None
+
+# query parameters that make each CDN resize on its side (imgix for Unsplash, Pexels' own)
+_CDN_PARAMS = {
+    "images.unsplash.com": (("w", "h", "fit", "fm", "q"), lambda width: {"w": width, "fm": "webp", "q": 75, "fit": "max"}),
+    "images.pexels.com": (("w", "h", "fit", "dpr"), lambda width: {"w": width, "auto": "compress", "cs": "tinysrgb"}),
+}
+
+
+def cdn_thumbnail(url, width=None):
+    """`url` rewritten to ask its CDN for a `width`-pixel rendition; unknown hosts are left alone."""
+    parts = urlsplit(url)
+    known = _CDN_PARAMS.get(parts.hostname or "")
+    if known is None:
+        return url
+    dropped, params = known
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in dropped]
+    query += [(k, str(v)) for k, v in params(width or settings.THUMBNAIL_WIDTH).items() if k not in dict(query)]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class ThumbnailStore:
+    """Source URL -> local WebP thumbnail, shared by every session; an empty `root` turns it off."""
+
+    def __init__(self, root=None, width=None, quality=None, workers=None):
+        root = settings.THUMBNAIL_DIR if root is None else root
+        self.root = Path(root) if root else None
+        self.width = width or settings.THUMBNAIL_WIDTH
+        self.quality = quality or settings.THUMBNAIL_QUALITY
+        self._lock = threading.Lock()
+        self._conn = self._connect() if Image is not None and self.root else None
+        # url -> local path; also makes concurrent requests for one image download it once
+        self._paths = TTLCache(max_entries=4096, name="thumbnail")
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers or settings.THUMBNAIL_WORKERS, thread_name_prefix="thumbnail"
+        ) if self._conn is not None else None
+
+    @property
+    def enabled(self):
+        return self._conn is not None
+
+    def _connect(self):
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.root / "index.sqlite3"), check_same_thread=False, timeout=5)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS thumbnails ("
+                "url TEXT PRIMARY KEY, digest TEXT NOT NULL, created_at REAL)"
+            )
+            conn.commit()
+            return conn
+        except (OSError, sqlite3.Error) as e:
+            # a read-only volume shouldn't break the page; fall back to CDN renditions
+            print(f"Thumbnail store disabled ({self.root}): {e}")
+            return None
+
+    def _file(self, digest):
+        return self.root / digest[:2] / f"{digest}.webp"
+
+    def path(self, url) -> Optional[str]:
+        """Local thumbnail for `url`, made on first use; None if the store is off or the image can't be read."""
+        if not self.enabled or not url:
+            return None
+        return self._paths.get_or_load(url, lambda: self._load(url), cache_if=bool)
+
+    def thumbnail(self, url) -> str:
+        """What to show for `url`: a local WebP file, or else the CDN's downscaled rendition."""
+        return self.path(url) or cdn_thumbnail(url, self.width)
+
+    def thumbnails(self, urls, wait=True) -> List[str]:
+        """thumbnail() for each of `urls`; with wait=False, ones not made yet show the CDN rendition for now."""
+        self.prefetch(urls)
+        if wait:
+            return [self.thumbnail(url) for url in urls]
+        return [self._paths.get(url) or cdn_thumbnail(url, self.width) for url in urls]
+
+    def prefetch(self, urls):
+        """Start making thumbnails for `urls` in the background (outside any request deadline)."""
+        if not self.enabled:
+            return
+        for url in urls:
+            self._pool.submit(self.path, url)
+
+    def _indexed(self, url):
+        with self._lock:
+            row = self._conn.execute("SELECT digest FROM thumbnails WHERE url = ?", (url,)).fetchone()
+        if row is not None and self._file(row[0]).exists():
+            return str(self._file(row[0]))
+        return None
+
+    def _load(self, url):
+        cached = self._indexed(url)
+        if cached is not None:
+            return cached
+        try:
+            response = http_client.get(url)
+            response.raise_for_status()
+            data = self._encode(response.content)
+        except Exception as e:
+            print(f"Thumbnail error for {url}: {e}")
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        target = self._file(digest)
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # write-then-rename so a reader never sees half a file
+            partial = target.with_suffix(f".{os.getpid()}.{threading.get_ident()}.part")
+            partial.write_bytes(data)
+            os.replace(partial, target)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO thumbnails (url, digest, created_at) VALUES (?, ?, ?)",
+                (url, digest, time.time()),
+            )
+            self._conn.commit()
+        return str(target)
+
+    def _encode(self, raw):
+        with Image.open(io.BytesIO(raw)) as image:
+            image = image.convert("RGB")
+            # keeps the aspect ratio and never upscales
+            image.thumbnail((self.width, self.width * 4))
+            out = io.BytesIO()
+            image.save(out, "WEBP", quality=self.quality)
+            return out.getvalue()
+
+    def stats(self):
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(DISTINCT digest) FROM thumbnails").fetchone()[0]
+        return {"enabled": True, "thumbnails": count, **self._paths.stats()}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_thumbnail_store():
+    """Process-wide ThumbnailStore."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ThumbnailStore()
+    return _store
@@ -1,15 +1,161 @@
+import os
+import sys
+import threading
+import time
+from functools import lru_cache
+
 import chromadb
 from sentence_transformers import SentenceTransformer
+
+from config import settings
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# one embedding per ingested city for VECTOR_QUERY_TEMPLATE, written by ingestion
+QUERY_COLLECTION = "city_queries"
+
 _client = None
 _model = None
 _collection = None
+_query_embeddings = None
+_init_lock = threading.Lock()
+_ready = threading.Event()
+_warm_thread = None
+_warm_lock = threading.Lock()
 
-def get_vector_store():
-    global _client, _model, _collection
+
+def get_collection():
+    """The 'cities' collection, opened without loading the embedding model."""
+    global _client, _collection
 
     if _collection is None:
-        _model = SentenceTransformer("all-MiniLM-L6-v2")
-        _client = chromadb.PersistentClient(path="storage/chroma")
-        _collection = _client.get_collection(name="cities")
+        with _init_lock:
+            if _collection is None:
+                _client = chromadb.PersistentClient(path=settings.CHROMA_PERSIST_DIR)
+                _collection = _client.get_collection(name="cities")
+
+    return _collection
+
+
+def get_vector_store():
+    global _model
+
+    collection = get_collection()
+    if _model is None:
+        # concurrent first requests must not load the model twice
+        with _init_lock:
+            if _model is None:
+                _model = SentenceTransformer(EMBEDDING_MODEL)
+
+    return collection, _model
+
+
+def normalize_query_text(text):
+    # all-MiniLM-L6-v2 is uncased, so case-folding doesn't change the embedding
+    return " ".join((text or "").lower().split())
+
+
+def _load_query_embeddings():
+    global _query_embeddings
+    if _query_embeddings is None:
+        get_collection()
+        loaded = {}
+        try:
+            stored = _client.get_collection(name=QUERY_COLLECTION).get(include=["embeddings", "metadatas"])
+            for metadata, embedding in zip(stored["metadatas"], stored["embeddings"]):
+                loaded[normalize_query_text(metadata["query_text"])] = [float(x) for x in embedding]
+        except Exception as e:
+            # stores ingested before query embeddings existed fall back to encoding
+            print(f"No precomputed query embeddings: {e}")
+        _query_embeddings = loaded
+    return _query_embeddings
+
+
+def reload_query_embeddings():
+    """Drop the in-memory copy so the next lookup re-reads it (call after ingestion)."""
+    global _query_embeddings
+    _query_embeddings = None
+
+
+@lru_cache(maxsize=settings.QUERY_EMBEDDING_CACHE_SIZE)
+def _encode_query(normalized_text):
+    _, model = get_vector_store()
+    return tuple(float(x) for x in model.encode([normalized_text])[0])
+
+
+def get_query_embedding(text):
+    """Embedding for a retrieval query: precomputed if ingested, else encoded once and cached."""
+    key = normalize_query_text(text)
+    precomputed = _load_query_embeddings().get(key)
+    if precomputed is not None:
+        return precomputed
+    return list(_encode_query(key))
+
+
+def warm_up(mark_ready=True):
+    """Load the model and collection, then run a dummy encode + query.
+
+    The first encode/query pays for kernel JIT and index loading; doing it
+    here keeps that off the first user's request. Returns True when warm.
+    Only the process that serves traffic should pass mark_ready, so the
+    ready file never outlives the warm state it stands for.
+    """
+    if _ready.is_set():
+        return True
+    try:
+        start = time.perf_counter()
+        collection, model = get_vector_store()
+        embedding = model.encode(["warm up"])[0]
+        collection.query(query_embeddings=[embedding.tolist()], n_results=1)
+        _load_query_embeddings()
+        # imported here: city_index builds on get_collection()
+        from tools.city_index import refresh_city_index
+        refresh_city_index(collection)
+        _ready.set()
+        if mark_ready:
+            _mark_ready_file()
+        print(f"Vector store warm in {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        print(f"Vector store warm-up failed: {e}")
+    return _ready.is_set()
+
+
+def warm_up_in_background():
+    """Start warm_up() on a daemon thread (once at a time); poll is_ready() for readiness."""
+    global _warm_thread
+    with _warm_lock:
+        if _warm_thread is None or not _warm_thread.is_alive():
+            _warm_thread = threading.Thread(target=warm_up, name="vector-store-warmup", daemon=True)
+            _warm_thread.start()
+        return _warm_thread
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def _mark_ready_file():
+    # lets a container healthcheck see readiness without an HTTP endpoint
+    if settings.VECTOR_STORE_READY_FILE:
+        try:
+            with open(settings.VECTOR_STORE_READY_FILE, "w") as f:
+                f.write(str(time.time()))
+        except OSError as e:
+            print(f"Could not write ready file: {e}")
+
+
+def clear_ready_file():
+    # a restarted container keeps /tmp; the previous run's file must not count
+    if settings.VECTOR_STORE_READY_FILE:
+        try:
+            os.remove(settings.VECTOR_STORE_READY_FILE)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Could not remove ready file: {e}")
+
 
-    return _collection, _model
\ No newline at end of file
+if __name__ == "__main__":
+    # entrypoint pre-start: fetch model weights, open the store, fail fast if broken.
+    # This process exits right after, so it clears the ready file instead of writing it
+    clear_ready_file()
+    sys.exit(0 if warm_up(mark_ready=False) else 1)
@@ -1,42 +1,92 @@
 import os
-import requests
-from datetime import datetime
+import threading
+import time
 from config import settings
+from tools import http_client, rate_limit
+from tools.cache import TTLCache
+from tools.forecast import normalize_forecast
+from tools.geocoding import get_geocode_cache
+
+# normalized daily forecasts shared by every session and thread in the process
+forecast_cache = TTLCache(max_entries=settings.FORECAST_CACHE_SIZE, name="forecast")
+
+
+def _forecast_cache_key(lat, lon):
+    precision = settings.FORECAST_COORD_PRECISION
+    return round(float(lat), precision), round(float(lon), precision)
+
+
+def _next_refresh_boundary(now=None):
+    """Epoch seconds of the next provider refresh step (00:00, 03:00, ... UTC)."""
+    step = settings.FORECAST_REFRESH_SECONDS
+    now = time.time() if now is None else now
+    return (int(now) // step + 1) * step
+
 
 class WeatherTool:
     def __init__(self):
         # .env loaded via config.settings import side-effect
         self.api_key = settings.require_env(settings.OPENWEATHER_API_KEY, "OPENWEATHER_API_KEY")
-        self.base_url = "https://api.openweathermap.org/data/2.5"
-        self.geo_url = "https://api.openweathermap.org/geo/1.0"
+        self.base_url = f"{settings.OPENWEATHER_BASE_URL}/data/2.5"
+        self.geo_url = f"{settings.OPENWEATHER_BASE_URL}/geo/1.0"
+
+    def _geocode_request(self, city_name):
+        url = f"{self.geo_url}/direct"
+        params = {
+            "q": city_name,
+            "limit": 1,
+            "appid": self.api_key
+        }
+        return url, params
+
+    def _parse_geocode(self, city_name, data):
+        cache = get_geocode_cache()
+        if not data:
+            cache.set_missing(city_name)
+            return None, None
+
+        # Get first result
+        location = data[0]
+        cache.set(city_name, location['lat'], location['lon'])
+        return location['lat'], location['lon']
 
     def _geocode_city(self, city_name):
+        cached = get_geocode_cache().get(city_name)
+        if cached is not None:
+            return cached
+
         try:
-            url = f"{self.geo_url}/direct"
-            params = {
-                "q": city_name,
-                "limit": 1,
-                "appid": self.api_key
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
+            url, params = self._geocode_request(city_name)
+            response = http_client.get(url, params=params, provider="openweathermap", priority=rate_limit.HIGH)
             response.raise_for_status()
             
-            data = response.json()
-            
-            if not data:
-                return None, None
-            
-            # Get first result
-            location = data[0]
-            return location['lat'], location['lon']
+            return self._parse_geocode(city_name, response.json())
             
+        except rate_limit.QuotaExceeded:
+            raise
         except Exception as e:
             print(f"Geocoding error: {e}")
             return None, None
 
-    def _fetch_forecast(self, lat, lon):
+    async def _ageocode_city(self, city_name):
+        cached = get_geocode_cache().get(city_name)
+        if cached is not None:
+            return cached
+
+        try:
+            url, params = self._geocode_request(city_name)
+            response = await http_client.aget(url, params=params, provider="openweathermap", priority=rate_limit.HIGH)
+            response.raise_for_status()
+
+            return self._parse_geocode(city_name, response.json())
 
+        except rate_limit.QuotaExceeded:
+            raise
+        except Exception as e:
+            print(f"Geocoding error: {e}")
+            return None, None
+
+    def _forecast_request(self, lat, lon):
         url = f"{self.base_url}/forecast"
         params = {
             "lat": lat,
@@ -44,12 +94,22 @@ class WeatherTool:
             "appid": self.api_key,
             "units": "metric"  # celsius
         }
-        
-        response = requests.get(url, params=params, timeout=10)
+        return url, params
+
+    def _fetch_forecast(self, lat, lon):
+        url, params = self._forecast_request(lat, lon)
+        response = http_client.get(url, params=params, provider="openweathermap", priority=rate_limit.HIGH)
         response.raise_for_status()
         
         return response.json()
 
+    async def _afetch_forecast(self, lat, lon):
+        url, params = self._forecast_request(lat, lon)
+        response = await http_client.aget(url, params=params, provider="openweathermap", priority=rate_limit.HIGH)
+        response.raise_for_status()
+
+        return response.json()
+
     def get_forecast(self, city_name):
         try:
             lat, lon = self._geocode_city(city_name)
@@ -57,64 +117,59 @@ class WeatherTool:
                 print(f"Could not geocode city: {city_name}")
                 return []
             
-            forecast_data = self._fetch_forecast(lat, lon)
+            normalized = forecast_cache.get_or_load(
+                _forecast_cache_key(lat, lon),
+                lambda: self._normalize_forecast(self._fetch_forecast(lat, lon)),
+                expires_at=_next_refresh_boundary(),
+                cache_if=bool,
+            )
+            # callers may annotate days; keep the cached copy pristine
+            return [dict(day) for day in normalized]
+        except rate_limit.QuotaExceeded:
+            # surfaced by the tool executor rather than read as "no forecast"
+            raise
+        except Exception as e:
+            print(f"Weather forecast error: {e}")
+            return []
+
+    async def aget_forecast(self, city_name):
+        try:
+            lat, lon = await self._ageocode_city(city_name)
+            if lat is None or lon is None:
+                print(f"Could not geocode city: {city_name}")
+                return []
 
-            normalized = self._normalize_forecast(forecast_data)
-            return normalized
+            async def load():
+                return self._normalize_forecast(await self._afetch_forecast(lat, lon))
+
+            normalized = await forecast_cache.aget_or_load(
+                _forecast_cache_key(lat, lon),
+                load,
+                expires_at=_next_refresh_boundary(),
+                cache_if=bool,
+            )
+            return [dict(day) for day in normalized]
+        except rate_limit.QuotaExceeded:
+            # surfaced by the tool executor rather than read as "no forecast"
+            raise
         except Exception as e:
             print(f"Weather forecast error: {e}")
             return []
 
     def _normalize_forecast(self, raw_data):
-        #convert raw API response to our standard format
+        # daily aggregates by the city's local date (tools/forecast.py)
+        return normalize_forecast(raw_data)
+
+
+_weather_tool = None
+_weather_tool_lock = threading.Lock()
 
-        if 'list' not in raw_data:
-            return []
-        
-        # OpenWeatherMap returns 3-hour intervals
-        # we need to aggregate by day
-        daily_data = {}
-        
-        for item in raw_data['list']:
-            # parse date
-            dt = datetime.fromtimestamp(item['dt'])
-            date_key = dt.strftime('%Y-%m-%d')
-            
-            # extract temperature
-            temp = item['main']['temp']
-            temp_min = item['main']['temp_min']
-            temp_max = item['main']['temp_max']
-            description = item['weather'][0]['description'] if item['weather'] else ""
-            
-            # aggregate by day
-            if date_key not in daily_data:
-                daily_data[date_key] = {
-                    'date': date_key,
-                    'temps': [],
-                    'temp_mins': [],
-                    'temp_maxs': [],
-                    'descriptions': []
-                }
-            
-            daily_data[date_key]['temps'].append(temp)
-            daily_data[date_key]['temp_mins'].append(temp_min)
-            daily_data[date_key]['temp_maxs'].append(temp_max)
-            daily_data[date_key]['descriptions'].append(description)
-        
-        # calculate daily min/max and pick most common description
-        normalized = []
-        
-        for date_key in sorted(daily_data.keys())[:7]:  # Limit to 7 days
-            day = daily_data[date_key]
-            
-            normalized.append({
-                'date': day['date'],
-                'temp_min': round(min(day['temp_mins']), 1),
-                'temp_max': round(max(day['temp_maxs']), 1),
-                'temp_avg': round(sum(day['temps']) / len(day['temps']), 1),
-                'description': max(set(day['descriptions']), key=day['descriptions'].count)
-            })
-        
-        return normalized
-    
 
+def get_weather_tool():
+    """Reusable WeatherTool; raises ValueError if OPENWEATHER_API_KEY is missing."""
+    global _weather_tool
+    if _weather_tool is None:
+        with _weather_tool_lock:
+            if _weather_tool is None:
+                _weather_tool = WeatherTool()
+    return _weather_tool
@@ -1,23 +1,77 @@
-from tavily import TavilyClient
+from tavily import TavilyClient, AsyncTavilyClient
+from tavily.errors import UsageLimitExceededError
+import asyncio
+import json
 import os
+import threading
+import weakref
 from config import settings
+from tools import http_client, rate_limit, telemetry
 class WebSearchTool:
     def __init__(self):
         # .env loaded via config.settings import side-effect
-        api_key = settings.require_env(settings.TAVILY_API_KEY, "TAVILY_API_KEY")
-        self.client = TavilyClient(api_key=api_key)
+        self.api_key = settings.require_env(settings.TAVILY_API_KEY, "TAVILY_API_KEY")
+        self.client = TavilyClient(api_key=self.api_key, api_base_url=settings.TAVILY_BASE_URL)
+        # the async client's httpx pool is bound to the loop that created it
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _search_kwargs(self, query, max_results):
+        # Tavily's own default is 60s; a request deadline (server) shortens it
+        remaining = http_client.remaining_time()
+        return dict(
+            query=query,
+            max_results=max_results,
+            search_depth="basic",
+            include_answer=False,
+            include_raw_content=False,
+            timeout=min(remaining, 60) if remaining is not None else 60,
+        )
 
     def search(self, query, max_results=5):
         try:
-            response = self.client.search(
-                query=query,
-                max_results=max_results,
-                search_depth="basic",
-                include_answer=False,
-                include_raw_content=False
-            )
+            rate_limit.get_limiter().acquire("tavily", rate_limit.NORMAL, max_wait=http_client.remaining_time())
+            with telemetry.http_call("tavily", "POST", self.client.base_url) as call:
+                response = self.client.search(**self._search_kwargs(query, max_results))
+                call.done(200, len(json.dumps(response)))
 
             return self._normalize_results(response)
+        except UsageLimitExceededError as e:
+            # Tavily answered 429: stop spending calls on it for a while
+            rate_limit.get_limiter().block("tavily")
+            print(f"Search Error: {e}")
+            return []
+        except rate_limit.QuotaExceeded as e:
+            # the pre-warmer stops asking Tavily for this cycle; a user just gets no results
+            if rate_limit.in_background():
+                raise
+            print(f"Search Error: {e}")
+            return []
+        except Exception as e:
+            print(f"Search Error: {e}")
+            return []
+
+    async def asearch(self, query, max_results=5):
+        try:
+            loop = asyncio.get_running_loop()
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = AsyncTavilyClient(api_key=self.api_key, api_base_url=settings.TAVILY_BASE_URL)
+                self._async_clients[loop] = client
+            await rate_limit.get_limiter().aacquire("tavily", rate_limit.NORMAL, max_wait=http_client.remaining_time())
+            with telemetry.http_call("tavily", "POST", client.base_url) as call:
+                response = await client.search(**self._search_kwargs(query, max_results))
+                call.done(200, len(json.dumps(response)))
+
+            return self._normalize_results(response)
+        except UsageLimitExceededError as e:
+            rate_limit.get_limiter().block("tavily")
+            print(f"Search Error: {e}")
+            return []
+        except rate_limit.QuotaExceeded as e:
+            if rate_limit.in_background():
+                raise
+            print(f"Search Error: {e}")
+            return []
         except Exception as e:
             print(f"Search Error: {e}")
             return []
@@ -33,3 +87,16 @@ class WebSearchTool:
 
         return normalized
 
+
+_search_tool = None
+_search_tool_lock = threading.Lock()
+
+
+def get_web_search_tool():
+    """Reusable WebSearchTool so the Tavily client's keep-alive session is shared."""
+    global _search_tool
+    if _search_tool is None:
+        with _search_tool_lock:
+            if _search_tool is None:
+                _search_tool = WebSearchTool()
+    return _search_tool